@@ -1,33 +1,302 @@
-from django.contrib import admin
-from .models import InventoryItem, TodoTask, Booking, FinancialTransaction
+from datetime import date, timedelta
+
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.db.models import BooleanField, ExpressionWrapper, F, Max, Min, Q, QuerySet
+from django.utils import timezone
+from .models import InventoryItem, InventoryMovement, TodoTask, RecurringTask, Booking, FinancialTransaction, FinancialRollup, DailyBalance, Job, ArchivedBooking, ArchivedTransaction
+from . import availability, caching, inventory, jobs, payments, search
+from .pagination import EstimatedCountPaginator
+
+
+class FullTextSearchMixin:
+    """
+    Search box backed by the core_search full-text index (core/search.py)
+    instead of LIKE '%term%' scans over search_fields. search_fields still
+    has to be set for the admin to show the box.
+    """
+    search_kind = None
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return search.filter_queryset(queryset, self.search_kind, search_term), False
+
+
+def _next_period(day, kind):
+    if kind == 'year':
+        return day.replace(year=day.year + 1, month=1, day=1)
+    if kind == 'month':
+        return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+    return day + timedelta(days=1)
+
+
+class IndexedDatesQuerySet(QuerySet):
+    """
+    QuerySet for changelists with a date_hierarchy on an indexed DateField.
+
+    The drill-down links come from dates() (the distinct years, months or
+    days) and a Min/Max aggregate. On SQLite both read every row in range.
+    Here each distinct period costs one index seek, MIN(field) WHERE
+    field >= start of the next period, so the cost follows the number of
+    links shown rather than the number of rows.
+    """
+
+    def dates(self, field_name, kind, order='ASC'):
+        if kind not in ('year', 'month', 'day'):
+            return super().dates(field_name, kind, order)
+
+        queryset = self.order_by()
+        periods = []
+        first = queryset.aggregate(first=Min(field_name))['first']
+        while first is not None:
+            if kind == 'year':
+                period = first.replace(month=1, day=1)
+            elif kind == 'month':
+                period = first.replace(day=1)
+            else:
+                period = first
+            periods.append(period)
+            if period.year == date.max.year:
+                break
+            first = queryset.filter(**{f'{field_name}__gte': _next_period(period, kind)}).aggregate(
+                first=Min(field_name))['first']
+        return periods[::-1] if order == 'DESC' else periods
+
+    def aggregate(self, *args, **kwargs):
+        # MIN and MAX in one statement stop SQLite from answering each from
+        # the ends of the index, so ask for them one at a time
+        if not args and len(kwargs) > 1 and all(isinstance(value, (Min, Max)) for value in kwargs.values()):
+            result = {}
+            for name, value in kwargs.items():
+                result.update(super().aggregate(**{name: value}))
+            return result
+        return super().aggregate(*args, **kwargs)
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Changelist settings for tables that grow without bound: no COUNT(*) of
+    the whole table on every load (show_full_result_count), an estimated
+    page count when the list is not filtered, and date_hierarchy links from
+    index seeks (IndexedDatesQuerySet).
+    """
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        return IndexedDatesQuerySet(model=queryset.model, query=queryset.query, using=queryset._db)
+
+
+class StockDeltaForm(ActionForm):
+    # Shown next to the action dropdown, read by apply_stock_delta
+    delta = forms.IntegerField(required=False, label='Stock change')
+
 
 @admin.register(InventoryItem)
-class InventoryItemAdmin(admin.ModelAdmin):
+class InventoryItemAdmin(FullTextSearchMixin, admin.ModelAdmin):
+    search_kind = 'inventory'
     list_display = ['name', 'category', 'quantity', 'unit', 'minimum_stock', 'last_updated', 'needs_restock']
     list_filter = ['category',]
     search_fields = ['name',]
+    action_form = StockDeltaForm
+    actions = ['apply_stock_delta']
+    # Maintained by core.inventory from the movement ledger
+    readonly_fields = ['burn_rate', 'last_consumed_at', 'projected_stockout', 'restock_by', 'restock_alerted_at']
+
+    def get_readonly_fields(self, request, obj=None):
+        # New items start with a stock level; after that it only changes
+        # through the "Apply stock change" action, which records a movement
+        if obj is not None:
+            return ['quantity', *self.readonly_fields]
+        return self.readonly_fields
+
+    def get_queryset(self, request):
+        # Worked out in SQL, so the column can also be sorted on
+        return super().get_queryset(request).annotate(restock=ExpressionWrapper(
+            Q(quantity__lte=F('minimum_stock')), output_field=BooleanField()))
+
+    @admin.display(boolean=True, ordering='restock', description='Needs restock')
+    def needs_restock(self, item):
+        return item.restock
+
+    @admin.action(description='Apply stock change to selected items')
+    def apply_stock_delta(self, request, queryset):
+        try:
+            delta = int(request.POST.get('delta') or 0)
+        except ValueError:
+            delta = 0
+        if not delta:
+            self.message_user(request, 'Enter a stock change other than zero.', messages.ERROR)
+            return
+
+        # One UPDATE and one INSERT for all selected items (core/inventory.py)
+        item_ids = list(queryset.values_list('pk', flat=True))
+        try:
+            inventory.apply_movements({pk: delta for pk in item_ids}, 'adjustment')
+        except inventory.InsufficientStock as error:
+            self.message_user(request, ' '.join(error.messages), messages.ERROR)
+            return
+        self.message_user(request, f'Stock changed by {delta:+d} for {len(item_ids)} item(s).')
+
+@admin.register(InventoryMovement)
+class InventoryMovementAdmin(LargeTableAdmin):
+    list_display = ['item', 'delta', 'reason', 'created_at']
+    list_filter = ['reason']
+    list_select_related = ['item']
+
+    # The ledger is written by core.inventory only
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
 @admin.register(TodoTask)
-class TodoTaskAdmin(admin.ModelAdmin):
+class TodoTaskAdmin(FullTextSearchMixin, admin.ModelAdmin):
+    search_kind = 'task'
     list_display = ['title', 'priority', 'is_completed', 'due_date', 'created_at']
     list_filter = ['priority', 'is_completed']
     search_fields = ['title', 'description']
-    ordering = ['-priority', 'due_date']
+    ordering = ['priority_rank', 'due_date']
+    actions = ['mark_completed']
+
+    @admin.action(description='Mark selected tasks completed')
+    def mark_completed(self, request, queryset):
+        count = queryset.filter(is_completed=False).update(is_completed=True)
+        # queryset.update() sends no signals
+        caching.invalidate_dashboard()
+        self.message_user(request, f'{count} task(s) marked completed.')
+
+@admin.register(RecurringTask)
+class RecurringTaskAdmin(admin.ModelAdmin):
+    list_display = ['title', 'frequency', 'priority', 'start_date', 'is_active', 'generated_through']
+    list_filter = ['frequency', 'is_active']
+    search_fields = ['title']
+
+class BookingAdminForm(forms.ModelForm):
+    class Meta:
+        model = Booking
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        fields = ['room_number', 'check_in', 'check_out', 'payment_status']
+        if all(field in cleaned_data for field in fields):
+            # The admin saves inside the same transaction (changeform_view is
+            # atomic), so the room stays locked until this booking is saved
+            availability.check_stay(*(cleaned_data[field] for field in fields), exclude_pk=self.instance.pk)
+        return cleaned_data
+
 
 @admin.register(Booking)
-class BookingAdmin(admin.ModelAdmin):
+class BookingAdmin(FullTextSearchMixin, LargeTableAdmin):
+    search_kind = 'booking'
+    # Same overlap check as availability.create_booking()
+    form = BookingAdminForm
     list_display = ['guest_name', 'contact_number', 'room_number', 
                     'number_of_guests', 'check_in', 'check_out', 
                     'payment_amount', 'payment_status','created_at']
-    list_filter = ['room_number', 'check_in', 'check_out']
+    list_filter = ['room_number', 'payment_status']
     search_fields = ['guest_name', 'contact_number']
+    # Both walk booking_check_in_idx
+    date_hierarchy = 'check_in'
+    ordering = ['-check_in', '-id']
+    actions = ['mark_paid']
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if obj.payment_status == 'paid' and obj.income_transaction_id is None:
+            # Record the income like every other way of marking a booking paid
+            payments.mark_paid(Booking.objects.filter(pk=obj.pk))
+            obj.refresh_from_db(fields=['income_transaction'])
+
+    @admin.action(description='Mark selected bookings paid')
+    def mark_paid(self, request, queryset):
+        # Records the missing income rows in bulk (core/payments.py)
+        count = payments.mark_paid(queryset)
+        self.message_user(request, f'{count} booking(s) marked paid and their income recorded.')
 
 @admin.register(FinancialTransaction)
-class FinancialTransactionAdmin(admin.ModelAdmin):
+class FinancialTransactionAdmin(FullTextSearchMixin, LargeTableAdmin):
+    search_kind = 'transaction'
     list_display = ['transaction_type', 'category', 'amount', 'description', 'date','created_at']
-    list_filter = ['transaction_type', 'category', 'date']
+    list_filter = ['transaction_type', 'category']
     search_fields = ['description']
+    # Both walk txn_date_id_idx
+    date_hierarchy = 'date'
+    ordering = ['-date', '-id']
+
+@admin.register(FinancialRollup)
+class FinancialRollupAdmin(admin.ModelAdmin):
+    list_display = ['period', 'period_start', 'category', 'income', 'expenses', 'transaction_count']
+    list_filter = ['period', 'category']
+
+    # Rows are maintained by core.rollups, never edited by hand
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(DailyBalance)
+class DailyBalanceAdmin(admin.ModelAdmin):
+    list_display = ['date', 'balance']
+    date_hierarchy = 'date'
+
+    # Rows are maintained by core.rollups, never edited by hand
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(ArchivedBooking)
+class ArchivedBookingAdmin(LargeTableAdmin):
+    list_display = ['guest_name', 'room_number', 'check_in', 'check_out',
+                    'payment_amount', 'payment_status', 'archived_at']
+    list_filter = ['room_number', 'payment_status']
+    date_hierarchy = 'check_in'
+    ordering = ['-check_in', '-id']
+
+    # Rows are moved here by core.archive, never edited by hand
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(ArchivedTransaction)
+class ArchivedTransactionAdmin(LargeTableAdmin):
+    list_display = ['transaction_type', 'category', 'amount', 'description', 'date', 'archived_at']
+    list_filter = ['transaction_type', 'category']
+    date_hierarchy = 'date'
+    ordering = ['-date', '-id']
+
+    # Rows are moved here by core.archive, never edited by hand
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
 
-    
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'run_at', 'attempts', 'max_attempts', 'finished_at', 'dedupe_key']
+    list_filter = ['status', 'name']
+    readonly_fields = ['name', 'arguments', 'dedupe_key', 'attempts', 'last_error',
+                       'locked_by', 'locked_at', 'created_at', 'finished_at']
+    actions = ['retry']
 
+    def has_add_permission(self, request):
+        return False
 
+    @admin.action(description='Run selected failed jobs again')
+    def retry(self, request, queryset):
+        # Skip jobs whose dedupe key already has a newer job queued
+        active_keys = Job.objects.filter(status__in=jobs.ACTIVE, dedupe_key__isnull=False).values('dedupe_key')
+        count = queryset.filter(status='failed').exclude(dedupe_key__in=active_keys).update(
+            status='queued', run_at=timezone.now(), attempts=0, finished_at=None)
+        self.message_user(request, f'{count} job(s) queued again.')
@@ -0,0 +1,124 @@
+"""
+Occupancy and revenue analytics per room: occupancy rate, ADR (average
+daily rate: revenue per night sold) and RevPAR (revenue per available room
+night).
+
+Stays are never expanded into nights. One indexed range query
+(archive.stays, live and archived bookings) fetches the stays that touch
+the period. Each stay
+is clipped to the period with date arithmetic, and nightly occupancy comes
+from a difference array: +1 on the first night, -1 after the last, then a
+running sum. The cost is O(stays + days). Active stays in a room never
+overlap, so a year of four rooms is at most ~1,460 rows, however much
+history the table holds.
+
+A stay's payment_amount is spread evenly over its nights. Cancelled stays
+are left out, and pending ones count as sold.
+
+Closed months are cached (see caching.analytics_month_key), so a year-long
+report only queries the current month and any partial months at its edges.
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.core.cache import cache
+
+from . import archive, availability, caching
+
+
+ZERO = Decimal('0.00')
+
+
+def _next_month(day):
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def _segments(start, end):
+    """Split [start, end] into (first, last, is_whole_month) pieces at month boundaries."""
+    first = start
+    while first <= end:
+        after = _next_month(first)
+        last = min(end, after - timedelta(days=1))
+        yield first, last, first.day == 1 and last == after - timedelta(days=1)
+        first = last + timedelta(days=1)
+
+
+def _compute(start, end):
+    """Nights sold and revenue per room, and rooms occupied per night, for [start, end]."""
+    stop = end + timedelta(days=1)
+    nights = {room: 0 for room in availability.ROOMS}
+    revenue = {room: ZERO for room in availability.ROOMS}
+    changes = [0] * ((stop - start).days + 1)
+
+    stays = archive.stays(start, stop, 'room_number', 'check_in', 'check_out', 'payment_amount')
+    for stay in stays:
+        room, check_in, check_out, amount = (
+            stay['room_number'], stay['check_in'], stay['check_out'], stay['payment_amount'])
+        first, last = max(check_in, start), min(check_out, stop)
+        sold = (last - first).days
+        nights[room] += sold
+        revenue[room] += amount * sold / (check_out - check_in).days
+        changes[(first - start).days] += 1
+        changes[(last - start).days] -= 1
+
+    return {'nights': nights, 'revenue': revenue, 'occupied': list(accumulate(changes[:-1]))}
+
+
+def _month(month_start, today):
+    """_compute() for a whole month, from the cache once the month has closed."""
+    month_end = _next_month(month_start) - timedelta(days=1)
+    if month_end >= today:
+        return _compute(month_start, month_end)
+    return cache.get_or_set(
+        caching.analytics_month_key(month_start),
+        lambda: _compute(month_start, month_end),
+        caching.ANALYTICS_TIMEOUT,
+    )
+
+
+def _rates(nights, revenue, available):
+    return {
+        'nights': nights,
+        'available': available,
+        'occupancy': nights / available if available else 0.0,
+        'revenue': revenue.quantize(ZERO),
+        'adr': (revenue / nights).quantize(ZERO) if nights else ZERO,
+        'revpar': (revenue / available).quantize(ZERO) if available else ZERO,
+    }
+
+
+def report(start, end, today=None):
+    """
+    Occupancy, ADR and RevPAR for the nights start..end (inclusive), per room
+    and for the whole inn, plus the number of rooms occupied each night:
+
+        {'start', 'end', 'days',
+         'rooms': [{'room', 'nights', 'available', 'occupancy', 'revenue', 'adr', 'revpar'}, ...],
+         'total': {same keys without 'room'},
+         'daily': [(night, rooms occupied), ...]}
+    """
+    today = today or date.today()
+    nights = {room: 0 for room in availability.ROOMS}
+    revenue = {room: ZERO for room in availability.ROOMS}
+    occupied = []
+
+    for first, last, whole_month in _segments(start, end):
+        part = _month(first, today) if whole_month else _compute(first, last)
+        for room in availability.ROOMS:
+            nights[room] += part['nights'][room]
+            revenue[room] += part['revenue'][room]
+        occupied += part['occupied']
+
+    days = (end - start).days + 1 if end >= start else 0
+    return {
+        'start': start,
+        'end': end,
+        'days': days,
+        'rooms': [{'room': room, **_rates(nights[room], revenue[room], days)}
+                  for room in availability.ROOMS],
+        'total': _rates(sum(nights.values()), sum(revenue.values(), ZERO),
+                        days * len(availability.ROOMS)),
+        'daily': [(start + timedelta(days=offset), count) for offset, count in enumerate(occupied)],
+    }
@@ -0,0 +1,199 @@
+"""
+Read-only JSON API, mounted at /api/v1/.
+
+Lists use cursor pagination: each page is one "ORDER BY ... LIMIT n" query
+that starts where the previous page ended, with no COUNT and no OFFSET, so
+page 1000 costs the same as page 1. Filters are applied in SQL, and
+?fields=a,b,c limits both the JSON keys and the columns selected.
+"""
+
+from datetime import date
+
+from django.db.models import F
+from rest_framework import serializers, viewsets
+from rest_framework.decorators import api_view
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.routers import DefaultRouter
+
+from . import search as full_text
+
+from .models import Booking, FinancialTransaction, InventoryItem, TodoTask
+from .serializers import (
+    BookingSerializer, FinancialTransactionSerializer, InventoryItemSerializer, TodoTaskSerializer,
+    requested_fields,
+)
+
+
+class ApiCursorPagination(CursorPagination):
+    """Cursor pagination ordered by the view's `ordering`."""
+
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def get_ordering(self, request, queryset, view):
+        return view.ordering
+
+
+def _date_param(request, name):
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise serializers.ValidationError({name: ['Use YYYY-MM-DD.']})
+
+
+def _choice_param(request, name, choices):
+    value = request.query_params.get(name)
+    if value and value not in dict(choices):
+        raise serializers.ValidationError({name: [f"Choose one of: {', '.join(dict(choices))}."]})
+    return value or None
+
+
+def _bool_param(request, name):
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    if value.lower() not in ('true', 'false', '1', '0'):
+        raise serializers.ValidationError({name: ['Use true or false.']})
+    return value.lower() in ('true', '1')
+
+
+class ReadOnlyViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Base viewset. Subclasses set `ordering` (unique or nearly unique, and
+    backed by an index) and implement filter_queryset_params().
+    """
+
+    pagination_class = ApiCursorPagination
+    ordering = ('-id',)
+
+    def get_queryset(self):
+        queryset = self.filter_queryset_params(self.queryset.all())
+
+        fields = requested_fields(self.request, self.get_serializer_class())
+        if fields:
+            # The cursor is read from the ordering fields, so keep them loaded
+            ordering = [name.lstrip('-') for name in self.ordering]
+            queryset = queryset.only(*fields, *ordering)
+        return queryset
+
+    def filter_queryset_params(self, queryset):
+        return queryset
+
+
+class InventoryItemViewSet(ReadOnlyViewSet):
+    """?category=, ?needs_restock=true|false"""
+
+    queryset = InventoryItem.objects.all()
+    serializer_class = InventoryItemSerializer
+    ordering = ('name', 'id')
+
+    def filter_queryset_params(self, queryset):
+        category = _choice_param(self.request, 'category', InventoryItem.CATEGORY_CHOICES)
+        if category:
+            queryset = queryset.filter(category=category)
+        needs_restock = _bool_param(self.request, 'needs_restock')
+        if needs_restock is True:
+            queryset = queryset.filter(quantity__lte=F('minimum_stock'))
+        elif needs_restock is False:
+            queryset = queryset.filter(quantity__gt=F('minimum_stock'))
+        return queryset
+
+
+class TodoTaskViewSet(ReadOnlyViewSet):
+    """?completed=true|false, ?priority=, ?due_before=, ?due_after="""
+
+    queryset = TodoTask.objects.all()
+    serializer_class = TodoTaskSerializer
+
+    def filter_queryset_params(self, queryset):
+        completed = _bool_param(self.request, 'completed')
+        if completed is not None:
+            queryset = queryset.filter(is_completed=completed)
+        priority = _choice_param(self.request, 'priority', TodoTask.PRIORITY_CHOICES)
+        if priority:
+            queryset = queryset.filter(priority=priority)
+        due_after = _date_param(self.request, 'due_after')
+        if due_after:
+            queryset = queryset.filter(due_date__gte=due_after)
+        due_before = _date_param(self.request, 'due_before')
+        if due_before:
+            queryset = queryset.filter(due_date__lte=due_before)
+        return queryset
+
+
+class BookingViewSet(ReadOnlyViewSet):
+    """?room=, ?status=, ?start= and ?end= (stays overlapping that range)"""
+
+    queryset = Booking.objects.all()
+    serializer_class = BookingSerializer
+    ordering = ('-check_in', '-id')
+
+    def filter_queryset_params(self, queryset):
+        room = _choice_param(self.request, 'room', Booking.ROOM_CHOICES)
+        if room:
+            queryset = queryset.filter(room_number=room)
+        status = _choice_param(self.request, 'status', Booking._meta.get_field('payment_status').choices)
+        if status:
+            queryset = queryset.filter(payment_status=status)
+        start = _date_param(self.request, 'start')
+        if start:
+            queryset = queryset.filter(check_out__gt=start)
+        end = _date_param(self.request, 'end')
+        if end:
+            queryset = queryset.filter(check_in__lt=end)
+        return queryset
+
+
+class FinancialTransactionViewSet(ReadOnlyViewSet):
+    """?type=, ?category=, ?start=, ?end= (inclusive)"""
+
+    queryset = FinancialTransaction.objects.all()
+    serializer_class = FinancialTransactionSerializer
+    # Walks txn_date_id_idx / txn_category_date_id_idx
+    ordering = ('-date', '-id')
+
+    def filter_queryset_params(self, queryset):
+        transaction_type = _choice_param(self.request, 'type', FinancialTransaction.TRANSACTION_TYPE_CHOICES)
+        if transaction_type:
+            queryset = queryset.filter(transaction_type=transaction_type)
+        category = _choice_param(self.request, 'category', FinancialTransaction.CATEGORY_CHOICES)
+        if category:
+            queryset = queryset.filter(category=category)
+        start = _date_param(self.request, 'start')
+        if start:
+            queryset = queryset.filter(date__gte=start)
+        end = _date_param(self.request, 'end')
+        if end:
+            queryset = queryset.filter(date__lte=end)
+        return queryset
+
+
+@api_view(['GET'])
+def search(request):
+    """
+    ?q= across guests, transactions, inventory and tasks, best match first.
+    Optional ?kind= (repeatable) and ?limit= (at most 100).
+    """
+    kinds = request.query_params.getlist('kind')
+    unknown = [kind for kind in kinds if kind not in full_text.KINDS]
+    if unknown:
+        raise serializers.ValidationError({'kind': [f"Choose from: {', '.join(full_text.KINDS)}."]})
+    try:
+        limit = min(int(request.query_params.get('limit', full_text.DEFAULT_LIMIT)), 100)
+    except ValueError:
+        raise serializers.ValidationError({'limit': ['Use a number.']})
+
+    query = request.query_params.get('q', '')
+    return Response({'results': full_text.search(query, max(limit, 1), kinds or None)})
+
+
+router = DefaultRouter()
+router.register('inventory', InventoryItemViewSet)
+router.register('tasks', TodoTaskViewSet)
+router.register('bookings', BookingViewSet)
+router.register('transactions', FinancialTransactionViewSet)
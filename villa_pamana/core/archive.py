@@ -0,0 +1,137 @@
+"""
+Archiving of closed periods.
+
+archive() moves bookings and transactions from before a month boundary out
+of the live Booking and FinancialTransaction tables into ArchivedBooking and
+ArchivedTransaction (same columns, same ids). The live tables, and their
+indexes, then only hold recent history, and every list view and lookup on
+them stays small however many years the inn has been running.
+
+The move is one INSERT ... SELECT and one DELETE per table in SQL, so no
+model signals fire: FinancialRollup and DailyBalance keep the archived
+amounts, and dashboards and totals do not change. core.rollups reads the
+archive as well as the live table when it rebuilds or verifies.
+
+Reading archived rows:
+- room_calendar and analytics read stays() (live and archived stays in one
+  UNION ALL query), so calendars and occupancy reports of old months are
+  unchanged.
+- The booking list, the ledger and the exports show archived rows only when
+  asked for history (?history=1).
+
+Pending bookings are never archived, so unpaid stays stay in view. An
+income row linked to a booking that stays live (Booking.income_transaction)
+stays live with it. Archived rows leave the search index (its triggers
+follow the live tables).
+"""
+
+from datetime import date, timedelta
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import availability, caching
+from .models import ArchivedBooking, ArchivedTransaction, Booking, FinancialTransaction
+
+
+# Months kept in the live tables by default (archive_history without --before)
+KEEP_MONTHS = 12
+
+# Bookings that are settled one way or the other
+ARCHIVED_STATUSES = ['paid', 'cancelled']
+
+
+def latest_boundary(today=None):
+    """
+    Latest date archive() accepts: the first day of last month. Last month
+    and this month are still checked by the close_month job, so they are not
+    closed yet.
+    """
+    today = today or date.today()
+    return (today.replace(day=1) - timedelta(days=1)).replace(day=1)
+
+
+def default_boundary(today=None):
+    """First day of the month KEEP_MONTHS months ago."""
+    month = (today or date.today()).replace(day=1)
+    for _ in range(KEEP_MONTHS):
+        month = (month - timedelta(days=1)).replace(day=1)
+    return month
+
+
+def candidates(before, today=None):
+    """
+    (bookings, transactions) querysets of the rows archive(before) moves:
+    settled bookings that checked out by `before` (the first day of a
+    month), and transactions dated before it except the income of bookings
+    that stay live. Raises ValueError if the period is not closed yet.
+    """
+    if before.day != 1:
+        raise ValueError('The archive boundary must be the first day of a month.')
+    if before > latest_boundary(today):
+        raise ValueError(f'Only months before {latest_boundary(today):%B %Y} are closed.')
+
+    settled = Q(check_out__lte=before, payment_status__in=ARCHIVED_STATUSES)
+    bookings = Booking.objects.filter(settled).order_by()
+    kept_income = Booking.objects.exclude(settled).filter(
+        income_transaction__isnull=False).values('income_transaction')
+    transactions = FinancialTransaction.objects.filter(date__lt=before).exclude(pk__in=kept_income).order_by()
+    return bookings, transactions
+
+
+def _move(queryset, archive_model, archived_at):
+    # Copy then delete in SQL: nothing is loaded into Python and no signal fires
+    model = queryset.model
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(field.column) for field in model._meta.concrete_fields)
+    source, target = quote(model._meta.db_table), quote(archive_model._meta.db_table)
+    selected, params = queryset.values('id').query.sql_with_params()
+    condition = f"{quote('id')} IN ({selected})"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {target} ({columns}, {quote('archived_at')}) "
+            f"SELECT {columns}, %s FROM {source} WHERE {condition}",
+            [archived_at, *params],
+        )
+        cursor.execute(f"DELETE FROM {source} WHERE {condition}", params)
+        return cursor.rowcount
+
+
+def archive(before, today=None):
+    """
+    Move the rows candidates(before) selects into the archive tables.
+    Returns {'bookings': n, 'transactions': n}. Raises ValueError if the
+    period is not closed yet.
+    """
+    bookings, transactions = candidates(before, today)
+    archived_at = connection.ops.adapt_datetimefield_value(timezone.now())
+
+    with transaction.atomic():
+        # Bookings first; the transactions query then sees the bookings left
+        # behind, whose income stays live
+        moved = {
+            'bookings': _move(bookings, ArchivedBooking, archived_at),
+            'transactions': _move(transactions, ArchivedTransaction, archived_at),
+        }
+        # Cached months already include the archived stays, but bulk writes
+        # always drop these caches
+        caching.invalidate_analytics()
+        caching.invalidate_calendar()
+    return moved
+
+
+def stays(check_in, check_out, *fields):
+    """
+    values() of the active stays overlapping [check_in, check_out), live and
+    archived, as one UNION ALL query. Both parts use their table's
+    (room_number, check_out, check_in) index, so the archive costs one index
+    probe for recent dates.
+    """
+    live = availability.overlapping(check_in, check_out).values(*fields)
+    archived = ArchivedBooking.objects.filter(
+        room_number__in=availability.ROOMS,
+        check_out__gt=check_in,
+        check_in__lt=check_out,
+    ).exclude(payment_status='cancelled').values(*fields)
+    return live.union(archived, all=True)
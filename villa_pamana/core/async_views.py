@@ -0,0 +1,107 @@
+"""
+Async versions of the read-heavy pages.
+
+Each page's independent queries run at the same time on a small thread pool,
+each thread with its own database connection, and are awaited together. The
+sync views in views.py run the same queries one after another.
+
+These views only pay off under an ASGI server (see villa_pamana/asgi.py).
+Under WSGI Django still runs them, one event loop per request.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+
+from . import availability, caching, profiling, rollups
+from .models import Booking
+from .views import (
+    _availability_range, _dashboard_context, _dashboard_queries, _financial_context, _ledger_page,
+    _past_bookings,
+)
+
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'ASYNC_DB_THREADS', 4),
+    thread_name_prefix='core-db',
+)
+
+
+def _query(func, *args):
+    """
+    Awaitable that runs func(*args) on the database thread pool. Its queries
+    count in the request's profile (core.profiling): sync_to_async runs it
+    in a copy of the caller's context, where the profile is active.
+    """
+    def run():
+        try:
+            with profiling.track_queries():
+                return func(*args)
+        finally:
+            # Pool threads never see request_finished, so tidy up here
+            # (honours CONN_MAX_AGE like the request cycle does)
+            close_old_connections()
+    return sync_to_async(run, thread_sensitive=False, executor=_executor)()
+
+
+async def _render(request, template_name, context):
+    # Rendering may touch the session (messages), which is sync-only
+    return await sync_to_async(profiling.render)(request, template_name, context)
+
+
+async def dashboard(request):
+    today = date.today()
+    key = caching.dashboard_key(today)
+
+    context = await cache.aget(key)
+    if context is None:
+        queries = _dashboard_queries(today)
+        values = await asyncio.gather(*(_query(query) for query in queries.values()))
+        context = _dashboard_context(today, dict(zip(queries, values)))
+        await cache.aset(key, context, caching.DASHBOARD_TIMEOUT)
+
+    return await _render(request, 'core/dashboard.html', context)
+
+
+async def booking_list(request):
+    today = date.today()
+    bookings = Booking.objects.all().order_by('-check_in')
+    check_in, check_out = _availability_range(request, today)
+
+    upcoming, past, free = await asyncio.gather(
+        _query(list, bookings.filter(check_out__gte=today)),
+        _query(lambda: list(_past_bookings(request, today))),
+        _query(availability.free_rooms, check_in, check_out),
+    )
+
+    context = {
+        'upcoming_bookings': upcoming,
+        'past_bookings': past,
+        'room_status': [(room, room in free) for room in availability.ROOMS],
+        'availability_check_in': check_in,
+        'availability_check_out': check_out,
+        'today': today,
+        'history': request.GET.get('history') == '1',
+    }
+    return await _render(request, 'core/booking_list.html', context)
+
+
+async def financial_summary(request):
+    (filters, transactions, next_page), totals = await asyncio.gather(
+        _query(_ledger_page, request),
+        _query(rollups.totals),
+    )
+
+    # The filtered count depends on the parsed filters
+    filtered_totals = totals
+    if filters:
+        filtered_totals = await _query(
+            rollups.totals, filters.get('start'), filters.get('end'), filters.get('category'))
+
+    context = _financial_context(filters, transactions, next_page, totals, filtered_totals)
+    return await _render(request, 'core/financial.html', context)
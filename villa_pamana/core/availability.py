@@ -0,0 +1,102 @@
+"""
+Room availability.
+
+Two bookings of the same room overlap when one checks in before the other
+checks out. Every question here is answered with a single range query on the
+(room_number, check_out, check_in) index: for a date range near the present
+only bookings that end after the range starts are visited, so the cost does
+not grow with booking history.
+"""
+
+import zlib
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+
+from .models import Booking
+
+
+ROOMS = [number for number, label in Booking.ROOM_CHOICES]
+
+# Namespace for PostgreSQL advisory locks taken by check_stay()
+ROOM_LOCK_NAMESPACE = 4120
+
+
+class BookingConflict(ValidationError):
+    """The requested room is already booked for part of the stay."""
+
+
+def overlapping(check_in, check_out, rooms=None):
+    """
+    Active (not cancelled) bookings that overlap [check_in, check_out),
+    limited to `rooms` (default: every room).
+    """
+    return Booking.objects.filter(
+        room_number__in=rooms or ROOMS,
+        check_out__gt=check_in,
+        check_in__lt=check_out,
+    ).exclude(payment_status='cancelled')
+
+
+def has_conflict(room_number, check_in, check_out, exclude_pk=None):
+    """True if another active booking holds the room for part of the stay."""
+    bookings = overlapping(check_in, check_out, rooms=[room_number])
+    if exclude_pk:
+        bookings = bookings.exclude(pk=exclude_pk)
+    return bookings.exists()
+
+
+def free_rooms(check_in, check_out):
+    """Room numbers with no active booking between check_in and check_out."""
+    taken = set(overlapping(check_in, check_out).values_list('room_number', flat=True).distinct())
+    return [room for room in ROOMS if room not in taken]
+
+
+def _lock_room(room_number):
+    """
+    Serialise bookings of one room until the surrounding transaction ends, so
+    two requests cannot both pass the conflict check and insert.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            # A no-op write takes SQLite's database-wide write lock up front
+            cursor.execute(f'UPDATE {Booking._meta.db_table} SET id = id WHERE 0')
+        elif connection.vendor == 'postgresql':
+            cursor.execute('SELECT pg_advisory_xact_lock(%s, %s)',
+                           [ROOM_LOCK_NAMESPACE, zlib.crc32(room_number.encode()) & 0x7FFFFFFF])
+
+
+def check_stay(room_number, check_in, check_out, payment_status='pending', exclude_pk=None):
+    """
+    Raise ValidationError for bad dates or an unknown room, and
+    BookingConflict if another active booking (not `exclude_pk`) holds the
+    room for part of the stay. Takes the room lock, so call it inside
+    transaction.atomic() and save in the same transaction.
+    """
+    if not check_in or not check_out or check_out <= check_in:
+        raise ValidationError('Check-out must be after check-in.')
+    if room_number not in ROOMS:
+        raise ValidationError(f'Unknown room {room_number!r}.')
+
+    _lock_room(room_number)
+    if payment_status != 'cancelled' and has_conflict(room_number, check_in, check_out, exclude_pk):
+        raise BookingConflict(
+            f'Room {room_number} is already booked between '
+            f'{check_in:%b %d, %Y} and {check_out:%b %d, %Y}.')
+
+
+def create_booking(**fields):
+    """
+    Insert a booking if its room is free for the whole stay.
+    Raises ValidationError for bad dates and BookingConflict if the room is
+    taken; the check and the insert happen atomically.
+    """
+    booking = Booking(**fields)
+    # Normalise string dates coming straight from request.POST
+    booking.check_in = Booking._meta.get_field('check_in').to_python(booking.check_in)
+    booking.check_out = Booking._meta.get_field('check_out').to_python(booking.check_out)
+
+    with transaction.atomic():
+        check_stay(booking.room_number, booking.check_in, booking.check_out, booking.payment_status)
+        booking.save()
+    return booking
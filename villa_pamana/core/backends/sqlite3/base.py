@@ -0,0 +1,45 @@
+"""
+SQLite backend with two extra OPTIONS, for running the site on SQLite in
+production:
+
+    'pragmas': {'journal_mode': 'WAL', ...}
+        PRAGMA statements run on every new connection.
+
+    'transaction_mode': 'IMMEDIATE'
+        atomic() blocks start with BEGIN IMMEDIATE instead of BEGIN, so a
+        transaction takes the write lock up front. With a plain BEGIN, two
+        transactions that read and then write can deadlock on the lock
+        upgrade, and one fails with "database is locked" without waiting
+        for busy_timeout.
+
+Django 5.1 adds 'transaction_mode' to the stock backend; this backend can be
+dropped once the project is on it (move 'pragmas' to 'init_command').
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        # sqlite3.connect() does not know these, so take them out
+        self.pragmas = kwargs.pop('pragmas', {})
+        self.transaction_mode = (kwargs.pop('transaction_mode', None) or 'DEFERRED').upper()
+        if self.transaction_mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f"DATABASES OPTIONS 'transaction_mode' must be one of {', '.join(TRANSACTION_MODES)}.")
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
@@ -0,0 +1,62 @@
+"""
+Helpers shared by the bench_* management commands.
+"""
+
+import time
+from contextlib import contextmanager
+from statistics import median
+
+from django.db import connection, connections
+
+
+@contextmanager
+def scratch_database():
+    """
+    Run the block against a freshly migrated throwaway database (the same
+    one the test runner would create), so benchmarks never touch real data.
+    """
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+@contextmanager
+def database_file(path, overrides):
+    """
+    Point the default database at the SQLite file `path`, with `overrides`
+    (ENGINE, OPTIONS, CONN_MAX_AGE...) applied, for the block. Threads
+    started inside the block connect to it too.
+    """
+    original = connections.settings['default']
+    _reset_default_connection({**original, **overrides, 'NAME': path})
+    try:
+        yield
+    finally:
+        _reset_default_connection(original)
+
+
+def _reset_default_connection(settings_dict):
+    connections.close_all()
+    connections.settings['default'] = settings_dict
+    # Drop this thread's wrapper so the next query builds one from the new settings
+    try:
+        del connections['default']
+    except AttributeError:
+        pass
+
+
+def time_call(func, repeat=20):
+    """Median wall time of func() in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return median(timings)
+
+
+def explain(queryset):
+    """The database's query plan for a queryset, on one line."""
+    return ' | '.join(line.strip() for line in queryset.explain().splitlines())
@@ -0,0 +1,124 @@
+"""
+Bulk edits of tasks and transactions.
+
+Each function changes every selected row with one UPDATE or DELETE ...
+WHERE id IN (...) inside one transaction, instead of a get/save/delete per
+row. Deletes are issued in SQL so no per-row signals fire (the search index
+triggers still run), and the work those signals would have done is done
+once here: rollups are rebuilt for the affected date range and the cached
+summaries are dropped.
+"""
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import BooleanField, Case, Max, Min, Value, When
+
+from . import caching, rollups
+from .imports import clean_row
+from .models import Booking, FinancialTransaction, TodoTask
+
+
+TASK_ACTIONS = ['complete', 'reopen', 'toggle', 'priority', 'delete']
+TRANSACTION_ACTIONS = ['category', 'delete']
+
+TRANSACTION_FIELDS = ['transaction_type', 'category', 'amount', 'description', 'date']
+
+
+def _delete(model, ids):
+    # One DELETE, without loading the rows for the delete signals
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {quote(model._meta.db_table)} WHERE {quote('id')} IN ({', '.join(['%s'] * len(ids))})",
+            ids,
+        )
+        return cursor.rowcount
+
+
+def update_tasks(ids, action, priority=None):
+    """
+    Apply `action` (one of TASK_ACTIONS) to the tasks with these ids.
+    'priority' needs `priority`. Returns the number of tasks changed.
+    """
+    if action not in TASK_ACTIONS:
+        raise ValueError(f'Unknown task action {action!r}.')
+    if action == 'priority' and priority not in TodoTask.PRIORITY_RANKS:
+        raise ValueError(f'Unknown priority {priority!r}.')
+
+    ids = list(ids)
+    if not ids:
+        return 0
+
+    tasks = TodoTask.objects.filter(id__in=ids)
+    with transaction.atomic():
+        if action == 'delete':
+            count = _delete(TodoTask, ids)
+        elif action == 'toggle':
+            count = tasks.update(is_completed=Case(
+                When(is_completed=True, then=Value(False)), default=Value(True), output_field=BooleanField()))
+        elif action == 'priority':
+            # update() skips TodoTask.save(), so the sort key is set here too
+            count = tasks.update(priority=priority, priority_rank=TodoTask.PRIORITY_RANKS[priority])
+        else:
+            count = tasks.update(is_completed=action == 'complete')
+        caching.invalidate_dashboard()
+    return count
+
+
+def update_transactions(ids, action, category=None):
+    """
+    Apply `action` (one of TRANSACTION_ACTIONS) to the transactions with
+    these ids. 'category' needs `category`. Returns the number of
+    transactions changed.
+    """
+    if action not in TRANSACTION_ACTIONS:
+        raise ValueError(f'Unknown transaction action {action!r}.')
+    if action == 'category' and category not in dict(FinancialTransaction.CATEGORY_CHOICES):
+        raise ValueError(f'Unknown category {category!r}.')
+
+    ids = list(ids)
+    transactions = FinancialTransaction.objects.filter(id__in=ids).order_by()
+    with transaction.atomic():
+        # The dates whose rollup rows and balances change
+        span = transactions.aggregate(first=Min('date'), last=Max('date'))
+        if span['first'] is None:
+            return 0
+
+        if action == 'delete':
+            # What on_delete=SET_NULL would have done, in one UPDATE
+            Booking.objects.filter(income_transaction__in=ids).update(income_transaction=None)
+            count = _delete(FinancialTransaction, ids)
+        else:
+            count = transactions.update(category=category)
+
+        rollups.rebuild(span['first'], span['last'])
+    return count
+
+
+def add_transactions(rows):
+    """
+    Validate `rows` (dicts of TRANSACTION_FIELDS, as posted) and insert them
+    with one bulk_create. Rows with no amount are skipped (the form's
+    selects and date always have a value). Raises
+    ValidationError listing the bad rows, with nothing saved, if any row is
+    invalid. Returns the number of transactions created.
+    """
+    transactions, errors = [], []
+    for number, row in enumerate(rows, start=1):
+        if not (row.get('amount') or '').strip():
+            continue
+        values, row_errors = clean_row(FinancialTransaction, TRANSACTION_FIELDS, row)
+        if row_errors:
+            errors.append(f"Row {number}: {'; '.join(row_errors)}")
+        else:
+            transactions.append(FinancialTransaction(**values))
+    if errors:
+        raise ValidationError(errors)
+
+    if transactions:
+        with transaction.atomic():
+            FinancialTransaction.objects.bulk_create(transactions)
+            # bulk_create() skips the signals that maintain the rollup
+            dates = [financial_transaction.date for financial_transaction in transactions]
+            rollups.rebuild(min(dates), max(dates))
+    return len(transactions)
@@ -0,0 +1,93 @@
+"""
+Cache keys and invalidation for pre-rendered summaries and analytics.
+
+Entries are dropped by the model signal handlers in core/signals.py and by the
+bulk code paths that bypass signals (queryset.update(), bulk_create()).
+"""
+
+import time
+from datetime import date
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+# Entries are keyed per day, so they never need to outlive it
+DASHBOARD_TIMEOUT = 60 * 60 * 24
+
+
+def dashboard_key(day):
+    return f'core:dashboard:{day.isoformat()}'
+
+
+def invalidate_dashboard():
+    key = dashboard_key(date.today())
+    cache.delete(key)
+    # Drop it again after commit, in case a concurrent request re-cached the
+    # old numbers while this transaction was still open
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def recurring_key(day):
+    # Set once the day's recurring tasks exist (core/recurring.py)
+    return f'core:recurring:{day.isoformat()}'
+
+
+def invalidate_recurring():
+    key = recurring_key(date.today())
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+# Closed months of occupancy analytics (core/analytics.py). Keys include a
+# version number; any booking change bumps it, which orphans every cached month
+# at once (a booking edit can move nights between months).
+ANALYTICS_TIMEOUT = 60 * 60 * 24 * 30
+ANALYTICS_VERSION_KEY = 'core:analytics:version'
+
+
+def analytics_month_key(month_start):
+    # Start from the clock, so a version key lost to eviction can never come
+    # back as a number that older entries were stored under
+    version = cache.get_or_set(ANALYTICS_VERSION_KEY, lambda: int(time.time()), None)
+    return f'core:analytics:{version}:{month_start:%Y-%m}'
+
+
+def invalidate_analytics():
+    def bump():
+        try:
+            cache.incr(ANALYTICS_VERSION_KEY)
+        except ValueError:
+            # Not cached (evicted or never set), so no month is either
+            pass
+    bump()
+    transaction.on_commit(bump)
+
+
+# Rendered month grids of the booking calendar (core/room_calendar.py). A
+# booking change drops the months it has nights in; bulk writes bump the
+# version instead, which orphans every month at once.
+CALENDAR_TIMEOUT = 60 * 60 * 24 * 30
+CALENDAR_VERSION_KEY = 'core:calendar:version'
+
+
+def calendar_month_key(month_start):
+    version = cache.get_or_set(CALENDAR_VERSION_KEY, lambda: int(time.time()), None)
+    return f'core:calendar:{version}:{month_start:%Y-%m}'
+
+
+def invalidate_calendar(months=None):
+    """Drop the cached grids for `months` (first days of months), or for every month."""
+    if months is None:
+        def bump():
+            try:
+                cache.incr(CALENDAR_VERSION_KEY)
+            except ValueError:
+                pass
+        bump()
+        transaction.on_commit(bump)
+        return
+
+    keys = [calendar_month_key(month) for month in months]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
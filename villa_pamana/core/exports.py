@@ -0,0 +1,98 @@
+"""
+Streaming CSV / NDJSON exports.
+
+Rows are read with values_list().iterator(chunk_size=...) and written out one
+line at a time, so memory use stays flat no matter how many years are
+exported. Filters are applied in SQL. With history=True, archived rows
+(core/archive.py) are included through one UNION ALL query.
+"""
+
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import ArchivedBooking, ArchivedTransaction, Booking, FinancialTransaction, InventoryItem
+
+
+CHUNK_SIZE = 2000
+
+# dataset name -> model, its archive model (if any), exported columns, and
+# the fields that the date-range and category filters apply to
+DATASETS = {
+    'transactions': {
+        'model': FinancialTransaction,
+        'archive': ArchivedTransaction,
+        'fields': ['id', 'date', 'transaction_type', 'category', 'amount', 'description', 'created_at'],
+        'date_field': 'date',
+        'category_field': 'category',
+    },
+    'bookings': {
+        'model': Booking,
+        'archive': ArchivedBooking,
+        'fields': ['id', 'guest_name', 'contact_number', 'room_number', 'number_of_guests',
+                   'check_in', 'check_out', 'payment_amount', 'payment_status', 'created_at'],
+        'date_field': 'check_in',
+        'category_field': 'room_number',
+    },
+    'inventory': {
+        'model': InventoryItem,
+        'archive': None,
+        'fields': ['id', 'name', 'category', 'quantity', 'minimum_stock', 'unit', 'last_updated'],
+        'date_field': None,
+        'category_field': 'category',
+    },
+}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def _filtered(model, spec, start, end, category):
+    # No default ordering: SQLite allows ORDER BY only on the whole UNION
+    rows = model.objects.order_by()
+    if spec['date_field']:
+        if start:
+            rows = rows.filter(**{f"{spec['date_field']}__gte": start})
+        if end:
+            rows = rows.filter(**{f"{spec['date_field']}__lte": end})
+    if category:
+        rows = rows.filter(**{spec['category_field']: category})
+    return rows.values_list(*spec['fields'])
+
+
+def export_rows(dataset, start=None, end=None, category=None, history=False):
+    """
+    Filtered values_list() iterator of the dataset's columns, in id order.
+    history=True adds the dataset's archived rows.
+    """
+    spec = DATASETS[dataset]
+    rows = _filtered(spec['model'], spec, start, end, category)
+    if history and spec['archive']:
+        rows = rows.union(_filtered(spec['archive'], spec, start, end, category), all=True)
+    return rows.order_by('id').iterator(chunk_size=CHUNK_SIZE)
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller."""
+
+    def write(self, value):
+        return value
+
+
+def stream(dataset, file_format='csv', **filters):
+    """Generator of text lines (header first for CSV) for one export."""
+    fields = DATASETS[dataset]['fields']
+    rows = export_rows(dataset, **filters)
+
+    if file_format == 'ndjson':
+        for row in rows:
+            yield json.dumps(dict(zip(fields, row)), cls=DjangoJSONEncoder) + '\n'
+        return
+
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(row)
@@ -0,0 +1,203 @@
+"""
+Bulk CSV import.
+
+The file is read one row at a time, each row is validated with the model
+fields' own clean() (so choices, max_length and decimal limits match the
+models), and valid rows are written with bulk_create in batches. Each batch
+is committed on its own, so a long import holds the database write lock
+(BEGIN IMMEDIATE on SQLite) for one batch at a time rather than for the
+whole file. Rollups are rebuilt once for the imported date range at the end,
+in a short transaction of their own; that also happens if the import fails
+partway, so the batches already committed are counted in the rollups.
+
+Bookings imported as paid get their income row in the same batch
+transaction (payments.mark_paid), so an import never leaves paid bookings
+without income for reconcile to report.
+
+The expected columns are the ones written by core.exports, so an export can
+be imported again. Unknown columns such as id and created_at are ignored.
+"""
+
+import csv
+from bisect import bisect_right, insort
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from . import availability, caching, payments, rollups
+from .models import Booking, FinancialTransaction, InventoryItem
+
+
+DEFAULT_BATCH_SIZE = 5000
+
+# Rejected rows beyond this are counted but not described
+MAX_REPORTED_ERRORS = 1000
+
+DATASETS = {
+    'transactions': {
+        'model': FinancialTransaction,
+        'fields': ['transaction_type', 'category', 'amount', 'description', 'date'],
+    },
+    'inventory': {
+        'model': InventoryItem,
+        'fields': ['name', 'category', 'quantity', 'minimum_stock', 'unit'],
+    },
+    'bookings': {
+        'model': Booking,
+        'fields': ['guest_name', 'contact_number', 'room_number', 'number_of_guests',
+                   'check_in', 'check_out', 'payment_amount', 'payment_status'],
+    },
+}
+
+
+class ImportReport:
+    """What an import did: rows inserted and rows rejected (with line numbers)."""
+
+    def __init__(self):
+        self.inserted = 0
+        self.rejected_count = 0
+        self.rejected = []
+
+    def reject(self, line, errors):
+        self.rejected_count += 1
+        if len(self.rejected) < MAX_REPORTED_ERRORS:
+            self.rejected.append((line, errors))
+
+
+def clean_row(model, fields, row):
+    """Return (values, errors) for one row of text values (a CSV row or a posted form row)."""
+    values, errors = {}, []
+    for name in fields:
+        field = model._meta.get_field(name)
+        raw = (row.get(name) or '').strip()
+        if raw == '' and field.has_default():
+            values[name] = field.get_default()
+            continue
+        try:
+            values[name] = field.clean(raw, None)
+        except ValidationError as error:
+            errors.append(f"{name}: {' '.join(error.messages)}")
+    return values, errors
+
+
+class _RoomCalendar:
+    """
+    Stays already taken per room, used to reject overlapping bookings within
+    a batch. Each batch loads the existing bookings in its date span with
+    one range query, inside the batch's transaction after its rooms are
+    locked (earlier batches are already committed).
+    """
+
+    def __init__(self, rows):
+        starts = [row['check_in'] for row in rows]
+        ends = [row['check_out'] for row in rows]
+        self.stays = defaultdict(list)
+        for room, check_in, check_out in availability.overlapping(
+                min(starts), max(ends)).values_list('room_number', 'check_in', 'check_out'):
+            self.stays[room].append((check_out, check_in))
+        for stays in self.stays.values():
+            stays.sort()
+
+    def take(self, room, check_in, check_out):
+        """Reserve the stay and return True, or return False if it overlaps."""
+        # Stays in one room never overlap, so sorting by check_out also sorts
+        # by check_in; only the first stay ending after check_in can clash
+        stays = self.stays[room]
+        index = bisect_right(stays, (check_in, check_in))
+        if index < len(stays) and stays[index][1] < check_out:
+            return False
+        insort(stays, (check_out, check_in))
+        return True
+
+
+def _check_bookings(batch, report):
+    """Drop rows with bad dates or room clashes from a batch of (line, values)."""
+    dated = []
+    for line, values in batch:
+        if values['check_out'] <= values['check_in']:
+            report.reject(line, ['check_out: must be after check_in'])
+        else:
+            dated.append((line, values))
+    if not dated:
+        return []
+
+    for room in sorted({values['room_number'] for _, values in dated}):
+        availability._lock_room(room)
+    calendar = _RoomCalendar([values for _, values in dated])
+    accepted = []
+    for line, values in sorted(dated, key=lambda item: item[1]['check_in']):
+        if values['payment_status'] != 'cancelled' and not calendar.take(
+                values['room_number'], values['check_in'], values['check_out']):
+            report.reject(line, [f"room_number: Room {values['room_number']} is already booked for these dates"])
+        else:
+            accepted.append((line, values))
+    return accepted
+
+
+def import_csv(dataset, text, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Import rows for `dataset` from an iterable of CSV text lines (an open
+    file works). Returns an ImportReport.
+    """
+    spec = DATASETS[dataset]
+    model, fields = spec['model'], spec['fields']
+    report = ImportReport()
+    date_range = [None, None]
+
+    reader = csv.DictReader(text)
+    optional = {name for name in fields
+                if model._meta.get_field(name).has_default() or model._meta.get_field(name).blank}
+    missing = [name for name in fields
+               if name not in (reader.fieldnames or []) and name not in optional]
+    if missing:
+        report.reject(1, [f"missing column(s): {', '.join(missing)}"])
+        return report
+
+    def flush(batch):
+        with transaction.atomic():
+            if dataset == 'bookings':
+                batch = _check_bookings(batch, report)
+            objects = [model(**values) for _, values in batch]
+            if dataset == 'inventory':
+                # bulk_create() skips InventoryItem.save()
+                for item in objects:
+                    item.update_restock_by()
+            created = model.objects.bulk_create(objects)
+            if dataset == 'bookings':
+                # Paid rows get their income row and link, dated on the import day
+                paid = [booking.pk for booking in created if booking.payment_status == 'paid']
+                if paid:
+                    payments.mark_paid(Booking.objects.filter(pk__in=paid))
+        # Only once the batch is committed
+        if dataset == 'transactions' and batch:
+            dates = [values['date'] for _, values in batch]
+            date_range[0] = min(filter(None, [date_range[0], min(dates)]))
+            date_range[1] = max(filter(None, [date_range[1], max(dates)]))
+        report.inserted += len(batch)
+
+    try:
+        batch = []
+        for row in reader:
+            values, errors = clean_row(model, fields, row)
+            if errors:
+                # Header is line 1, so the first data row is line 2
+                report.reject(reader.line_num, errors)
+                continue
+            batch.append((reader.line_num, values))
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+    finally:
+        # bulk_create() skips the model signals
+        if dataset == 'transactions' and date_range[0]:
+            with transaction.atomic():
+                rollups.rebuild(*date_range)
+        caching.invalidate_dashboard()
+        if dataset == 'bookings':
+            caching.invalidate_analytics()
+            caching.invalidate_calendar()
+
+    return report
@@ -0,0 +1,262 @@
+"""
+Stock movements.
+
+Quantities are changed with a conditional UPDATE (quantity = quantity + delta
+WHERE quantity + delta >= 0) instead of read-modify-write in Python, so
+concurrent updates cannot overwrite each other and stock can never go
+negative. Every change is recorded as an InventoryMovement.
+
+Every movement also refreshes the item's forecast (see update_forecasts): an
+exponentially weighted burn rate, updated from each decrease, and the day the
+stock runs out at that rate. Days without usage decay the rate, and the
+refresh_forecasts job applies that decay daily to items nobody touches.
+Both keep InventoryItem.restock_by, the column restock alerts use, current.
+"""
+
+import math
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.lookups import GreaterThanOrEqual
+from django.utils import timezone
+
+from . import caching
+from .models import InventoryItem, InventoryMovement
+
+
+# A usage this many days ago counts half as much as one today
+BURN_RATE_HALF_LIFE_DAYS = 7
+
+# Forecasts further out than this are not worth showing
+MAX_FORECAST_DAYS = 365
+
+# Restock alerts include items forecast to run out within this many days
+RESTOCK_FORECAST_DAYS = 7
+
+
+class InsufficientStock(ValidationError):
+    """A movement would take an item below zero (or the item does not exist)."""
+
+
+def decayed_rate(rate, used, elapsed_days):
+    """
+    New burn rate (units/day) after `used` units were consumed
+    `elapsed_days` after the previous consumption.
+
+    Time-weighted EWMA: the new sample (used / elapsed_days) gets weight
+    1 - 0.5 ** (elapsed_days / half life), so irregular gaps are handled and
+    back-to-back usages cannot blow the rate up.
+    """
+    decay = 0.5 ** (elapsed_days / BURN_RATE_HALF_LIFE_DAYS)
+    if rate <= 0 and elapsed_days > 0:
+        # No history yet: start from the first sample rather than from zero
+        return used / elapsed_days
+    if elapsed_days <= 0:
+        # Limit of (1 - decay) * used / elapsed_days as elapsed_days -> 0
+        return rate + used * math.log(2) / BURN_RATE_HALF_LIFE_DAYS
+    return decay * rate + (1 - decay) * used / elapsed_days
+
+
+def stockout_date(quantity, rate, since, now=None):
+    """
+    Day `quantity` runs out, or None. `rate` is the burn rate as of the last
+    usage at `since`; the days without usage up to `now` (default: since)
+    decay it like zero-usage samples, and the forecast counts from now. An
+    item nobody has used for weeks is therefore not forecast to run out.
+    """
+    if rate <= 0 or since is None:
+        return None
+    now = max(now or since, since)
+    idle_days = (now - since).total_seconds() / 86400
+    rate *= 0.5 ** (idle_days / BURN_RATE_HALF_LIFE_DAYS)
+    days = quantity / rate
+    if days > MAX_FORECAST_DAYS:
+        return None
+    return timezone.localdate(now) + timedelta(days=days)
+
+
+def update_forecasts(item_ids, consumed, now, restocked=()):
+    """
+    Refresh burn_rate, last_consumed_at, projected_stockout and restock_by
+    for `item_ids` after their quantities changed; `consumed` maps item id to
+    units used ({} for deliveries) and `restocked` lists the items whose
+    stock went up, which can be reported low again. One SELECT and one
+    UPDATE. The first usage of an item only records when it happened; the
+    rate needs two.
+    """
+    items = list(
+        InventoryItem.objects.filter(pk__in=item_ids)
+        .only('quantity', 'minimum_stock', 'burn_rate', 'last_consumed_at', 'projected_stockout',
+              'restock_by', 'restock_alerted_at')
+    )
+    for item in items:
+        used = consumed.get(item.pk, 0)
+        if used > 0:
+            if item.last_consumed_at is not None:
+                elapsed = (now - item.last_consumed_at).total_seconds() / 86400
+                item.burn_rate = decayed_rate(item.burn_rate, used, elapsed)
+            item.last_consumed_at = now
+        item.projected_stockout = stockout_date(item.quantity, item.burn_rate, item.last_consumed_at, now)
+        _update_restock(item, timezone.localdate(now))
+        if item.pk in restocked:
+            item.restock_alerted_at = None
+
+    InventoryItem.objects.bulk_update(
+        items, ['burn_rate', 'last_consumed_at', 'projected_stockout', 'restock_by', 'restock_alerted_at'])
+
+
+def _update_restock(item, today):
+    item.update_restock_by(today)
+    if item.restock_by is None or item.restock_by > today + timedelta(days=RESTOCK_FORECAST_DAYS):
+        # No longer running out: alert again if it does
+        item.restock_alerted_at = None
+
+
+def refresh_forecasts(now=None):
+    """
+    Recompute projected_stockout of every item with a burn rate as of `now`
+    (default: now), so forecasts of items that stopped being used move out
+    or disappear. Run daily by the refresh_forecasts job. One SELECT and one
+    UPDATE; returns the number of forecasts that changed.
+    """
+    now = now or timezone.now()
+    items = list(
+        InventoryItem.objects.filter(burn_rate__gt=0, last_consumed_at__isnull=False)
+        .only('quantity', 'minimum_stock', 'burn_rate', 'last_consumed_at', 'projected_stockout',
+              'restock_by', 'restock_alerted_at')
+    )
+    changed = []
+    for item in items:
+        forecast = stockout_date(item.quantity, item.burn_rate, item.last_consumed_at, now)
+        if forecast != item.projected_stockout:
+            item.projected_stockout = forecast
+            _update_restock(item, timezone.localdate(now))
+            changed.append(item)
+
+    if changed:
+        InventoryItem.objects.bulk_update(
+            changed, ['projected_stockout', 'restock_by', 'restock_alerted_at'], batch_size=500)
+        caching.invalidate_dashboard()
+    return len(changed)
+
+
+def restock_alerts(today):
+    """
+    Items at or below their minimum stock, or forecast to run out within
+    RESTOCK_FORECAST_DAYS; the longest-low and soonest to run out first.
+    One range scan of item_restock_idx, already in order: restock_by is the
+    day an item got low, otherwise its forecast (kept fresh daily by
+    refresh_forecasts, so usage that stopped drops out).
+    """
+    return InventoryItem.objects.filter(
+        restock_by__lte=today + timedelta(days=RESTOCK_FORECAST_DAYS),
+    ).order_by('restock_by', 'id')
+
+
+def needs_alert(item_ids, today=None):
+    """
+    True if any of `item_ids` needs restocking and the admins have not been
+    told yet. Views call this after a movement so the restock_alert job is
+    only queued when there is something new to report.
+    """
+    return restock_alerts(today or timezone.localdate()).filter(
+        pk__in=item_ids, restock_alerted_at__isnull=True).exists()
+
+
+def _per_item(values):
+    # CASE id WHEN 1 THEN 5 WHEN 2 THEN -3 ... END
+    return Case(
+        *[When(pk=pk, then=Value(value)) for pk, value in values.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def _shortage_error(deltas):
+    names = InventoryItem.objects.filter(pk__in=deltas).in_bulk()
+    short = [
+        f"{names[pk].name} (have {names[pk].quantity}, change {delta:+d})" if pk in names
+        else f"item #{pk} (not found)"
+        for pk, delta in deltas.items()
+        if pk not in names or names[pk].quantity + delta < 0
+    ]
+    return InsufficientStock('Not enough stock: ' + ', '.join(short) + '.')
+
+
+def apply_movements(deltas, reason):
+    """
+    Apply {item_id: delta} in one transaction: a single conditional UPDATE
+    and a single INSERT of movement rows, then the forecast refresh. Either
+    every item changes or none does; InsufficientStock is raised if any item
+    would go below zero.
+    """
+    deltas = {int(pk): int(delta) for pk, delta in deltas.items() if int(delta)}
+    if not deltas:
+        return
+
+    delta = _per_item(deltas)
+    now = timezone.now()
+    with transaction.atomic():
+        updated = (
+            InventoryItem.objects
+            .filter(pk__in=deltas)
+            .filter(GreaterThanOrEqual(F('quantity') + delta, 0))
+            .update(quantity=F('quantity') + delta, last_updated=now)
+        )
+        if updated != len(deltas):
+            # Raising rolls back the rows that did change
+            raise _shortage_error(deltas)
+
+        InventoryMovement.objects.bulk_create([
+            InventoryMovement(item_id=pk, delta=change, reason=reason)
+            for pk, change in deltas.items()
+        ])
+        # The UPDATE above holds the row locks, so these reads are current
+        update_forecasts(deltas, {pk: -change for pk, change in deltas.items() if change < 0}, now,
+                         restocked={pk for pk, change in deltas.items() if change > 0})
+        # queryset.update() sends no signals
+        caching.invalidate_dashboard()
+
+
+def apply_movement(item_id, delta, reason):
+    """Change one item's stock by delta. See apply_movements()."""
+    apply_movements({item_id: delta}, reason)
+
+
+def stocktake(counts):
+    """
+    Set {item_id: counted_quantity} from a physical count and record the
+    differences as stock-take movements. One SELECT, one UPDATE, one INSERT,
+    then the forecast refresh.
+    """
+    counts = {int(pk): int(count) for pk, count in counts.items()}
+    if any(count < 0 for count in counts.values()):
+        raise InsufficientStock('Counted quantities cannot be negative.')
+    if not counts:
+        return
+
+    with transaction.atomic():
+        current = dict(
+            InventoryItem.objects.select_for_update()
+            .filter(pk__in=counts).values_list('pk', 'quantity')
+        )
+        missing = set(counts) - set(current)
+        if missing:
+            raise InsufficientStock(f'Unknown item(s): {", ".join(map(str, sorted(missing)))}.')
+
+        now = timezone.now()
+        InventoryItem.objects.filter(pk__in=counts).update(
+            quantity=_per_item(counts), last_updated=now)
+
+        InventoryMovement.objects.bulk_create([
+            InventoryMovement(item_id=pk, delta=count - current[pk], reason='stocktake')
+            for pk, count in counts.items()
+            if count != current[pk]
+        ])
+        # A count below the books is stock that was used without being logged
+        update_forecasts(counts, {pk: current[pk] - count for pk, count in counts.items()
+                                  if count < current[pk]}, now,
+                         restocked={pk for pk, count in counts.items() if count > current[pk]})
+        caching.invalidate_dashboard()
@@ -0,0 +1,181 @@
+"""
+Background jobs.
+
+Work that should not hold up a request is queued as a Job row with
+enqueue() and run by `python manage.py run_jobs`, a worker process with a
+small thread pool. The queue is a database table, so there is no broker to
+install or keep running.
+
+- Tasks are plain functions registered with @task (see core/tasks.py) and
+  called with the job's arguments as keyword arguments.
+- A job that raises is retried up to max_attempts times, waiting
+  RETRY_DELAY, then twice that, and so on, between attempts.
+- While a job is queued or running, enqueueing another with the same
+  dedupe_key returns the existing job (a partial unique index enforces it).
+- run_at schedules a job for later. @task(every=...) makes the worker keep
+  the next run of that task queued, one interval after the previous one.
+- A job left 'running' by a worker that died is queued again after
+  STALE_AFTER.
+
+Workers claim jobs inside a transaction: BEGIN IMMEDIATE on SQLite (see
+settings.DATABASES), SELECT ... FOR UPDATE SKIP LOCKED elsewhere, so two
+workers never run the same job.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import timedelta
+
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+
+logger = logging.getLogger('core.jobs')
+
+RETRY_DELAY = timedelta(seconds=30)
+STALE_AFTER = timedelta(minutes=30)
+
+# name -> (function, max_attempts)
+TASKS = {}
+# name -> interval, for tasks registered with every=...
+PERIODIC = {}
+
+ACTIVE = ['queued', 'running']
+
+
+def task(name=None, max_attempts=3, every=None):
+    """Register a function as a job task, optionally run every `every` (a timedelta)."""
+    def register(func):
+        task_name = name or func.__name__
+        TASKS[task_name] = (func, max_attempts)
+        if every:
+            PERIODIC[task_name] = every
+        return func
+    return register
+
+
+def enqueue(name, dedupe_key=None, run_at=None, **arguments):
+    """
+    Queue task `name` to run with `arguments` (JSON-serialisable) at run_at
+    (default: now). Returns the Job, or the already active job with the same
+    dedupe_key.
+    """
+    if name not in TASKS:
+        raise ValueError(f'Unknown job task {name!r}.')
+
+    job = Job(name=name, arguments=arguments, dedupe_key=dedupe_key,
+              run_at=run_at or timezone.now(), max_attempts=TASKS[name][1])
+    if dedupe_key is None:
+        job.save()
+        return job
+
+    try:
+        with transaction.atomic():
+            job.save()
+        return job
+    except IntegrityError:
+        existing = Job.objects.filter(dedupe_key=dedupe_key, status__in=ACTIVE).first()
+        # The other job may have finished in the meantime
+        return existing or enqueue(name, dedupe_key, run_at, **arguments)
+
+
+def claim(worker, limit):
+    """Mark up to `limit` due jobs as running by `worker` and return them."""
+    now = timezone.now()
+    with transaction.atomic():
+        due = (Job.objects.select_for_update(skip_locked=True)
+               .filter(status='queued', run_at__lte=now).order_by('run_at', 'id'))
+        ids = list(due.values_list('id', flat=True)[:limit])
+        Job.objects.filter(id__in=ids, status='queued').update(
+            status='running', locked_by=worker, locked_at=now, attempts=F('attempts') + 1)
+    return list(Job.objects.filter(id__in=ids, locked_by=worker, status='running'))
+
+
+def run(job):
+    """Run one claimed job and record the outcome (done, queued for a retry, or failed)."""
+    started = time.perf_counter()
+    try:
+        if job.name not in TASKS:
+            raise LookupError(f'No task registered as {job.name!r}.')
+        TASKS[job.name][0](**job.arguments)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            retry_at = timezone.now() + RETRY_DELAY * 2 ** (job.attempts - 1)
+            logger.warning('job %s %s failed (attempt %d of %d), retrying at %s',
+                           job.pk, job.name, job.attempts, job.max_attempts, retry_at)
+            Job.objects.filter(pk=job.pk).update(
+                status='queued', run_at=retry_at, last_error=error, locked_by='', locked_at=None)
+        else:
+            logger.error('job %s %s failed after %d attempts:\n%s', job.pk, job.name, job.attempts, error)
+            Job.objects.filter(pk=job.pk).update(status='failed', last_error=error, finished_at=timezone.now())
+        return False
+
+    Job.objects.filter(pk=job.pk).update(status='done', finished_at=timezone.now())
+    logger.info('job %s %s done in %.0f ms', job.pk, job.name, (time.perf_counter() - started) * 1000)
+    return True
+
+
+def requeue_stale(now=None):
+    """Queue again the jobs whose worker stopped before finishing them."""
+    now = now or timezone.now()
+    return Job.objects.filter(status='running', locked_at__lt=now - STALE_AFTER).update(
+        status='queued', locked_by='', locked_at=None)
+
+
+def schedule_periodic(now=None):
+    """Queue the next run of every periodic task that has none queued."""
+    now = now or timezone.now()
+    for name, every in PERIODIC.items():
+        key = f'periodic:{name}'
+        last = Job.objects.filter(dedupe_key=key).order_by('-run_at').values('status', 'run_at').first()
+        if last and last['status'] in ACTIVE:
+            continue
+        # A worker that was down for a while runs a missed task once, not once per interval
+        run_at = max(now, last['run_at'] + every) if last else now
+        enqueue(name, dedupe_key=key, run_at=run_at)
+
+
+def _run_in_thread(job):
+    try:
+        return run(job)
+    finally:
+        # Pool threads never see request_finished, so tidy up here
+        close_old_connections()
+
+
+def work(threads=2, poll=1.0, once=False, stop=None):
+    """
+    Run jobs until `stop` (a threading.Event) is set, or, with once=True,
+    until no job is due. Returns the number of jobs run.
+    """
+    worker = f'{socket.gethostname()}:{os.getpid()}'
+    stop = stop or threading.Event()
+    finished = 0
+    running = set()
+
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='core-job') as pool:
+        while not stop.is_set() or running:
+            if not stop.is_set() and len(running) < threads:
+                requeue_stale()
+                schedule_periodic()
+                running |= {pool.submit(_run_in_thread, job) for job in claim(worker, threads - len(running))}
+
+            if not running:
+                if once:
+                    break
+                stop.wait(poll)
+                continue
+
+            done, running = wait(running, timeout=poll, return_when=FIRST_COMPLETED)
+            finished += len(done)
+
+    return finished
@@ -0,0 +1,41 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core import archive
+
+
+class Command(BaseCommand):
+    help = ('Move transactions and settled bookings from before a month boundary into '
+            'the archive tables (see core/archive.py).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', type=date.fromisoformat,
+                            help='First day of the first month to keep (YYYY-MM-DD). '
+                                 f'Defaults to {archive.KEEP_MONTHS} months ago.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only count the rows that would be archived.')
+        parser.add_argument('--vacuum', action='store_true',
+                            help='Reclaim the freed space afterwards (SQLite VACUUM).')
+
+    def handle(self, *args, **options):
+        before = options['before'] or archive.default_boundary()
+
+        try:
+            if options['dry_run']:
+                bookings, transactions = archive.candidates(before)
+                self.stdout.write(f'Would archive {transactions.count()} transaction(s) and '
+                                  f'{bookings.count()} booking(s) from before {before}.')
+                return
+            moved = archive.archive(before)
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        if options['vacuum'] and connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('VACUUM')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {moved['transactions']} transaction(s) and {moved['bookings']} "
+            f'booking(s) from before {before}.'))
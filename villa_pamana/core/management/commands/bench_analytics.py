@@ -0,0 +1,72 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from core import analytics, availability
+from core.bench import scratch_database, time_call
+from core.models import Booking
+
+
+class Command(BaseCommand):
+    help = ('Time a year-long occupancy report (core.analytics) on a large booking '
+            'history, cold and with closed months cached. Runs in a throwaway database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=100000, help='Booking history size.')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Timed runs per measurement (the median is reported).')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        today = date.today()
+        end = today - timedelta(days=1)
+        start = end - timedelta(days=364)
+
+        with scratch_database():
+            # Back-to-back stays per room, generated backwards from today;
+            # one in twenty is cancelled
+            cursors = {room: today for room in availability.ROOMS}
+            bookings = []
+            while len(bookings) < options['bookings']:
+                room = availability.ROOMS[len(bookings) % len(availability.ROOMS)]
+                check_out = cursors[room] - timedelta(days=rng.randint(0, 2))
+                check_in = check_out - timedelta(days=rng.randint(1, 4))
+                cursors[room] = check_in
+                bookings.append(Booking(
+                    guest_name='Guest', contact_number='09170000000', room_number=room,
+                    number_of_guests=2, check_in=check_in, check_out=check_out,
+                    payment_amount=Decimal(1500 * (check_out - check_in).days),
+                    payment_status='cancelled' if rng.random() < 0.05 else 'paid',
+                ))
+            Booking.objects.bulk_create(bookings, batch_size=2000)
+
+            def cold():
+                cache.clear()
+                return analytics.report(start, end, today)
+
+            cold_ms = time_call(cold, options['repeat'])
+            analytics.report(start, end, today)
+            warm_ms = time_call(lambda: analytics.report(start, end, today), options['repeat'])
+            nightly_ms = time_call(lambda: self._per_night_loop(start, end), options['repeat'])
+
+            total = analytics.report(start, end, today)['total']
+            self.stdout.write(f'{len(bookings)} bookings, report {start} to {end}')
+            self.stdout.write(f'  occupancy {total["occupancy"]:.1%}, ADR {total["adr"]}, RevPAR {total["revpar"]}')
+            for label, elapsed in (('cold (nothing cached)', cold_ms),
+                                   ('closed months cached', warm_ms),
+                                   ('per-night loop (for scale)', nightly_ms)):
+                self.stdout.write(f'  {label:<28} {elapsed:9.2f} ms')
+
+    def _per_night_loop(self, start, end):
+        # The straightforward version: expand every stay into its nights
+        nights = {}
+        for booking in Booking.objects.exclude(payment_status='cancelled'):
+            for offset in range(booking.duration()):
+                night = booking.check_in + timedelta(days=offset)
+                if start <= night <= end:
+                    nights[booking.room_number] = nights.get(booking.room_number, 0) + 1
+        return nights
@@ -0,0 +1,80 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from statistics import quantiles
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core.bench import scratch_database
+
+
+# sync view name -> async view name
+PAGES = {
+    'dashboard': 'dashboard_async',
+    'booking_list': 'booking_list_async',
+    'financial_list': 'financial_list_async',
+}
+
+
+class Command(BaseCommand):
+    help = ('Compare latency and throughput of the sync (WSGI) and async (ASGI) pages '
+            'under concurrent load, in a throwaway seeded database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests per page and mode.')
+        parser.add_argument('--concurrency', type=int, default=8, help='Requests in flight at once.')
+        parser.add_argument('--years', type=int, default=3, help='Years of data to seed.')
+
+    def handle(self, *args, **options):
+        total, concurrency = options['requests'], options['concurrency']
+
+        # No caching, so every request does its queries
+        overrides = {
+            'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver'],
+            'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}},
+        }
+        with override_settings(**overrides), scratch_database():
+            call_command('seed_data', years=options['years'], stdout=self.stdout)
+
+            self.stdout.write(
+                f'{"page":<16} {"mode":<6} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8}')
+            for sync_name, async_name in PAGES.items():
+                for mode, timings, elapsed in (
+                    ('wsgi', *self._sync_load(reverse(sync_name), total, concurrency)),
+                    ('asgi', *asyncio.run(self._async_load(reverse(async_name), total, concurrency))),
+                ):
+                    cuts = quantiles(timings, n=20)
+                    self.stdout.write(
+                        f'{sync_name:<16} {mode:<6} {total / elapsed:>8.1f} {cuts[9]:>8.2f} {cuts[18]:>8.2f}')
+
+    def _sync_load(self, url, total, concurrency):
+        # The WSGI path: one worker thread per in-flight request
+        def request(_):
+            started = time.perf_counter()
+            Client().get(url)
+            return (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            timings = list(pool.map(request, range(total)))
+        return timings, time.perf_counter() - started
+
+    async def _async_load(self, url, total, concurrency):
+        # The ASGI path: every request on one event loop
+        client = AsyncClient()
+        slots = asyncio.Semaphore(concurrency)
+
+        async def request():
+            async with slots:
+                started = time.perf_counter()
+                await client.get(url)
+                return (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        timings = await asyncio.gather(*(request() for _ in range(total)))
+        return timings, time.perf_counter() - started
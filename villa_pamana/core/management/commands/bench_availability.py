@@ -0,0 +1,60 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from core import availability
+from core.bench import explain, scratch_database, time_call
+from core.models import Booking
+
+
+class Command(BaseCommand):
+    help = ('Measure room availability queries as booking history grows. '
+            'Runs in a throwaway database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--steps', type=int, nargs='+', default=[1000, 10000, 50000, 100000, 200000],
+                            help='Booking history sizes to measure at.')
+        parser.add_argument('--repeat', type=int, default=50,
+                            help='Timed runs per query (the median is reported).')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        today = date.today()
+
+        with scratch_database():
+            # History is generated backwards from today, room by room, so the
+            # current and future calendar stays the same at every step
+            cursors = {room: today for room in availability.ROOMS}
+            created = 0
+
+            self.stdout.write(f'{"bookings":>10} {"conflict ms":>12} {"free rooms ms":>14}')
+            for target in sorted(options['steps']):
+                batch = []
+                while created + len(batch) < target:
+                    room = availability.ROOMS[len(batch) % len(availability.ROOMS)]
+                    check_out = cursors[room] - timedelta(days=rng.randint(0, 3))
+                    check_in = check_out - timedelta(days=rng.randint(1, 5))
+                    cursors[room] = check_in
+                    batch.append(Booking(
+                        guest_name='Guest', contact_number='09170000000', room_number=room,
+                        number_of_guests=2, check_in=check_in, check_out=check_out,
+                        payment_amount=Decimal('1500.00'), payment_status='paid',
+                    ))
+                Booking.objects.bulk_create(batch, batch_size=2000)
+                created += len(batch)
+
+                start, end = today + timedelta(days=7), today + timedelta(days=10)
+                conflict_ms = time_call(
+                    lambda: availability.has_conflict('1', start, end), options['repeat'])
+                free_ms = time_call(
+                    lambda: availability.free_rooms(start, end), options['repeat'])
+                self.stdout.write(f'{created:>10} {conflict_ms:>12.3f} {free_ms:>14.3f}')
+
+            self.stdout.write('')
+            self.stdout.write('Query plan (has_conflict): ' + explain(
+                availability.overlapping(start, end, rooms=['1'])))
+            self.stdout.write('Query plan (free_rooms):   ' + explain(
+                availability.overlapping(start, end).values_list('room_number', flat=True).distinct()))
@@ -0,0 +1,69 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core import search
+from core.bench import scratch_database, time_call
+from core.models import Booking, FinancialTransaction
+
+
+WORDS = ['electricity', 'water', 'salary', 'repairs', 'aircon', 'plumbing', 'towels', 'linen', 'rice',
+         'coffee', 'gasoline', 'internet', 'cable', 'paint', 'bulbs', 'soap', 'shampoo', 'laundry',
+         'generator', 'diesel', 'garden', 'pool', 'chlorine', 'pest', 'control', 'permit', 'tax']
+GUESTS = ['Juan', 'Maria', 'Jose', 'Ana', 'Pedro', 'Rosa', 'Carlo', 'Liza', 'Miguel', 'Grace']
+SURNAMES = ['Santos', 'Reyes', 'Cruz', 'Bautista', 'Garcia', 'Mendoza', 'Torres', 'Villanueva']
+
+QUERIES = ['Villanueva', 'jua san', 'chlor', 'ma', 'generator diesel', '09171234']
+
+
+class Command(BaseCommand):
+    help = ('Time full-text searches against LIKE scans on a large generated history. '
+            'Runs in a throwaway database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000,
+                            help='Transactions to generate (plus one booking per 20).')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with scratch_database():
+            if not search.is_available():
+                raise CommandError('The search index needs SQLite.')
+
+            start = date.today() - timedelta(days=3650)
+            with transaction.atomic():
+                for offset in range(0, options['rows'], 10000):
+                    count = min(10000, options['rows'] - offset)
+                    FinancialTransaction.objects.bulk_create([
+                        FinancialTransaction(
+                            transaction_type='expense', category='other', amount=Decimal('100.00'),
+                            description=' '.join(rng.sample(WORDS, 3)),
+                            date=start + timedelta(days=rng.randint(0, 3650)))
+                        for _ in range(count)
+                    ])
+                    Booking.objects.bulk_create([
+                        Booking(guest_name=f'{rng.choice(GUESTS)} {rng.choice(SURNAMES)}',
+                                contact_number=f'0917{rng.randint(0, 9999999):07d}', room_number='1',
+                                number_of_guests=2, check_in=start, check_out=start + timedelta(days=1),
+                                payment_amount=Decimal('1500.00'))
+                        for _ in range(count // 20)
+                    ])
+            with connection.cursor() as cursor:
+                cursor.execute(f"INSERT INTO {search.TABLE} ({search.TABLE}) VALUES ('optimize')")
+
+            self.stdout.write(f'{"query":<20} {"matches":>8} {"fts ms":>8} {"like ms":>9}')
+            for query in QUERIES:
+                fts_ms = time_call(lambda: search.search(query), options['repeat'])
+                like_ms = time_call(
+                    lambda: search._search_without_index(query, search.DEFAULT_LIMIT, list(search.KINDS)),
+                    max(options['repeat'] // 10, 1))
+                with connection.cursor() as cursor:
+                    cursor.execute(f'SELECT COUNT(*) FROM {search.TABLE} WHERE {search.TABLE} MATCH %s',
+                                   [search.match_expression(query)])
+                    matches = cursor.fetchone()[0]
+                self.stdout.write(f'{query:<20} {matches:>8} {fts_ms:>8.2f} {like_ms:>9.2f}')
@@ -0,0 +1,134 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from io import StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from core.bench import database_file
+
+
+# Environment variables for each settings profile (see settings.py). With
+# DEBUG off pages link the hashed static files, so the command runs
+# collectstatic for that profile first, into a temporary STATIC_ROOT.
+PROFILES = {
+    'development': {'DEBUG': 'True'},
+    'production': {'DEBUG': 'False'},
+}
+
+# Run in a fresh interpreter, so startup and memory are measured from zero
+CHILD = r'''
+import json, os, sys, time
+
+started = time.time()
+
+
+def rss_kb():
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+import django
+django.setup()
+setup_done = time.time()
+
+from django.test import Client
+from django.urls import reverse
+
+pages = [reverse(name) for name in sys.argv[2].split(',')]
+client = Client(HTTP_ACCEPT_ENCODING='gzip')
+
+before = time.perf_counter()
+first = client.get(pages[0])
+first_ms = (time.perf_counter() - before) * 1000
+rss_first = rss_kb()
+
+before = time.perf_counter()
+for number in range(int(sys.argv[1])):
+    response = client.get(pages[number % len(pages)])
+    assert response.status_code == 200, (pages[number % len(pages)], response.status_code)
+requests_s = time.perf_counter() - before
+
+print(json.dumps({
+    'spawn_ms': (started - float(os.environ['BENCH_SPAWNED'])) * 1000,
+    'setup_ms': (setup_done - started) * 1000,
+    'first_ms': first_ms,
+    'first_bytes': len(first.content),
+    'first_encoding': first.get('Content-Encoding', ''),
+    'rss_first_kb': rss_first,
+    'rss_last_kb': rss_kb(),
+    'requests_s': requests_s,
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = ('Start the site in a fresh process once per settings profile (DEBUG on '
+            'and off) and report interpreter start, django.setup() time, the first '
+            'request, and memory (RSS) growth over many requests.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=10000, help='Requests per profile after the first.')
+        parser.add_argument('--runs', type=int, default=1, help='Processes per profile (timings are averaged).')
+        parser.add_argument('--years', type=int, default=1, help='Years of data to seed.')
+        parser.add_argument('--pages', default='dashboard,inventory_list,financial_list,financial_balance',
+                            help='Comma-separated URL names to request in turn.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"profile":<12} {"start ms":>9} {"setup ms":>9} {"first ms":>9} {"first KB":>9} '
+            f'{"req/s":>8} {"RSS MB":>8} {"growth MB":>10}')
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'startup.sqlite3'
+            with database_file(path, {}):
+                call_command('migrate', verbosity=0)
+                call_command('seed_data', years=options['years'], stdout=StringIO())
+
+            for name, profile in PROFILES.items():
+                static_root = Path(directory) / f'static-{name}'
+                self._run(['manage.py', 'collectstatic', '--noinput', '--verbosity', '0'],
+                          path, static_root, profile)
+                runs = [self._child(path, static_root, profile, options) for _ in range(options['runs'])]
+                average = {key: sum(run[key] for run in runs) / len(runs)
+                           for key in runs[0] if key != 'first_encoding'}
+                self.stdout.write(
+                    f'{name:<12} {average["spawn_ms"]:>9.1f} {average["setup_ms"]:>9.1f} '
+                    f'{average["first_ms"]:>9.1f} {average["first_bytes"] / 1024:>9.1f} '
+                    f'{options["requests"] / average["requests_s"]:>8.1f} '
+                    f'{average["rss_last_kb"] / 1024:>8.1f} '
+                    f'{(average["rss_last_kb"] - average["rss_first_kb"]) / 1024:>10.1f}')
+
+    def _child(self, path, static_root, profile, options):
+        output = self._run(['-c', CHILD, str(options['requests']), options['pages']],
+                           path, static_root, profile)
+        return json.loads(output.strip().splitlines()[-1])
+
+    def _run(self, arguments, path, static_root, profile):
+        # Run python with `arguments` under the settings profile; returns stdout
+        env = {
+            **os.environ,
+            **profile,
+            'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'villa_pamana.settings'),
+            'DATABASE_PATH': str(path),
+            'STATIC_ROOT': str(static_root),
+            'ALLOWED_HOSTS': 'testserver',
+            'PROFILING_SAMPLE_RATE': '0',
+            'BENCH_SPAWNED': repr(time.time()),
+        }
+        result = subprocess.run(
+            [sys.executable, *arguments],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True)
+        if result.returncode:
+            raise CommandError(f'{profile} run failed:\n{result.stderr}')
+        return result.stdout
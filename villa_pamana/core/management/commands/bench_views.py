@@ -0,0 +1,108 @@
+import gzip
+from statistics import median, quantiles
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import URLPattern, reverse
+
+from core import profiling
+from core.bench import scratch_database
+from core.urls import urlpatterns
+
+
+# Maximum queries per page load. Override per view with the
+# PERF_QUERY_BUDGETS setting or --budget name=N.
+DEFAULT_QUERY_BUDGETS = {
+    'dashboard': 5,
+    'inventory_list': 2,
+    'todo_list': 4,
+    'booking_list': 5,
+    'financial_list': 4,
+    'financial_ledger': 2,
+    'financial_balance': 1,
+    # One query when the month is not cached
+    'booking_calendar': 1,
+    # One query per month not yet cached, so at most 12 for a year
+    'occupancy_report': 12,
+}
+
+
+class Command(BaseCommand):
+    help = ('Request every argument-free URL in core/urls.py through the test client and '
+            'report queries, SQL time, render time, p50/p95 latency and response size (plain and gzipped). '
+            'Fails if a view exceeds its query budget.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help='Requests per view.')
+        parser.add_argument('--budget', action='append', default=[], metavar='NAME=QUERIES',
+                            help='Override the query budget of one view.')
+        parser.add_argument('--scratch', action='store_true',
+                            help='Run in a throwaway database filled by seed_data instead of the real one.')
+        parser.add_argument('--years', type=int, default=3,
+                            help='Years of data to seed with --scratch.')
+
+    def handle(self, *args, **options):
+        budgets = {**DEFAULT_QUERY_BUDGETS, **getattr(settings, 'PERF_QUERY_BUDGETS', {})}
+        for override in options['budget']:
+            name, _, limit = override.partition('=')
+            budgets[name] = int(limit)
+
+        # Let the test client's 'testserver' host through
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            if options['scratch']:
+                with scratch_database():
+                    call_command('seed_data', years=options['years'], stdout=self.stdout)
+                    results = self._run(options['iterations'])
+            else:
+                results = self._run(options['iterations'])
+
+        self.stdout.write(
+            f'{"view":<20} {"status":>6} {"queries":>8} {"budget":>7} {"sql ms":>8} '
+            f'{"render ms":>10} {"p50 ms":>8} {"p95 ms":>8} {"bytes":>9} {"gzipped":>8}')
+        over_budget = []
+        for name, result in results.items():
+            budget = budgets.get(name)
+            self.stdout.write(
+                f'{name:<20} {result["status"]:>6} {result["queries"]:>8} {budget or "-":>7} '
+                f'{result["sql_ms"]:>8.2f} {result["render_ms"]:>10.2f} '
+                f'{result["p50_ms"]:>8.2f} {result["p95_ms"]:>8.2f} {result["bytes"]:>9} {result["gzipped"]:>8}')
+            if budget is not None and result['queries'] > budget:
+                over_budget.append(f'{name} ({result["queries"]} > {budget})')
+
+        if over_budget:
+            raise CommandError('Query budget exceeded: ' + ', '.join(over_budget))
+
+    def _run(self, iterations):
+        client = Client(raise_request_exception=False)
+        results = {}
+
+        for pattern in urlpatterns:
+            # Views that take an id are POST actions, not pages
+            if not isinstance(pattern, URLPattern) or pattern.pattern.converters:
+                continue
+
+            url = reverse(pattern.name)
+            profiles = []
+            for _ in range(iterations):
+                with profiling.profile() as profile:
+                    response = client.get(url)
+                profiles.append(profile)
+
+            timings = [profile.total_ms for profile in profiles]
+            cuts = quantiles(timings, n=20) if len(timings) > 1 else timings * 19
+            results[pattern.name] = {
+                'status': response.status_code,
+                # The budget applies to the worst (cold cache) request
+                'queries': max(profile.query_count for profile in profiles),
+                'sql_ms': median(profile.sql_ms for profile in profiles),
+                'render_ms': median(profile.render_ms for profile in profiles),
+                'p50_ms': cuts[9],
+                'p95_ms': cuts[18],
+                'bytes': len(response.content),
+                # What a browser sending Accept-Encoding: gzip downloads
+                'gzipped': len(gzip.compress(response.content)),
+            }
+        return results
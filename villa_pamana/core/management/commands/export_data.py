@@ -0,0 +1,33 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from core import exports
+
+
+class Command(BaseCommand):
+    help = 'Stream transactions, bookings or inventory to a CSV or NDJSON file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(exports.DATASETS))
+        parser.add_argument('--format', dest='file_format', choices=sorted(exports.FORMATS), default='csv')
+        parser.add_argument('--start', type=date.fromisoformat, help='First date (YYYY-MM-DD).')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last date (YYYY-MM-DD).')
+        parser.add_argument('--category', help='Category (room number for bookings).')
+        parser.add_argument('--history', action='store_true',
+                            help='Include archived rows (see core/archive.py).')
+        parser.add_argument('--output', help='File to write. Defaults to standard output.')
+
+    def handle(self, *args, **options):
+        lines = exports.stream(
+            options['dataset'], options['file_format'],
+            start=options['start'], end=options['end'], category=options['category'],
+            history=options['history'],
+        )
+
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
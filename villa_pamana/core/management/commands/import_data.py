@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import imports
+
+
+class Command(BaseCommand):
+    help = 'Bulk-import transactions, inventory or bookings from a CSV file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(imports.DATASETS))
+        parser.add_argument('path', help='CSV file with a header row.')
+        parser.add_argument('--batch-size', type=int, default=imports.DEFAULT_BATCH_SIZE,
+                            help='Rows per bulk INSERT.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            with open(options['path'], newline='', encoding='utf-8-sig') as csv_file:
+                report = imports.import_csv(options['dataset'], csv_file, batch_size=options['batch_size'])
+        except OSError as error:
+            raise CommandError(str(error))
+
+        for line, errors in sorted(report.rejected):
+            self.stdout.write(f'line {line}: ' + '; '.join(errors))
+        if report.rejected_count > len(report.rejected):
+            self.stdout.write(f'... and {report.rejected_count - len(report.rejected)} more rejected row(s)')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {report.inserted} row(s), rejected {report.rejected_count} '
+            f'in {time.perf_counter() - started:.1f}s.'))
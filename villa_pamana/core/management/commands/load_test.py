@@ -0,0 +1,131 @@
+import random
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from io import StringIO
+from pathlib import Path
+from statistics import quantiles
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core.bench import database_file
+from core.models import InventoryItem
+
+
+READ_PAGES = ['dashboard', 'inventory_list', 'financial_list', 'financialtransaction-list']
+
+# Stock Django SQLite settings, for comparison with settings.DATABASES
+STOCK_PROFILE = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'CONN_MAX_AGE': 0,
+    'CONN_HEALTH_CHECKS': False,
+    'OPTIONS': {},
+}
+
+
+class Command(BaseCommand):
+    help = ('Multi-threaded read/write load test against a throwaway SQLite file, '
+            'once with stock SQLite settings and once with the production profile '
+            'in settings.DATABASES. Reports throughput, latency and failed requests.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent clients.')
+        parser.add_argument('--seconds', type=float, default=10, help='Duration per profile.')
+        parser.add_argument('--write-ratio', type=float, default=0.3,
+                            help='Share of requests that are POSTs (0-1).')
+        parser.add_argument('--years', type=int, default=1, help='Years of data to seed.')
+        parser.add_argument('--profile', choices=['stock', 'production', 'both'], default='both')
+
+    def handle(self, *args, **options):
+        configured = {key: value for key, value in settings.DATABASES['default'].items()
+                      if key in STOCK_PROFILE}
+        profiles = {'stock': STOCK_PROFILE, 'production': configured}
+        if options['profile'] != 'both':
+            profiles = {options['profile']: profiles[options['profile']]}
+
+        overrides = {
+            'ALLOWED_HOSTS': [*settings.ALLOWED_HOSTS, 'testserver'],
+            'PROFILING_SAMPLE_RATE': 0,
+        }
+        self.stdout.write(
+            f'{"profile":<11} {"kind":<6} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"failed":>7}')
+        with override_settings(**overrides), tempfile.TemporaryDirectory() as directory:
+            for name, profile in profiles.items():
+                with database_file(Path(directory) / f'{name}.sqlite3', profile):
+                    call_command('migrate', verbosity=0)
+                    call_command('seed_data', years=options['years'], stdout=StringIO())
+                    item_ids = list(InventoryItem.objects.values_list('id', flat=True))
+                    # The API pages need a logged-in user
+                    User.objects.create_user('loadtest')
+                    connections.close_all()
+                    results = self._load(options, item_ids)
+
+                for kind in ('read', 'write'):
+                    timings, failed = results[kind]
+                    cuts = quantiles(timings, n=20) if len(timings) > 1 else [0] * 19
+                    self.stdout.write(
+                        f'{name:<11} {kind:<6} {len(timings) / options["seconds"]:>8.1f} '
+                        f'{cuts[9]:>8.2f} {cuts[18]:>8.2f} {failed:>7}')
+
+    def _load(self, options, item_ids):
+        deadline = time.perf_counter() + options['seconds']
+        results = {'read': ([], 0), 'write': ([], 0)}
+        lock = threading.Lock()
+
+        def client_thread(seed):
+            rng = random.Random(seed)
+            client = Client(raise_request_exception=False)
+            client.force_login(User.objects.get(username='loadtest'))
+            timings = {'read': [], 'write': []}
+            failed = {'read': 0, 'write': 0}
+            while time.perf_counter() < deadline:
+                kind = 'write' if rng.random() < options['write_ratio'] else 'read'
+                started = time.perf_counter()
+                if kind == 'read':
+                    response = client.get(reverse(rng.choice(READ_PAGES)))
+                else:
+                    response = self._write(client, rng, item_ids)
+                timings[kind].append((time.perf_counter() - started) * 1000)
+                if response.status_code >= 500:
+                    failed[kind] += 1
+            connections.close_all()
+            with lock:
+                for kind in results:
+                    all_timings, all_failed = results[kind]
+                    results[kind] = (all_timings + timings[kind], all_failed + failed[kind])
+
+        threads = [threading.Thread(target=client_thread, args=(seed,)) for seed in range(options['threads'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def _write(self, client, rng, item_ids):
+        today = date.today()
+        choice = rng.randrange(3)
+        if choice == 0:
+            return client.post(reverse('financial_add'), {
+                'transaction_type': 'expense', 'category': 'supplies', 'amount': rng.randint(100, 900),
+                'description': 'Load test', 'date': today.isoformat(),
+            })
+        if choice == 1:
+            return client.post(reverse('inventory_update', args=[rng.choice(item_ids)]), {
+                'action': rng.choice(['add', 'subtract']), 'amount': 1,
+            })
+        # Mostly rejected as overlapping, which still takes the write lock
+        check_in = today + timedelta(days=rng.randint(90, 400))
+        return client.post(reverse('booking_add'), {
+            'guest_name': 'Load Test', 'contact_number': '09170000000',
+            'room_number': rng.choice(['1', '2', '3', '4']), 'number_of_guests': 2,
+            'check_in': check_in.isoformat(), 'check_out': (check_in + timedelta(days=2)).isoformat(),
+            'payment_amount': '3000', 'payment_status': 'pending',
+        })
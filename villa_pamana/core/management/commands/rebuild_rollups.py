@@ -0,0 +1,33 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild (or verify) the FinancialRollup table from FinancialTransaction.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat,
+                            help='First date to rebuild (YYYY-MM-DD). Defaults to all history.')
+        parser.add_argument('--end', type=date.fromisoformat,
+                            help='Last date to rebuild (YYYY-MM-DD). Defaults to all history.')
+        parser.add_argument('--verify', action='store_true',
+                            help='Only compare the rollup with the transactions, do not write.')
+
+    def handle(self, *args, **options):
+        start, end = options['start'], options['end']
+
+        if options['verify']:
+            mismatches = rollups.verify(start, end)
+            for period, period_start, category, stored, expected in mismatches:
+                self.stdout.write(
+                    f'{period} {period_start} {category}: stored={stored} expected={expected}')
+            if mismatches:
+                raise CommandError(f'{len(mismatches)} rollup row(s) out of date.')
+            self.stdout.write(self.style.SUCCESS('Rollups are up to date.'))
+            return
+
+        rollups.rebuild(start, end)
+        self.stdout.write(self.style.SUCCESS('Rollups rebuilt.'))
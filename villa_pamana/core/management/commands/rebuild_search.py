@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core import search
+
+
+class Command(BaseCommand):
+    help = ('Refill the full-text search index from bookings, transactions, inventory and tasks. '
+            'Triggers keep it in sync; run this after restoring a backup or raw SQL edits.')
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError('The search index only exists on SQLite (migration 0008).')
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            count = search.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {count} rows in {time.perf_counter() - started:.1f} s.'))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import payments
+
+
+LABELS = {
+    'paid_without_income': 'Paid bookings with no income recorded',
+    'income_not_paid': 'Income linked to unpaid or cancelled bookings',
+    'amount_mismatch': 'Income amount differs from the booking',
+    'orphan_income': 'Booking income linked to no booking',
+}
+
+
+class Command(BaseCommand):
+    help = 'Compare bookings with their income transactions and list the mismatches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20,
+                            help='Example rows to show for each kind of mismatch.')
+
+    def handle(self, *args, **options):
+        results = payments.reconcile(limit=options['limit'])
+
+        total = 0
+        for kind, (count, rows) in results.items():
+            total += count
+            self.stdout.write(f'{LABELS[kind]}: {count}')
+            for row in rows:
+                self.stdout.write('  ' + ', '.join(f'{key}={value}' for key, value in row.items()))
+            if count > len(rows):
+                self.stdout.write(f'  ... and {count - len(rows)} more')
+
+        if total:
+            raise CommandError(f'{total} mismatch(es) between bookings and booking income.')
+        self.stdout.write(self.style.SUCCESS('Bookings and booking income agree.'))
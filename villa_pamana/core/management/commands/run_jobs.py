@@ -0,0 +1,29 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    help = ('Run queued background jobs (core/jobs.py) on a thread pool, and keep periodic '
+            'jobs scheduled. Stops cleanly on Ctrl-C or SIGTERM once running jobs finish.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=2, help='Jobs run at the same time.')
+        parser.add_argument('--poll', type=float, default=1.0,
+                            help='Seconds between checks for new jobs when idle.')
+        parser.add_argument('--once', action='store_true',
+                            help='Run the jobs that are due, then exit (for cron).')
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signal_number, lambda *_: stop.set())
+
+        if not options['once']:
+            self.stdout.write(f'Running jobs on {options["threads"]} thread(s). Press Ctrl-C to stop.')
+        finished = jobs.work(threads=options['threads'], poll=options['poll'],
+                             once=options['once'], stop=stop)
+        self.stdout.write(self.style.SUCCESS(f'{finished} job(s) run.'))
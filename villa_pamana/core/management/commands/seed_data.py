@@ -0,0 +1,155 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import caching, rollups
+from core.models import Booking, FinancialTransaction, InventoryItem, TodoTask
+
+
+GUEST_NAMES = ['Juan', 'Maria', 'Jose', 'Ana', 'Pedro', 'Rosa', 'Carlo', 'Liza', 'Miguel', 'Grace']
+SURNAMES = ['Santos', 'Reyes', 'Cruz', 'Bautista', 'Garcia', 'Mendoza', 'Torres', 'Villanueva']
+
+INVENTORY = {
+    'kitchen': ['Rice', 'Cooking Oil', 'Coffee', 'Sugar', 'Eggs', 'Dish Soap'],
+    'housekeeping': ['Towels', 'Bed Sheets', 'Pillow Cases', 'Toilet Paper', 'Bath Soap', 'Shampoo'],
+    'maintenance': ['Light Bulbs', 'Air Filters', 'Batteries', 'Paint'],
+    'other': ['Printer Paper', 'Pens'],
+}
+
+TASKS = ['Clean Room {room}', 'Change linens in Room {room}', 'Restock minibar in Room {room}',
+         'Check aircon in Room {room}', 'Inspect Room {room} before check-in']
+
+
+class Command(BaseCommand):
+    help = ('Bulk-generate realistic bookings, transactions, tasks and inventory. '
+            'The same --seed always produces the same data.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--years', type=int, default=3, help='Years of history to generate.')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete existing bookings, transactions, tasks and inventory first.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        today = date.today()
+        start = today - timedelta(days=365 * options['years'])
+
+        with transaction.atomic():
+            if options['clear']:
+                for model in (Booking, FinancialTransaction, TodoTask, InventoryItem):
+                    model.objects.all().delete()
+
+            bookings = self._bookings(rng, start, today)
+            transactions = self._transactions(rng, start, today, bookings)
+            tasks = self._tasks(rng, start, today)
+            items = self._inventory(rng)
+
+            # Income first: the paid bookings point at their income rows
+            FinancialTransaction.objects.bulk_create(transactions, batch_size=batch_size)
+            Booking.objects.bulk_create(bookings, batch_size=batch_size)
+            TodoTask.objects.bulk_create(tasks, batch_size=batch_size)
+            InventoryItem.objects.bulk_create(items, batch_size=batch_size)
+
+            # bulk_create() skips the signals that maintain the rollup
+            # and drop cached booking summaries
+            rollups.rebuild()
+            caching.invalidate_analytics()
+            caching.invalidate_calendar()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(bookings)} bookings, {len(transactions)} transactions, '
+            f'{len(tasks)} tasks and {len(items)} inventory items.'))
+
+    def _bookings(self, rng, start, today):
+        # Back-to-back stays per room, up to two months ahead, never overlapping
+        bookings = []
+        horizon = today + timedelta(days=60)
+        for room, _ in Booking.ROOM_CHOICES:
+            check_in = start + timedelta(days=rng.randint(0, 3))
+            while check_in < horizon:
+                check_out = check_in + timedelta(days=rng.randint(1, 5))
+                if check_out < today:
+                    status = rng.choices(['paid', 'cancelled'], weights=[95, 5])[0]
+                else:
+                    status = rng.choice(['paid', 'pending'])
+                bookings.append(Booking(
+                    guest_name=f'{rng.choice(GUEST_NAMES)} {rng.choice(SURNAMES)}',
+                    contact_number=f'0917{rng.randint(0, 9999999):07d}',
+                    room_number=room,
+                    number_of_guests=rng.randint(1, 4),
+                    check_in=check_in,
+                    check_out=check_out,
+                    payment_amount=Decimal(1500 * (check_out - check_in).days),
+                    payment_status=status,
+                ))
+                check_in = check_out + timedelta(days=rng.randint(0, 4))
+        return bookings
+
+    def _transactions(self, rng, start, today, bookings):
+        transactions = []
+        for booking in bookings:
+            if booking.payment_status == 'paid':
+                # Stays paid in advance are recorded on the day they were paid
+                booking.income_transaction = FinancialTransaction(
+                    transaction_type='income', category='booking', amount=booking.payment_amount,
+                    description=f'Room {booking.room_number} - {booking.guest_name}',
+                    date=min(booking.check_in, today),
+                )
+                transactions.append(booking.income_transaction)
+
+        day = start
+        while day <= today:
+            if day.day == 1:
+                transactions.append(FinancialTransaction(
+                    transaction_type='expense', category='utilities',
+                    amount=Decimal(rng.randint(8000, 15000)), description='Electricity and water', date=day))
+            if day.day in (15, 28):
+                transactions.append(FinancialTransaction(
+                    transaction_type='expense', category='salary',
+                    amount=Decimal(18000), description='Staff salary', date=day))
+            if day.weekday() == 0:
+                transactions.append(FinancialTransaction(
+                    transaction_type='expense', category='supplies',
+                    amount=Decimal(rng.randint(500, 3000)), description='Weekly supplies', date=day))
+            if rng.random() < 0.05:
+                transactions.append(FinancialTransaction(
+                    transaction_type='expense', category='maintenance',
+                    amount=Decimal(rng.randint(300, 5000)), description='Repairs', date=day))
+            day += timedelta(days=1)
+        return transactions
+
+    def _tasks(self, rng, start, today):
+        tasks = []
+        day = start
+        while day <= today + timedelta(days=14):
+            for _ in range(rng.randint(1, 4)):
+                priority = rng.choice(['low', 'medium', 'high'])
+                tasks.append(TodoTask(
+                    title=rng.choice(TASKS).format(room=rng.randint(1, 4)),
+                    priority=priority,
+                    # bulk_create() skips TodoTask.save()
+                    priority_rank=TodoTask.PRIORITY_RANKS[priority],
+                    due_date=day,
+                    # Nearly everything in the past has been done
+                    is_completed=day < today and rng.random() < 0.97,
+                ))
+            day += timedelta(days=1)
+        return tasks
+
+    def _inventory(self, rng):
+        items = [
+            InventoryItem(name=name, category=category, quantity=rng.randint(0, 100),
+                          minimum_stock=rng.randint(5, 20), unit='pcs')
+            for category, names in INVENTORY.items()
+            for name in names
+        ]
+        # bulk_create() skips InventoryItem.save()
+        for item in items:
+            item.update_restock_by()
+        return items
@@ -0,0 +1,182 @@
+"""
+Project middleware: request profiling and static file serving.
+
+ProfilingMiddleware
+
+A sample of requests (PROFILING_SAMPLE_RATE) is wrapped in
+core.profiling.profile(). Each sampled response gets a Server-Timing header
+with the query count, SQL time, template render time and total time, which
+browser dev tools show under the request's Timing tab.
+
+Requests slower than PROFILING_SLOW_REQUEST_MS, and queries slower than
+PROFILING_SLOW_QUERY_MS (with the SQL and the line of code that ran it), are
+written to the 'core.profiling' logger. settings.LOGGING sends that logger to
+a rotating file.
+
+Unsampled requests only pay for one random() call. Sampled requests pay for a
+timer around each query and each template render.
+
+Both middlewares work in sync and async middleware chains, so under ASGI
+Django does not have to switch to a thread around them for every request.
+
+StaticFilesMiddleware
+Serves the files collectstatic wrote to STATIC_ROOT, so the site needs no
+separate web server for them. A browser that accepts brotli or gzip gets
+the precompressed copy (see core/storage.py). Content-hashed names never
+change content and are cached for a year; other names for an hour.
+"""
+
+import logging
+import mimetypes
+import os
+import random
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from . import profiling
+
+
+logger = logging.getLogger('core.profiling')
+
+# Cache-Control max-age in seconds
+HASHED_MAX_AGE = 365 * 24 * 60 * 60
+PLAIN_MAX_AGE = 60 * 60
+
+# Best first
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._sampled():
+            return self.get_response(request)
+
+        with profiling.profile(getattr(settings, 'PROFILING_SLOW_QUERY_MS', 100)) as profile:
+            response = self.get_response(request)
+        return self._report(request, response, profile)
+
+    async def __acall__(self, request):
+        if not self._sampled():
+            return await self.get_response(request)
+
+        with profiling.profile(getattr(settings, 'PROFILING_SLOW_QUERY_MS', 100)) as profile:
+            # Sync views and sync_to_async() calls run on this request's
+            # thread-sensitive thread, so its queries are counted too
+            queries = ExitStack()
+            await sync_to_async(queries.enter_context)(profiling.track_queries())
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(queries.close)()
+        return self._report(request, response, profile)
+
+    def _sampled(self):
+        # Read on every request so override_settings() works in tests
+        sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 1.0)
+        return sample_rate > 0 and random.random() < sample_rate
+
+    def _report(self, request, response, profile):
+        slow_request_ms = getattr(settings, 'PROFILING_SLOW_REQUEST_MS', 500)
+
+        # Streaming responses are timed up to the first byte only
+        response['Server-Timing'] = (
+            f'db;dur={profile.sql_ms:.1f};desc="{profile.query_count} queries", '
+            f'render;dur={profile.render_ms:.1f}, '
+            f'total;dur={profile.total_ms:.1f}'
+        )
+
+        if profile.total_ms >= slow_request_ms:
+            logger.warning(
+                'slow request %s %s %s: %.1f ms total, %d queries in %.1f ms, render %.1f ms',
+                request.method, request.get_full_path(), response.status_code,
+                profile.total_ms, profile.query_count, profile.sql_ms, profile.render_ms)
+        for sql, elapsed, call_site in profile.slow_queries:
+            logger.warning('slow query %.1f ms at %s (%s %s): %s',
+                           elapsed, call_site, request.method, request.path, sql)
+
+        return response
+
+
+class StaticFilesMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.STATIC_ROOT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        self.prefix = settings.STATIC_URL
+        self.root = str(settings.STATIC_ROOT)
+        # Hashed names from staticfiles.json (empty with the plain storage)
+        self.hashed = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self._serve(request)
+        return self.get_response(request) if response is None else response
+
+    async def __acall__(self, request):
+        # A stat() and an open(), cheap enough to do on the event loop
+        response = self._serve(request)
+        return await self.get_response(request) if response is None else response
+
+    def _serve(self, request):
+        # The response for a file under STATIC_ROOT, or None to pass the request on
+        if request.method not in ('GET', 'HEAD') or not request.path.startswith(self.prefix):
+            return None
+
+        name = request.path[len(self.prefix):]
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            # Falls through to the 404 page (or runserver's own static view)
+            return None
+
+        modified = os.stat(path).st_mtime
+        if not was_modified_since(request.headers.get('If-Modified-Since'), modified):
+            return HttpResponseNotModified()
+
+        content_type, _ = mimetypes.guess_type(path)
+        accepted = request.headers.get('Accept-Encoding', '')
+        encoding = None
+        for candidate, suffix in ENCODINGS:
+            if candidate in accepted and os.path.isfile(path + suffix):
+                encoding, path = candidate, path + suffix
+                break
+
+        response = FileResponse(open(path, 'rb'), content_type=content_type or 'application/octet-stream')
+        if encoding:
+            response['Content-Encoding'] = encoding
+        # FileResponse names the file; not wanted for a stylesheet or script
+        response.headers.pop('Content-Disposition', None)
+        response['Last-Modified'] = http_date(modified)
+        if name in self.hashed:
+            response['Cache-Control'] = f'public, max-age={HASHED_MAX_AGE}, immutable'
+        else:
+            response['Cache-Control'] = f'public, max-age={PLAIN_MAX_AGE}'
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return response
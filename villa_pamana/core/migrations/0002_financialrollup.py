@@ -0,0 +1,68 @@
+# Generated by Django 4.2.7 on 2026-10-17 17:55
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+
+
+def populate_rollups(apps, schema_editor):
+    FinancialTransaction = apps.get_model('core', 'FinancialTransaction')
+    FinancialRollup = apps.get_model('core', 'FinancialRollup')
+
+    aggregates = {
+        'income': Sum('amount', filter=Q(transaction_type='income')),
+        'expenses': Sum('amount', filter=Q(transaction_type='expense')),
+        'transaction_count': Count('id'),
+    }
+    transactions = FinancialTransaction.objects.order_by()
+
+    rows = []
+    for row in transactions.values('date', 'category').annotate(**aggregates):
+        rows.append(('day', row['date'], row))
+    for row in (transactions.annotate(month=TruncMonth('date'))
+                .values('month', 'category').annotate(**aggregates)):
+        rows.append(('month', row['month'], row))
+
+    FinancialRollup.objects.bulk_create([
+        FinancialRollup(
+            period=period,
+            period_start=period_start,
+            category=row['category'],
+            income=row['income'] or Decimal('0.00'),
+            expenses=row['expenses'] or Decimal('0.00'),
+            transaction_count=row['transaction_count'],
+        )
+        for period, period_start, row in rows
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FinancialRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Day'), ('month', 'Month')], max_length=5)),
+                ('period_start', models.DateField()),
+                ('category', models.CharField(choices=[('booking', 'Booking Revenue'), ('maintenance', 'Maintenance Cost'), ('utilities', 'Utilities Cost'), ('salary', 'Salary Expense'), ('supplies', 'Supplies Cost'), ('other', 'Other')], max_length=20)),
+                ('income', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('expenses', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('transaction_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['period', 'period_start', 'category'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='financialrollup',
+            constraint=models.UniqueConstraint(fields=('period', 'period_start', 'category'), name='unique_financial_rollup'),
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-17 17:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_financialrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='financialtransaction',
+            index=models.Index(fields=['date', 'id'], name='txn_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='financialtransaction',
+            index=models.Index(fields=['category', 'date', 'id'], name='txn_category_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 17:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_transaction_ledger_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['room_number', 'check_out', 'check_in'], name='booking_room_dates_idx'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:18
+
+import math
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+# Same maths as core.inventory (decayed_rate, stockout_date), copied so the
+# migration does not change if that module does
+HALF_LIFE_DAYS = 7
+MAX_FORECAST_DAYS = 365
+
+
+def backfill_forecasts(apps, schema_editor):
+    InventoryItem = apps.get_model('core', 'InventoryItem')
+    InventoryMovement = apps.get_model('core', 'InventoryMovement')
+
+    state = {}
+    usages = InventoryMovement.objects.filter(delta__lt=0).order_by('created_at', 'id')
+    for item_id, delta, created_at in usages.values_list('item_id', 'delta', 'created_at').iterator():
+        rate, last = state.get(item_id, (0.0, None))
+        if last is not None:
+            elapsed = (created_at - last).total_seconds() / 86400
+            if rate <= 0 and elapsed > 0:
+                rate = -delta / elapsed
+            elif elapsed <= 0:
+                rate += -delta * math.log(2) / HALF_LIFE_DAYS
+            else:
+                decay = 0.5 ** (elapsed / HALF_LIFE_DAYS)
+                rate = decay * rate + (1 - decay) * -delta / elapsed
+        state[item_id] = (rate, created_at)
+
+    items = list(InventoryItem.objects.filter(pk__in=state))
+    for item in items:
+        item.burn_rate, item.last_consumed_at = state[item.pk]
+        if item.burn_rate > 0 and item.quantity / item.burn_rate <= MAX_FORECAST_DAYS:
+            item.projected_stockout = (
+                timezone.localdate(item.last_consumed_at) + timedelta(days=item.quantity / item.burn_rate))
+    InventoryItem.objects.bulk_update(items, ['burn_rate', 'last_consumed_at', 'projected_stockout'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_inventorymovement'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='burn_rate',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='last_consumed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='projected_stockout',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['projected_stockout'], name='item_stockout_idx'),
+        ),
+        migrations.RunPython(backfill_forecasts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Case, Value, When
+
+
+def set_priority_ranks(apps, schema_editor):
+    TodoTask = apps.get_model('core', 'TodoTask')
+    TodoTask.objects.update(priority_rank=Case(
+        When(priority='high', then=Value(0)),
+        When(priority='medium', then=Value(1)),
+        default=Value(2),
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_inventory_forecast'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecurringTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('priority', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High')], default='low', max_length=10)),
+                ('frequency', models.CharField(choices=[('daily', 'Daily'), ('weekly', 'Weekly')], default='daily', max_length=10)),
+                ('start_date', models.DateField()),
+                ('is_active', models.BooleanField(default=True)),
+                ('generated_through', models.DateField(blank=True, editable=False, null=True)),
+            ],
+        ),
+        migrations.AlterModelOptions(
+            name='todotask',
+            options={'ordering': ['priority_rank', 'due_date']},
+        ),
+        migrations.AddField(
+            model_name='todotask',
+            name='priority_rank',
+            field=models.PositiveSmallIntegerField(default=2, editable=False),
+        ),
+        migrations.AddField(
+            model_name='todotask',
+            name='recurring_task',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tasks', to='core.recurringtask'),
+        ),
+        migrations.RunPython(set_priority_ranks, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='todotask',
+            index=models.Index(fields=['is_completed', 'priority_rank', 'due_date'], name='task_priority_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='todotask',
+            constraint=models.UniqueConstraint(fields=('recurring_task', 'due_date'), name='unique_task_occurrence'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Full-text search index (see core/search.py). SQLite only: on other
+# databases core.search falls back to icontains lookups.
+
+from django.db import migrations
+
+
+# table, kind number, title column, body columns. Frozen copy of
+# core.search.KINDS, so this migration does not change if that module does.
+SOURCES = [
+    ('core_booking', 0, 'guest_name', ['contact_number', 'room_number']),
+    ('core_financialtransaction', 1, 'description', ['category', 'transaction_type']),
+    ('core_inventoryitem', 2, 'name', ['category']),
+    ('core_todotask', 3, 'title', ['description']),
+]
+
+
+def _body(row, body):
+    return " || ' ' || ".join(f"COALESCE({row}.{column}, '')" for column in body)
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    execute = schema_editor.execute
+    # prefix='2 3' adds index entries for 2 and 3 character prefixes, so
+    # short prefix searches do not scan every term
+    execute(
+        "CREATE VIRTUAL TABLE core_search USING fts5("
+        "title, body, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+
+    for table, number, title, body in SOURCES:
+        columns = ', '.join([title, *body])
+        insert = (f"INSERT INTO core_search (rowid, title, body) "
+                  f"VALUES (new.id * 4 + {number}, new.{title}, {_body('new', body)});")
+        delete = f"DELETE FROM core_search WHERE rowid = old.id * 4 + {number};"
+        execute(f"CREATE TRIGGER {table}_search_insert AFTER INSERT ON {table} BEGIN {insert} END")
+        execute(f"CREATE TRIGGER {table}_search_update AFTER UPDATE OF {columns} ON {table} "
+                f"BEGIN {delete} {insert} END")
+        execute(f"CREATE TRIGGER {table}_search_delete AFTER DELETE ON {table} BEGIN {delete} END")
+
+        execute(f"INSERT INTO core_search (rowid, title, body) "
+                f"SELECT id * 4 + {number}, {title}, {_body(table, body)} FROM {table}")
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    for table, number, title, body in SOURCES:
+        for event in ('insert', 'update', 'delete'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {table}_search_{event}")
+    schema_editor.execute("DROP TABLE IF EXISTS core_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_task_priority_rank_recurring'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
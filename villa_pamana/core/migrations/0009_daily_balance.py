@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:43
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Q, Sum
+
+
+def backfill_balances(apps, schema_editor):
+    FinancialTransaction = apps.get_model('core', 'FinancialTransaction')
+    DailyBalance = apps.get_model('core', 'DailyBalance')
+
+    days = FinancialTransaction.objects.order_by().values('date').annotate(
+        income=Sum('amount', filter=Q(transaction_type='income')),
+        expenses=Sum('amount', filter=Q(transaction_type='expense')),
+    ).order_by('date')
+
+    balance = Decimal('0.00')
+    rows = []
+    for day in days:
+        balance += (day['income'] or 0) - (day['expenses'] or 0)
+        rows.append(DailyBalance(date=day['date'], balance=balance))
+    DailyBalance.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'ordering': ['date'],
+            },
+        ),
+        migrations.RunPython(backfill_balances, migrations.RunPython.noop),
+    ]
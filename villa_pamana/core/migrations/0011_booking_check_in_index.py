@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 18:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_job_queue'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['check_in', 'id'], name='booking_check_in_idx'),
+        ),
+    ]
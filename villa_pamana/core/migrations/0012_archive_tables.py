@@ -0,0 +1,49 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_booking_check_in_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTransaction',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('transaction_type', models.CharField(choices=[('income', 'Income'), ('expense', 'Expense')], max_length=10)),
+                ('category', models.CharField(choices=[('booking', 'Booking Revenue'), ('maintenance', 'Maintenance Cost'), ('utilities', 'Utilities Cost'), ('salary', 'Salary Expense'), ('supplies', 'Supplies Cost'), ('other', 'Other')], max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('description', models.TextField(blank=True)),
+                ('date', models.DateField()),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['date', 'id'], name='archtxn_date_id_idx'), models.Index(fields=['category', 'date', 'id'], name='archtxn_category_date_id_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedBooking',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('guest_name', models.CharField(max_length=100)),
+                ('contact_number', models.CharField(max_length=15)),
+                ('room_number', models.CharField(choices=[('1', 'Room 1'), ('2', 'Room 2'), ('3', 'Room 3'), ('4', 'Room 4')], max_length=10)),
+                ('number_of_guests', models.PositiveIntegerField()),
+                ('check_in', models.DateField()),
+                ('check_out', models.DateField()),
+                ('payment_amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('payment_status', models.CharField(choices=[('paid', 'Paid'), ('pending', 'Pending'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['room_number', 'check_out', 'check_in'], name='archbooking_room_dates_idx'), models.Index(fields=['check_in', 'id'], name='archbooking_check_in_idx')],
+            },
+        ),
+    ]
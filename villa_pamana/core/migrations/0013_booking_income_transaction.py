@@ -0,0 +1,51 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Adding a foreign key makes SQLite copy core_booking into a new table, which
+# drops the search index triggers from 0008_search_index. Frozen copy of
+# that migration's core_booking entry.
+TABLE, NUMBER, TITLE, BODY = 'core_booking', 0, 'guest_name', ['contact_number', 'room_number']
+
+
+def restore_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    execute = schema_editor.execute
+    body = " || ' ' || ".join(f"COALESCE(new.{column}, '')" for column in BODY)
+    columns = ', '.join([TITLE, *BODY])
+    insert = (f"INSERT INTO core_search (rowid, title, body) "
+              f"VALUES (new.id * 4 + {NUMBER}, new.{TITLE}, {body});")
+    delete = f"DELETE FROM core_search WHERE rowid = old.id * 4 + {NUMBER};"
+    for event in ('insert', 'update', 'delete'):
+        execute(f"DROP TRIGGER IF EXISTS {TABLE}_search_{event}")
+    execute(f"CREATE TRIGGER {TABLE}_search_insert AFTER INSERT ON {TABLE} BEGIN {insert} END")
+    execute(f"CREATE TRIGGER {TABLE}_search_update AFTER UPDATE OF {columns} ON {TABLE} "
+            f"BEGIN {delete} {insert} END")
+    execute(f"CREATE TRIGGER {TABLE}_search_delete AFTER DELETE ON {TABLE} BEGIN {delete} END")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_archive_tables'),
+    ]
+
+    operations = [
+        # Runs last when migrating backwards, after the table is copied again
+        migrations.RunPython(migrations.RunPython.noop, restore_search_triggers),
+        migrations.AddField(
+            model_name='archivedbooking',
+            name='income_transaction_id',
+            field=models.BigIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='income_transaction',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='booking', to='core.financialtransaction'),
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+    ]
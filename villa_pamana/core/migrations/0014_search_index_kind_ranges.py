@@ -0,0 +1,73 @@
+# Renumbers the full-text search index (see core/search.py) from
+# rowid = id * 4 + kind to rowid = kind * 2**40 + id, so each kind is one
+# rowid range and a search can take its candidates per kind with a range
+# seek instead of filtering every match. The table and its triggers are
+# created again and refilled. SQLite only.
+
+from django.db import migrations
+
+
+# table, kind number, title column, body columns. Frozen copy of
+# core.search.KINDS, so this migration does not change if that module does.
+SOURCES = [
+    ('core_booking', 0, 'guest_name', ['contact_number', 'room_number']),
+    ('core_financialtransaction', 1, 'description', ['category', 'transaction_type']),
+    ('core_inventoryitem', 2, 'name', ['category']),
+    ('core_todotask', 3, 'title', ['description']),
+]
+
+KIND_SPAN = 2 ** 40
+
+
+def _body(row, body):
+    return " || ' ' || ".join(f"COALESCE({row}.{column}, '')" for column in body)
+
+
+def _rebuild(schema_editor, rowid):
+    # rowid(row, number) -> SQL for the index rowid of a source row
+    execute = schema_editor.execute
+    for table, number, title, body in SOURCES:
+        for event in ('insert', 'update', 'delete'):
+            execute(f"DROP TRIGGER IF EXISTS {table}_search_{event}")
+    execute("DROP TABLE IF EXISTS core_search")
+
+    execute(
+        "CREATE VIRTUAL TABLE core_search USING fts5("
+        "title, body, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    for table, number, title, body in SOURCES:
+        columns = ', '.join([title, *body])
+        insert = (f"INSERT INTO core_search (rowid, title, body) "
+                  f"VALUES ({rowid('new', number)}, new.{title}, {_body('new', body)});")
+        delete = f"DELETE FROM core_search WHERE rowid = {rowid('old', number)};"
+        execute(f"CREATE TRIGGER {table}_search_insert AFTER INSERT ON {table} BEGIN {insert} END")
+        execute(f"CREATE TRIGGER {table}_search_update AFTER UPDATE OF {columns} ON {table} "
+                f"BEGIN {delete} {insert} END")
+        execute(f"CREATE TRIGGER {table}_search_delete AFTER DELETE ON {table} BEGIN {delete} END")
+
+        execute(f"INSERT INTO core_search (rowid, title, body) "
+                f"SELECT {rowid(table, number)}, {title}, {_body(table, body)} FROM {table}")
+    execute("INSERT INTO core_search (core_search) VALUES ('optimize')")
+
+
+def kind_ranges(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    _rebuild(schema_editor, lambda row, number: f"{number * KIND_SPAN} + {row}.id")
+
+
+def interleaved(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    _rebuild(schema_editor, lambda row, number: f"{row}.id * 4 + {number}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_booking_income_transaction'),
+    ]
+
+    operations = [
+        migrations.RunPython(kind_ranges, interleaved),
+    ]
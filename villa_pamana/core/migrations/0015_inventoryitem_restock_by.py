@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:57
+
+from django.db import migrations, models
+from django.db.models import F, Q
+from django.utils import timezone
+
+
+def fill_restock_by(apps, schema_editor):
+    # InventoryItem.update_restock_by() in two UPDATEs
+    InventoryItem = apps.get_model('core', 'InventoryItem')
+    InventoryItem.objects.update(restock_by=F('projected_stockout'))
+    today = timezone.localdate()
+    InventoryItem.objects.filter(quantity__lte=F('minimum_stock')).filter(
+        Q(restock_by__isnull=True) | Q(restock_by__gt=today)).update(restock_by=today)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_search_index_kind_ranges'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='inventoryitem',
+            name='item_stockout_idx',
+        ),
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='restock_by',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['restock_by'], name='item_restock_idx'),
+        ),
+        migrations.RunPython(fill_restock_by, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 19:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_inventoryitem_restock_by'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='restock_alerted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
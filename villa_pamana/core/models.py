@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
 # Create your models here.
 
@@ -18,11 +19,78 @@ class InventoryItem(models.Model):
     unit = models.CharField(max_length=50)
     last_updated = models.DateTimeField(auto_now=True)
 
+    # Consumption statistics, maintained by core.inventory on every movement:
+    # units used per day (exponentially weighted), when stock last went down,
+    # and the day stock runs out at that rate (empty until a rate is known)
+    burn_rate = models.FloatField(default=0)
+    last_consumed_at = models.DateTimeField(null=True, blank=True)
+    projected_stockout = models.DateField(null=True, blank=True)
+    # Day the item has to be restocked by: the day it reached its minimum
+    # stock, otherwise the forecast. Restock alerts filter and sort on this
+    # one column (see update_restock_by)
+    restock_by = models.DateField(null=True, blank=True)
+    # When the admins were last emailed about this item (restock_alert job);
+    # cleared when it is restocked, so each shortage is reported once
+    restock_alerted_at = models.DateTimeField(null=True, blank=True)
+
     def __str__(self):
         return f"{self.name} ({self.quantity} {self.unit})"
     
     def needs_restock(self):
         return self.quantity <= self.minimum_stock
+
+    def update_restock_by(self, today=None):
+        """Set restock_by from the stock level, minimum and forecast."""
+        # Views create items straight from request.POST
+        quantity = self._meta.get_field('quantity').to_python(self.quantity)
+        minimum_stock = self._meta.get_field('minimum_stock').to_python(self.minimum_stock)
+        if quantity <= minimum_stock:
+            today = today or timezone.localdate()
+            # Keeps the day it first got this low
+            self.restock_by = min(today, self.restock_by or today)
+        else:
+            self.restock_by = self.projected_stockout
+
+    def save(self, *args, **kwargs):
+        # bulk_create() and queryset.update() skip this, so code using them
+        # (core.inventory, imports, seed_data) sets restock_by itself
+        self.update_restock_by()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'restock_by'}
+        super().save(*args, **kwargs)
+
+    class Meta:
+        indexes = [
+            # Dashboard restock alerts, most urgent first
+            models.Index(fields=['restock_by'], name='item_restock_idx'),
+        ]
+
+
+class InventoryMovement(models.Model):
+    """
+    One change to an item's stock. InventoryItem.quantity is only changed
+    through core.inventory, which records a movement for every change.
+    """
+
+    REASON_CHOICES = [
+        ('delivery', 'Delivery'),
+        ('usage', 'Usage'),
+        ('stocktake', 'Stock-take'),
+        ('adjustment', 'Adjustment'),
+    ]
+
+    item = models.ForeignKey(InventoryItem, on_delete=models.CASCADE, related_name='movements')
+    delta = models.IntegerField()
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.item.name} {self.delta:+d} ({self.reason})"
+
+    class Meta:
+        ordering = ['-created_at']
+
     
 class TodoTask(models.Model):
 
@@ -32,18 +100,66 @@ class TodoTask(models.Model):
         ('high', 'High'),
     ]
 
+    # Sort key for priority, most urgent first. Sorting the priority strings
+    # themselves puts "medium" above "high".
+    PRIORITY_RANKS = {'high': 0, 'medium': 1, 'low': 2}
+
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     priority = models.CharField(max_length=10, choices=PRIORITY_CHOICES, default='low')
+    priority_rank = models.PositiveSmallIntegerField(default=2, editable=False)
     is_completed = models.BooleanField(default=False)
     due_date = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    recurring_task = models.ForeignKey('RecurringTask', on_delete=models.SET_NULL, null=True, blank=True,
+                                       related_name='tasks')
 
     def __str__(self):
         return self.title
+
+    def save(self, *args, **kwargs):
+        # bulk_create() and queryset.update() skip this, so code using them
+        # sets priority_rank itself
+        self.priority_rank = self.PRIORITY_RANKS.get(self.priority, self.PRIORITY_RANKS['low'])
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'priority' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'priority_rank'}
+        super().save(*args, **kwargs)
     
     class Meta:
-        ordering = ['-priority', 'due_date']
+        ordering = ['priority_rank', 'due_date']
+        indexes = [
+            # Open tasks by priority then due date (dashboard and to-do list)
+            models.Index(fields=['is_completed', 'priority_rank', 'due_date'], name='task_priority_idx'),
+        ]
+        constraints = [
+            # A recurring task has at most one occurrence per day
+            models.UniqueConstraint(fields=['recurring_task', 'due_date'], name='unique_task_occurrence'),
+        ]
+
+
+class RecurringTask(models.Model):
+    """
+    A task that repeats every day, or every week on the weekday of
+    start_date. core.recurring creates its TodoTask rows a week at a time.
+    """
+
+    FREQUENCY_CHOICES = [
+        ('daily', 'Daily'),
+        ('weekly', 'Weekly'),
+    ]
+
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    priority = models.CharField(max_length=10, choices=TodoTask.PRIORITY_CHOICES, default='low')
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES, default='daily')
+    start_date = models.DateField()
+    is_active = models.BooleanField(default=True)
+    # Last day that already has its TodoTask rows
+    generated_through = models.DateField(null=True, blank=True, editable=False)
+
+    def __str__(self):
+        return f"{self.title} ({self.frequency})"
 
 
 class Booking(models.Model):
@@ -63,6 +179,9 @@ class Booking(models.Model):
     check_out = models.DateField()
     payment_amount = models.DecimalField(max_digits=10, decimal_places=2)
     payment_status = models.CharField(max_length=20, choices=[('paid', 'Paid'), ('pending', 'Pending'), ('cancelled', 'Cancelled')], default='pending')
+    # The income row recorded when the booking was paid (see core/payments.py)
+    income_transaction = models.OneToOneField('FinancialTransaction', null=True, blank=True,
+                                              on_delete=models.SET_NULL, related_name='booking')
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -71,6 +190,15 @@ class Booking(models.Model):
     def duration(self):
         return (self.check_out - self.check_in).days
 
+    class Meta:
+        indexes = [
+            # Overlap lookups (see core/availability.py): room first, then the
+            # range condition on check_out, with check_in covered by the index
+            models.Index(fields=['room_number', 'check_out', 'check_in'], name='booking_room_dates_idx'),
+            # Admin date drill-down and its newest-first ordering
+            models.Index(fields=['check_in', 'id'], name='booking_check_in_idx'),
+        ]
+
 class FinancialTransaction(models.Model):
     TRANSACTION_TYPE_CHOICES = [
         ('income', 'Income'),
@@ -98,3 +226,179 @@ class FinancialTransaction(models.Model):
     
     class Meta:
         ordering = ['-date']
+        indexes = [
+            # Keyset pagination of the ledger, optionally filtered by category
+            models.Index(fields=['date', 'id'], name='txn_date_id_idx'),
+            models.Index(fields=['category', 'date', 'id'], name='txn_category_date_id_idx'),
+        ]
+
+
+class FinancialRollup(models.Model):
+    """
+    Pre-aggregated income/expense totals.
+
+    One row per (period, period_start, category). Rows are kept up to date by
+    the signal handlers in core/signals.py so the dashboard and the financial
+    summary never have to aggregate over every FinancialTransaction.
+    """
+
+    PERIOD_CHOICES = [
+        ('day', 'Day'),
+        ('month', 'Month'),
+    ]
+
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    period_start = models.DateField()
+    category = models.CharField(max_length=20, choices=FinancialTransaction.CATEGORY_CHOICES)
+    income = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    expenses = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    transaction_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.period} {self.period_start} - {self.category}"
+
+    class Meta:
+        ordering = ['period', 'period_start', 'category']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['period', 'period_start', 'category'],
+                name='unique_financial_rollup',
+            ),
+        ]
+
+
+class DailyBalance(models.Model):
+    """
+    Running cash balance: total income minus total expenses up to and
+    including `date`.
+
+    There is a row for every day that has (or had) a transaction. The balance
+    on any other day is the balance of the latest row before it. Rows are kept
+    up to date by core.rollups, so reading a balance never sums
+    FinancialTransaction.
+    """
+
+    date = models.DateField(unique=True)
+    balance = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.date} - P{self.balance}"
+
+    class Meta:
+        ordering = ['date']
+
+
+class Job(models.Model):
+    """
+    A unit of background work, queued by the app and run by the run_jobs
+    command (see core/jobs.py).
+
+    While a job is queued or running no other job may share its dedupe_key,
+    so enqueueing the same work twice gives back the pending job.
+    """
+
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)
+    arguments = models.JSONField(default=dict, blank=True)
+    dedupe_key = models.CharField(max_length=200, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    last_error = models.TextField(blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Workers look for due jobs: status = 'queued' AND run_at <= now
+            models.Index(fields=['status', 'run_at'], name='job_due_idx'),
+            # The latest run of a periodic task (core.jobs.schedule_periodic)
+            models.Index(fields=['dedupe_key', 'run_at'], name='job_dedupe_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedupe_key'],
+                condition=models.Q(status__in=['queued', 'running']),
+                name='unique_active_job',
+            ),
+        ]
+
+
+class ArchivedBooking(models.Model):
+    """
+    A booking from a closed period, moved out of Booking by the
+    archive_history command (see core/archive.py). Same columns and id as
+    the original row, plus when it was archived.
+    """
+
+    # Archived rows are shown read-only (no delete or mark-as-paid buttons)
+    is_archived = True
+
+    id = models.BigIntegerField(primary_key=True)
+    guest_name = models.CharField(max_length=100)
+    contact_number = models.CharField(max_length=15)
+    room_number = models.CharField(max_length=10, choices=Booking.ROOM_CHOICES)
+    number_of_guests = models.PositiveIntegerField()
+    check_in = models.DateField()
+    check_out = models.DateField()
+    payment_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    payment_status = models.CharField(max_length=20, choices=[('paid', 'Paid'), ('pending', 'Pending'), ('cancelled', 'Cancelled')])
+    # Plain id: the income row may be live or archived
+    income_transaction_id = models.BigIntegerField(null=True, blank=True, db_index=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Archived booking for {self.guest_name} in room {self.room_number}"
+
+    def duration(self):
+        return (self.check_out - self.check_in).days
+
+    class Meta:
+        indexes = [
+            # Same lookups as the live table's indexes
+            models.Index(fields=['room_number', 'check_out', 'check_in'], name='archbooking_room_dates_idx'),
+            models.Index(fields=['check_in', 'id'], name='archbooking_check_in_idx'),
+        ]
+
+
+class ArchivedTransaction(models.Model):
+    """
+    A financial transaction from a closed period, moved out of
+    FinancialTransaction by the archive_history command. Its amounts stay
+    in FinancialRollup and DailyBalance.
+    """
+
+    is_archived = True
+
+    id = models.BigIntegerField(primary_key=True)
+    transaction_type = models.CharField(max_length=10, choices=FinancialTransaction.TRANSACTION_TYPE_CHOICES)
+    category = models.CharField(max_length=20, choices=FinancialTransaction.CATEGORY_CHOICES)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    description = models.TextField(blank=True)
+    date = models.DateField()
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Archived {self.transaction_type} - {self.category} - {self.amount}"
+
+    class Meta:
+        ordering = ['-date']
+        indexes = [
+            models.Index(fields=['date', 'id'], name='archtxn_date_id_idx'),
+            models.Index(fields=['category', 'date', 'id'], name='archtxn_category_date_id_idx'),
+        ]
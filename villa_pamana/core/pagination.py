@@ -0,0 +1,113 @@
+"""
+Keyset (cursor) pagination for date-ordered tables.
+
+Pages are fetched with "WHERE (date, id) < (cursor) ORDER BY date DESC,
+id DESC LIMIT n", which walks the (date, id) index and costs the same on
+page 1 and page 1000. OFFSET is never used.
+
+EstimatedCountPaginator is for the admin changelists, which need page
+numbers: unfiltered lists of big tables get an estimated row count instead
+of COUNT(*).
+"""
+
+from datetime import date
+from heapq import merge
+from itertools import islice
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+# Tables smaller than this are counted exactly; COUNT(*) is cheap there
+ESTIMATE_THRESHOLD = 10000
+
+
+def encode_cursor(row, date_field='date'):
+    return f"{getattr(row, date_field).isoformat()}.{row.pk}"
+
+
+def decode_cursor(cursor):
+    """Return (date, id) for a cursor string, or None if it is missing or invalid."""
+    if not cursor:
+        return None
+    try:
+        day, pk = cursor.split('.', 1)
+        return date.fromisoformat(day), int(pk)
+    except ValueError:
+        return None
+
+
+def keyset_page(queryset, cursor=None, page_size=50, date_field='date'):
+    """
+    Return (rows, next_cursor) for the page after `cursor`, newest first.
+    next_cursor is None on the last page.
+
+    `queryset` may also be a list of querysets over tables that share ids
+    (a table and its archive): each is paged the same way and the rows are
+    merged.
+    """
+    querysets = queryset if isinstance(queryset, (list, tuple)) else [queryset]
+    position = decode_cursor(cursor)
+    if position:
+        day, pk = position
+        querysets = [
+            queryset.filter(Q(**{f'{date_field}__lt': day}) | Q(**{date_field: day, 'pk__lt': pk}))
+            for queryset in querysets
+        ]
+
+    # Fetch one extra row to know whether an older page exists
+    pages = [queryset.order_by(f'-{date_field}', '-pk')[:page_size + 1] for queryset in querysets]
+    rows = list(islice(merge(*pages, key=lambda row: (getattr(row, date_field), row.pk), reverse=True),
+                       page_size + 1))
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return rows, encode_cursor(rows[-1], date_field)
+    return rows, None
+
+
+def estimated_row_count(model, using='default'):
+    """
+    Cheap row count estimate for a model's table, or None if the database
+    has no cheap way to give one.
+
+    SQLite: MAX(id) - MIN(id) + 1, two lookups at the ends of the primary
+    key. Exact until rows are deleted, an overestimate after.
+    PostgreSQL: the planner's estimate in pg_class (None before the first
+    ANALYZE).
+    """
+    connection = connections[using]
+    table = connection.ops.quote_name(model._meta.db_table)
+    pk = connection.ops.quote_name(model._meta.pk.column)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            # Separate subqueries: MIN and MAX in one SELECT scan the table
+            cursor.execute(f'SELECT (SELECT MAX({pk}) FROM {table}) - (SELECT MIN({pk}) FROM {table}) + 1')
+        elif connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                           [model._meta.db_table])
+        else:
+            return None
+        row = cursor.fetchone()
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that estimates the count of an unfiltered queryset over a big
+    table (see estimated_row_count). Filtered querysets, and tables under
+    ESTIMATE_THRESHOLD rows, are counted exactly. With an overestimate the
+    last pages can come out short or empty.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if hasattr(queryset, 'query') and not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+                return estimate
+        return super().count
@@ -0,0 +1,98 @@
+"""
+Booking payments and their income rows.
+
+A paid booking is linked to the FinancialTransaction (income, category
+'booking') recorded for it through Booking.income_transaction, so booking
+revenue is entered once. mark_paid() creates the income row for every
+booking that does not have one yet, so marking a booking paid twice, or two
+requests racing, never records the income twice.
+
+reconcile() lists where bookings and booking income disagree. Each kind of
+mismatch is one joined query (plus a COUNT), so the check costs the same
+handful of queries however many bookings there are.
+"""
+
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q
+
+from . import caching, rollups
+from .models import ArchivedBooking, Booking, FinancialTransaction
+
+
+# Above this many new income rows mark_paid() recomputes the day's rollups
+# in one pass instead of applying each row (a few small writes per row)
+INCREMENTAL_ROLLUP_LIMIT = 200
+
+def _description(booking):
+    return f'Room {booking.room_number} - {booking.guest_name}'
+
+
+def mark_paid(bookings, day=None):
+    """
+    Mark the bookings in `bookings` (a queryset) paid and record the income
+    of those without an income row on `day` (default: today). Cancelled
+    bookings are skipped. Returns the number of income rows created.
+    """
+    day = day or date.today()
+
+    with transaction.atomic():
+        # Read inside the transaction (BEGIN IMMEDIATE on SQLite holds the
+        # write lock), so a concurrent call cannot pick the same bookings
+        unsettled = list(
+            bookings.select_for_update().exclude(payment_status='cancelled')
+            .filter(Q(income_transaction__isnull=True) | ~Q(payment_status='paid')).order_by('pk'))
+        unrecorded = [booking for booking in unsettled if booking.income_transaction_id is None]
+        incomes = FinancialTransaction.objects.bulk_create([
+            FinancialTransaction(transaction_type='income', category='booking',
+                                 amount=booking.payment_amount, description=_description(booking), date=day)
+            for booking in unrecorded
+        ])
+        for booking, income in zip(unrecorded, incomes):
+            booking.income_transaction = income
+        for booking in unsettled:
+            booking.payment_status = 'paid'
+        Booking.objects.bulk_update(unsettled, ['income_transaction', 'payment_status'], batch_size=500)
+
+        # bulk_create() and bulk_update() skip the model signals
+        if len(incomes) > INCREMENTAL_ROLLUP_LIMIT:
+            rollups.rebuild(day, day)
+        else:
+            for income in incomes:
+                rollups.apply_transaction('income', 'booking', income.amount, day)
+        caching.invalidate_dashboard()
+        # The calendar colours paid stays
+        caching.invalidate_calendar()
+    return len(incomes)
+
+
+def reconcile(limit=20):
+    """
+    Bookings and booking income that disagree, as {kind: (count, rows)} with
+    up to `limit` example rows per kind:
+
+    - paid_without_income: paid bookings with no income row
+    - income_not_paid: income rows linked to pending or cancelled bookings
+    - amount_mismatch: linked income whose amount differs from the booking's
+    - orphan_income: booking income linked to no booking (live or archived)
+    """
+    checks = {
+        'paid_without_income': Booking.objects.filter(
+            payment_status='paid', income_transaction__isnull=True,
+        ).values('id', 'guest_name', 'check_in', 'payment_amount'),
+        'income_not_paid': Booking.objects.filter(
+            income_transaction__isnull=False,
+        ).exclude(payment_status='paid').values(
+            'id', 'guest_name', 'payment_status', 'income_transaction_id', 'income_transaction__amount'),
+        'amount_mismatch': Booking.objects.filter(
+            income_transaction__isnull=False,
+        ).exclude(income_transaction__amount=F('payment_amount')).values(
+            'id', 'guest_name', 'payment_amount', 'income_transaction_id', 'income_transaction__amount'),
+        'orphan_income': FinancialTransaction.objects.filter(
+            transaction_type='income', category='booking', booking__isnull=True,
+        ).exclude(
+            Exists(ArchivedBooking.objects.filter(income_transaction_id=OuterRef('pk'))),
+        ).values('id', 'date', 'amount', 'description'),
+    }
+    return {kind: (rows.count(), list(rows.order_by('id')[:limit])) for kind, rows in checks.items()}
@@ -0,0 +1,119 @@
+"""
+Lightweight request profiling.
+
+profile() collects SQL query count and time (through
+connection.execute_wrapper) and template render time for the block it wraps.
+Render time is measured by render() below, which the views use in place of
+django.shortcuts.render, and by rendering() blocks around other template
+rendering.
+
+An execute wrapper only sees queries on the thread that installed it. Code
+that queries from another thread for a profiled block (the async views'
+database pool, sync views under ASGI) wraps that work in track_queries(),
+which installs the wrappers of the profiles active in its context;
+sync_to_async copies that context into the thread.
+
+Queries slower than a profile's slow_query_ms are kept with the line of
+project code that ran them. The stack is only walked for those queries.
+"""
+
+import sys
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django import shortcuts
+from django.conf import settings
+from django.db import connection
+
+
+# Profiles can nest (bench_views profiles requests the middleware also
+# profiles); every active one sees each query and render
+_active_profiles = ContextVar('core_active_profiles', default=())
+
+
+class Profile:
+    """Timings collected while a profile() block is running (milliseconds)."""
+
+    def __init__(self, slow_query_ms=None):
+        self.query_count = 0
+        self.sql_ms = 0.0
+        self.render_ms = 0.0
+        self.total_ms = 0.0
+        self.slow_query_ms = slow_query_ms
+        # (sql, ms, call site) of each query over slow_query_ms
+        self.slow_queries = []
+        # Queries can finish on several threads at once
+        self._lock = threading.Lock()
+
+    def _execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            slow = self.slow_query_ms is not None and elapsed >= self.slow_query_ms
+            call_site = _call_site() if slow else None
+            with self._lock:
+                self.query_count += 1
+                self.sql_ms += elapsed
+                if slow:
+                    self.slow_queries.append((sql, elapsed, call_site))
+
+
+def _call_site():
+    """'path:line in function' of the innermost project frame outside this module."""
+    base_dir = str(settings.BASE_DIR)
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(base_dir) and filename != __file__ and 'site-packages' not in filename:
+            return f'{filename[len(base_dir) + 1:]}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return 'unknown'
+
+
+@contextmanager
+def track_queries():
+    """Count this thread's queries in the profiles active in the current context."""
+    with ExitStack() as stack:
+        for active in _active_profiles.get():
+            # Bound methods compare equal, so a thread is never wrapped twice
+            if active._execute not in connection.execute_wrappers:
+                stack.enter_context(connection.execute_wrapper(active._execute))
+        yield
+
+
+@contextmanager
+def rendering():
+    """Count the wrapped block as template render time in the active profiles."""
+    profiles = _active_profiles.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = (time.perf_counter() - started) * 1000
+        for active in profiles:
+            with active._lock:
+                active.render_ms += elapsed
+
+
+def render(request, template_name, context=None, *args, **kwargs):
+    """django.shortcuts.render, timed as render time of the active profiles."""
+    with rendering():
+        return shortcuts.render(request, template_name, context, *args, **kwargs)
+
+
+@contextmanager
+def profile(slow_query_ms=None):
+    """Collect a Profile for the wrapped block."""
+    result = Profile(slow_query_ms)
+    token = _active_profiles.set(_active_profiles.get() + (result,))
+    started = time.perf_counter()
+    try:
+        with connection.execute_wrapper(result._execute):
+            yield result
+    finally:
+        result.total_ms = (time.perf_counter() - started) * 1000
+        _active_profiles.reset(token)
@@ -0,0 +1,79 @@
+"""
+Recurring tasks.
+
+TodoTask rows for each active RecurringTask are created lazily, for the
+next WINDOW_DAYS only, the first time the to-do list or the dashboard is
+loaded on a given day. One SELECT finds the recurring tasks not yet generated
+that far, one bulk INSERT creates their occurrences and one UPDATE moves
+their generated_through mark. A cache flag makes later loads that day free.
+
+Past days are not backfilled: a daily task missed while nobody opened the
+app is not worth a pile of overdue rows.
+"""
+
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from . import caching
+from .models import RecurringTask, TodoTask
+
+
+WINDOW_DAYS = 7
+
+
+def occurrences(recurring, first, last):
+    """Days between first and last (inclusive) on which `recurring` is due."""
+    day = max(first, recurring.start_date)
+    if recurring.frequency == 'weekly':
+        # Move forward to the start date's weekday
+        day += timedelta(days=(recurring.start_date.weekday() - day.weekday()) % 7)
+    step = timedelta(days=7 if recurring.frequency == 'weekly' else 1)
+    while day <= last:
+        yield day
+        day += step
+
+
+def materialize(today=None):
+    """Create the TodoTask rows due in the window starting today. Returns how many."""
+    today = today or date.today()
+    key = caching.recurring_key(today)
+    if cache.get(key):
+        return 0
+
+    last = today + timedelta(days=WINDOW_DAYS - 1)
+    pending = list(
+        RecurringTask.objects.filter(is_active=True, start_date__lte=last)
+        .filter(Q(generated_through__isnull=True) | Q(generated_through__lt=last))
+    )
+
+    tasks = []
+    for recurring in pending:
+        first = today
+        if recurring.generated_through:
+            first = max(first, recurring.generated_through + timedelta(days=1))
+        tasks += [
+            TodoTask(
+                title=recurring.title,
+                description=recurring.description,
+                priority=recurring.priority,
+                priority_rank=TodoTask.PRIORITY_RANKS[recurring.priority],
+                due_date=day,
+                recurring_task=recurring,
+            )
+            for day in occurrences(recurring, first, last)
+        ]
+
+    if pending:
+        with transaction.atomic():
+            # ignore_conflicts: a concurrent request may have made some already
+            TodoTask.objects.bulk_create(tasks, ignore_conflicts=True)
+            RecurringTask.objects.filter(pk__in=[recurring.pk for recurring in pending]).update(
+                generated_through=last)
+            # bulk_create() sends no signals
+            caching.invalidate_dashboard()
+
+    cache.set(key, True, caching.DASHBOARD_TIMEOUT)
+    return len(tasks)
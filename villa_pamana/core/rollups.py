@@ -0,0 +1,297 @@
+"""
+Financial rollups - pre-aggregated income and expense totals.
+
+FinancialRollup stores one row per day and one row per month for every
+category. Single-row changes are applied incrementally (apply_transaction),
+bulk changes are recomputed for the affected months (rebuild), and readers
+sum a handful of rollup rows instead of scanning FinancialTransaction.
+
+DailyBalance holds the running balance (income minus expenses to date) for
+every day with transactions. A backdated change moves the balance of its
+own day and every later day with one UPDATE; balance_on() reads one row.
+
+Recomputing (rebuild, verify) reads ArchivedTransaction as well as
+FinancialTransaction, so archived periods keep their totals (core/archive.py).
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
+
+from . import caching
+from .models import ArchivedTransaction, DailyBalance, FinancialRollup, FinancialTransaction
+
+
+ZERO = Decimal('0.00')
+
+
+def _month_start(day):
+    return day.replace(day=1)
+
+
+def _next_month(day):
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def _clean(transaction_type, category, amount, day):
+    # Views create transactions straight from request.POST, so the values on
+    # the instance can still be strings when the signal fires.
+    amount = FinancialTransaction._meta.get_field('amount').to_python(amount)
+    day = FinancialTransaction._meta.get_field('date').to_python(day)
+    return transaction_type, category, amount, day
+
+
+def apply_transaction(transaction_type, category, amount, day, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) one transaction from its day and month
+    rollup rows.
+    """
+    transaction_type, category, amount, day = _clean(transaction_type, category, amount, day)
+    field = 'income' if transaction_type == 'income' else 'expenses'
+
+    with transaction.atomic():
+        for period, start in (('day', day), ('month', _month_start(day))):
+            row, _ = FinancialRollup.objects.get_or_create(
+                period=period, period_start=start, category=category)
+            # Increment in SQL so concurrent writers cannot lose updates
+            FinancialRollup.objects.filter(pk=row.pk).update(**{
+                field: F(field) + amount * sign,
+                'transaction_count': F('transaction_count') + sign,
+            })
+        _apply_balance(day, amount * sign if field == 'income' else -amount * sign)
+
+
+def balance_on(day):
+    """Running balance at the end of `day` (zero before the first transaction)."""
+    balance = (DailyBalance.objects.filter(date__lte=day).order_by('-date')
+               .values_list('balance', flat=True).first())
+    return ZERO if balance is None else balance
+
+
+def _apply_balance(day, delta):
+    # A new row starts from the previous day's balance, then takes the delta
+    # with every later row
+    DailyBalance.objects.get_or_create(
+        date=day, defaults={'balance': lambda: balance_on(day - timedelta(days=1))})
+    DailyBalance.objects.filter(date__gte=day).update(balance=F('balance') + delta)
+
+
+def _rollup_filter(start=None, end=None):
+    """
+    Q object selecting the fewest rollup rows that exactly cover [start, end]:
+    month rows for whole months, day rows for the partial months at the edges.
+    """
+    if start is None and end is None:
+        return Q(period='month')
+
+    start = start or date.min
+    end = end or date.max
+
+    first_full = start if start.day == 1 else _next_month(start)
+    # First month that is NOT fully covered at the end of the range
+    if end == date.max:
+        after_full = date.max
+    else:
+        next_day = end + timedelta(days=1)
+        after_full = next_day if next_day.day == 1 else _month_start(end)
+
+    if first_full >= after_full:
+        return Q(period='day', period_start__gte=start, period_start__lte=end)
+
+    return (
+        Q(period='month', period_start__gte=first_full, period_start__lt=after_full)
+        | Q(period='day', period_start__gte=start, period_start__lt=first_full)
+        | Q(period='day', period_start__gte=after_full, period_start__lte=end)
+    )
+
+
+def totals(start=None, end=None, category=None):
+    """
+    Income, expenses and transaction count between start and end (inclusive).
+    Either bound may be None. Runs a single aggregate over at most a few
+    dozen rollup rows per year in the range.
+    """
+    rows = FinancialRollup.objects.filter(_rollup_filter(start, end))
+    if category:
+        rows = rows.filter(category=category)
+
+    money = DecimalField(max_digits=14, decimal_places=2)
+    result = rows.aggregate(
+        income=Coalesce(Sum('income'), Value(ZERO), output_field=money),
+        expenses=Coalesce(Sum('expenses'), Value(ZERO), output_field=money),
+        count=Coalesce(Sum('transaction_count'), 0),
+    )
+    result['net'] = result['income'] - result['expenses']
+    return result
+
+
+def _ledgers(start=None, end=None):
+    """The live and archived transactions dated in [start, end)."""
+    for model in (FinancialTransaction, ArchivedTransaction):
+        transactions = model.objects.order_by()
+        if start:
+            transactions = transactions.filter(date__gte=start)
+        if end:
+            transactions = transactions.filter(date__lt=end)
+        yield transactions
+
+
+def _expected_rows(start=None, end=None):
+    """Recompute rollup rows for [start, end) straight from the transactions."""
+    money = DecimalField(max_digits=14, decimal_places=2)
+    aggregates = {
+        'income': Coalesce(Sum('amount', filter=Q(transaction_type='income')), Value(ZERO), output_field=money),
+        'expenses': Coalesce(Sum('amount', filter=Q(transaction_type='expense')), Value(ZERO), output_field=money),
+        'transaction_count': Count('id'),
+    }
+
+    rows = {}
+    for transactions in _ledgers(start, end):
+        by_day = transactions.values('date', 'category').annotate(**aggregates)
+        by_month = (transactions.annotate(month=TruncMonth('date'))
+                    .values('month', 'category').annotate(**aggregates))
+
+        keyed = [(('day', row['date'], row['category']), row) for row in by_day]
+        keyed += [(('month', row['month'], row['category']), row) for row in by_month]
+        for key, row in keyed:
+            if key in rows:
+                # A backdated live transaction in an archived period
+                for field in ('income', 'expenses', 'transaction_count'):
+                    rows[key][field] += row[field]
+            else:
+                rows[key] = row
+    return rows
+
+
+def _daily_net(start=None, end=None):
+    """(date, income - expenses) for each day in [start, end) with transactions, oldest first."""
+    money = DecimalField(max_digits=14, decimal_places=2)
+    net = {}
+    for transactions in _ledgers(start, end):
+        rows = transactions.values('date').annotate(
+            income=Coalesce(Sum('amount', filter=Q(transaction_type='income')), Value(ZERO), output_field=money),
+            expenses=Coalesce(Sum('amount', filter=Q(transaction_type='expense')), Value(ZERO), output_field=money),
+        )
+        for row in rows:
+            net[row['date']] = net.get(row['date'], ZERO) + row['income'] - row['expenses']
+    return sorted(net.items())
+
+
+def _opening_balance(start):
+    # Net of everything before start, straight from the transactions
+    if not start:
+        return ZERO
+    return sum((net for _, net in _daily_net(end=start)), ZERO)
+
+
+def _rebuild_balances(start=None):
+    # Balances are cumulative, so every row from start onwards is rewritten
+    stale = DailyBalance.objects.all()
+    if start:
+        stale = stale.filter(date__gte=start)
+    stale.delete()
+
+    balance = balance_on(start - timedelta(days=1)) if start else ZERO
+    rows = []
+    for day, net in _daily_net(start):
+        balance += net
+        rows.append(DailyBalance(date=day, balance=balance))
+    DailyBalance.objects.bulk_create(rows, batch_size=500)
+
+
+def _month_bounds(start=None, end=None):
+    # Widen a date range to whole months so month rows stay consistent
+    return (_month_start(start) if start else None,
+            _next_month(end) if end else None)
+
+
+def rebuild(start=None, end=None):
+    """
+    Recompute rollup rows for every month touching [start, end] (or for all
+    history when no bounds are given). Used after bulk writes that bypass the
+    model signals, and by the rebuild_rollups command. Daily balances are
+    rebuilt from the same start date to the end of history.
+    """
+    start, end = _month_bounds(start, end)
+
+    with transaction.atomic():
+        stale = FinancialRollup.objects.all()
+        if start:
+            stale = stale.filter(period_start__gte=start)
+        if end:
+            stale = stale.filter(period_start__lt=end)
+        stale.delete()
+
+        FinancialRollup.objects.bulk_create(
+            [
+                FinancialRollup(
+                    period=period,
+                    period_start=period_start,
+                    category=category,
+                    income=row['income'],
+                    expenses=row['expenses'],
+                    transaction_count=row['transaction_count'],
+                )
+                for (period, period_start, category), row in _expected_rows(start, end).items()
+            ],
+            batch_size=500,
+        )
+        _rebuild_balances(start)
+        caching.invalidate_dashboard()
+
+
+def verify(start=None, end=None):
+    """
+    Compare stored rollup rows with a fresh aggregation. Returns a list of
+    (period, period_start, category, stored, expected) tuples that differ.
+    Daily balances that differ are reported with period 'balance'.
+    """
+    start, end = _month_bounds(start, end)
+    expected = _expected_rows(start, end)
+
+    stored_rows = FinancialRollup.objects.all()
+    if start:
+        stored_rows = stored_rows.filter(period_start__gte=start)
+    if end:
+        stored_rows = stored_rows.filter(period_start__lt=end)
+
+    stored = {}
+    for row in stored_rows.values('period', 'period_start', 'category',
+                                  'income', 'expenses', 'transaction_count'):
+        # Rows that were decremented back to nothing are harmless
+        if row['transaction_count'] == 0 and not row['income'] and not row['expenses']:
+            continue
+        stored[(row['period'], row['period_start'], row['category'])] = row
+
+    mismatches = []
+    for key in sorted(set(stored) | set(expected)):
+        have = stored.get(key)
+        want = expected.get(key)
+        have_values = (have['income'], have['expenses'], have['transaction_count']) if have else None
+        want_values = (want['income'], want['expenses'], want['transaction_count']) if want else None
+        if have_values != want_values:
+            mismatches.append((*key, have_values, want_values))
+    return mismatches + _balance_mismatches(start, end)
+
+
+def _balance_mismatches(start=None, end=None):
+    stored_rows = DailyBalance.objects.all()
+    if start:
+        stored_rows = stored_rows.filter(date__gte=start)
+    if end:
+        stored_rows = stored_rows.filter(date__lt=end)
+    stored = dict(stored_rows.values_list('date', 'balance'))
+    net = dict(_daily_net(start, end))
+
+    mismatches = []
+    balance = _opening_balance(start)
+    for day in sorted(set(stored) | set(net)):
+        balance += net.get(day, ZERO)
+        # Days whose transactions were all deleted keep a row, which is fine
+        # as long as it carries the running balance
+        if stored.get(day) != balance:
+            mismatches.append(('balance', day, '', stored.get(day), balance))
+    return mismatches
@@ -0,0 +1,85 @@
+"""
+Month booking calendar: one row per room, one column per night.
+
+One indexed range query (archive.stays, live and archived bookings) fetches
+the active stays that touch the month, ordered by room and check-in. A
+single pass then turns each room's stays into runs of nights: a free gap,
+then a stay clipped to the month, and so on. Active stays in a room never overlap, so the sweep is
+O(stays + rooms) and needs no query per room, day or cell.
+
+The rendered grid is cached per month (see caching.calendar_month_key)
+until a booking with nights in that month changes.
+"""
+
+from datetime import timedelta
+from itertools import groupby
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+from . import archive, availability, caching, profiling
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(day):
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def months_touched(check_in, check_out):
+    """First day of every month with at least one night of [check_in, check_out)."""
+    month = month_start(check_in)
+    while month < check_out:
+        yield month
+        month = next_month(month)
+
+
+def month_grid(month):
+    """
+    Calendar data for the month starting on `month`: the dates, and per room
+    a list of runs, each a dict with the number of nights ('span') and the
+    booking holding them (None for free nights).
+    """
+    stop = next_month(month)
+    days = [month + timedelta(days=offset) for offset in range((stop - month).days)]
+
+    stays = archive.stays(month, stop, 'id', 'room_number', 'guest_name', 'check_in', 'check_out',
+                          'payment_status').order_by('room_number', 'check_in')
+    by_room = {room: list(room_stays) for room, room_stays in groupby(stays, key=lambda stay: stay['room_number'])}
+
+    rows = []
+    for room in availability.ROOMS:
+        runs = []
+        night = month
+        for stay in by_room.get(room, []):
+            # Overlapping stays (entered before overlaps were rejected
+            # everywhere) only get the nights the earlier one leaves free
+            first, last = max(stay['check_in'], night), min(stay['check_out'], stop)
+            if last <= first:
+                continue
+            if first > night:
+                runs.append({'span': (first - night).days, 'booking': None})
+            runs.append({'span': (last - first).days, 'booking': stay})
+            night = last
+        if night < stop:
+            runs.append({'span': (stop - night).days, 'booking': None})
+        rows.append({'room': room, 'runs': runs})
+
+    return {'month': month, 'days': days, 'rows': rows}
+
+
+def _render_grid(month):
+    grid = month_grid(month)
+    with profiling.rendering():
+        return render_to_string('core/calendar_grid.html', grid)
+
+
+def month_html(month):
+    """The month's grid rendered as an HTML table, cached until a booking in it changes."""
+    return cache.get_or_set(
+        caching.calendar_month_key(month),
+        lambda: _render_grid(month),
+        caching.CALENDAR_TIMEOUT,
+    )
@@ -0,0 +1,213 @@
+"""
+Full-text search over guests, transactions, inventory and tasks.
+
+On SQLite the text lives in one FTS5 table, core_search (created by
+migration 0008, renumbered by 0014). Triggers on the four source tables
+keep it in sync, which covers bulk_create() and queryset.update() as well
+as save(). A migration that makes SQLite copy a source table drops its
+triggers; ensure_triggers(), run after every migrate (core.signals),
+creates missing ones again and refills the index. Each row's rowid is the kind number below * KIND_SPAN + the
+source id, so a trigger finds the row to replace by rowid rather than by
+scanning, and each kind is one rowid range that FTS5 can seek to.
+
+Queries are ranked with bm25 (a title match weighs more than a body match),
+and every word is matched as a prefix: "jua cru" finds "Juan Dela Cruz".
+Only the newest RANKED_CANDIDATES matches of each kind are ranked, so a
+word found in 100k rows costs about as much as a rare one, and a common
+word in one table cannot hide the matches in another.
+
+Other databases fall back to icontains lookups on the same columns.
+"""
+
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Booking, FinancialTransaction, InventoryItem, TodoTask
+
+
+# kind -> (number used in the rowid, model, title column, body columns)
+KINDS = {
+    'booking': (0, Booking, 'guest_name', ['contact_number', 'room_number']),
+    'transaction': (1, FinancialTransaction, 'description', ['category', 'transaction_type']),
+    'inventory': (2, InventoryItem, 'name', ['category']),
+    'task': (3, TodoTask, 'title', ['description']),
+}
+
+TABLE = 'core_search'
+
+# Rowids of kind n are n * KIND_SPAN + id (ids stay far below 2**40)
+KIND_SPAN = 2 ** 40
+DEFAULT_LIMIT = 20
+
+# Matches ranked per kind, newest (highest rowid) first. FTS5 walks its
+# index in rowid order, so stopping here is cheap; ranking every match of a
+# common word is not.
+RANKED_CANDIDATES = 250
+
+# bm25 column weights: title, body
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+
+def is_available():
+    """True when the FTS5 table exists (SQLite with migration 0008 applied)."""
+    # Checked once per connection rather than on every search
+    if not hasattr(connection, '_core_search_available'):
+        connection._core_search_available = (
+            connection.vendor == 'sqlite' and TABLE in connection.introspection.table_names())
+    return connection._core_search_available
+
+
+def match_expression(text):
+    """
+    FTS5 query for free text: each word quoted (so punctuation and words
+    like AND/OR/NEAR are taken literally) and matched as a prefix.
+    Returns '' when there is nothing to search for.
+    """
+    words = re.findall(r'\w+', text)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def _kind_range(kind):
+    # SQL condition for the rowids of one kind
+    number = KINDS[kind][0]
+    return f"rowid >= {number * KIND_SPAN} AND rowid < {(number + 1) * KIND_SPAN}"
+
+
+def _source_sql(kind):
+    number, model, title, body = KINDS[kind]
+    body_sql = " || ' ' || ".join(f"COALESCE({column}, '')" for column in body)
+    return (f"SELECT {number * KIND_SPAN} + id, {title}, {body_sql} FROM {model._meta.db_table}")
+
+
+def _triggers(kind):
+    # {trigger name: CREATE TRIGGER statement} for one source table
+    number, model, title, body = KINDS[kind]
+    table = model._meta.db_table
+    columns = ', '.join([title, *body])
+    body_sql = " || ' ' || ".join(f"COALESCE(new.{column}, '')" for column in body)
+    insert = (f"INSERT INTO {TABLE} (rowid, title, body) "
+              f"VALUES ({number * KIND_SPAN} + new.id, new.{title}, {body_sql});")
+    delete = f"DELETE FROM {TABLE} WHERE rowid = {number * KIND_SPAN} + old.id;"
+    return {
+        f'{table}_search_insert': f"CREATE TRIGGER {table}_search_insert AFTER INSERT ON {table} BEGIN {insert} END",
+        f'{table}_search_update': (f"CREATE TRIGGER {table}_search_update AFTER UPDATE OF {columns} ON {table} "
+                                   f"BEGIN {delete} {insert} END"),
+        f'{table}_search_delete': f"CREATE TRIGGER {table}_search_delete AFTER DELETE ON {table} BEGIN {delete} END",
+    }
+
+
+def trigger_names():
+    """Names of the triggers that keep the index in sync."""
+    return sorted(name for kind in KINDS for name in _triggers(kind))
+
+
+def ensure_triggers(using=DEFAULT_DB_ALIAS):
+    """
+    Create the index triggers missing from database `using` and, if any
+    were, refill the index (rows may have changed without them). Expects
+    the index layout of migration 0014. Returns the names created.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        existing = {name for name, in cursor.fetchall()}
+        missing = {name: sql for kind in KINDS for name, sql in _triggers(kind).items() if name not in existing}
+        for sql in missing.values():
+            cursor.execute(sql)
+    if missing:
+        rebuild(using)
+    return sorted(missing)
+
+
+def rebuild(using=DEFAULT_DB_ALIAS):
+    """Refill the index from the source tables. Returns the number of rows indexed."""
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE}")
+        for kind in KINDS:
+            cursor.execute(f"INSERT INTO {TABLE} (rowid, title, body) {_source_sql(kind)}")
+        # Merge the index b-trees so queries touch as few pages as possible
+        cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+        cursor.execute(f"SELECT COUNT(*) FROM {TABLE}")
+        return cursor.fetchone()[0]
+
+
+def search(text, limit=DEFAULT_LIMIT, kinds=None):
+    """
+    Best matches for `text`, best first, as dicts with kind, id, title and
+    body (the indexed text, so no source rows are read).
+    """
+    kinds = kinds or list(KINDS)
+    if not is_available():
+        return _search_without_index(text, limit, kinds)
+
+    expression = match_expression(text)
+    if not expression:
+        return []
+
+    numbers = {KINDS[kind][0]: kind for kind in kinds}
+    # Candidates are taken per kind, so a word found in thousands of
+    # transactions cannot crowd the one matching guest out of the ranking
+    candidates = ' UNION ALL '.join(
+        f"SELECT * FROM ("
+        f"SELECT rowid, title, body, bm25({TABLE}, {TITLE_WEIGHT}, {BODY_WEIGHT}) AS score "
+        f"FROM {TABLE} WHERE {TABLE} MATCH %s AND {_kind_range(kind)} "
+        f"ORDER BY rowid DESC LIMIT {RANKED_CANDIDATES})"
+        for kind in numbers.values()
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, title, body FROM ({candidates}) ORDER BY score LIMIT %s",
+            [expression] * len(numbers) + [limit],
+        )
+        return [
+            {'kind': numbers[rowid // KIND_SPAN], 'id': rowid % KIND_SPAN, 'title': title, 'body': body}
+            for rowid, title, body in cursor.fetchall()
+        ]
+
+
+def _condition(kind, words):
+    # Every word in the title or one of the body columns
+    number, model, title, body = KINDS[kind]
+    condition = Q()
+    for word in words:
+        condition &= Q(*[Q(**{f'{column}__icontains': word}) for column in [title, *body]], _connector=Q.OR)
+    return condition
+
+
+def _search_without_index(text, limit, kinds):
+    words = re.findall(r'\w+', text)
+    if not words:
+        return []
+
+    results = []
+    for kind in kinds:
+        number, model, title, body = KINDS[kind]
+        for row in model.objects.filter(_condition(kind, words)).values('id', title, *body)[:limit]:
+            results.append({
+                'kind': kind,
+                'id': row['id'],
+                'title': row[title],
+                'body': ' '.join(str(row[column] or '') for column in body),
+            })
+    return results[:limit]
+
+
+def filter_queryset(queryset, kind, text):
+    """
+    Restrict `queryset` (of the model for `kind`) to rows matching `text`,
+    as one SQL subquery. Used by the admin search boxes.
+    """
+    number, model, title, body = KINDS[kind]
+    expression = match_expression(text)
+    if not expression:
+        return queryset
+    if not is_available():
+        return queryset.filter(_condition(kind, re.findall(r'\w+', text)))
+    return queryset.filter(pk__in=RawSQL(
+        f"SELECT rowid - {number * KIND_SPAN} FROM {TABLE} WHERE {TABLE} MATCH %s AND {_kind_range(kind)}",
+        [expression],
+    ))
@@ -0,0 +1,63 @@
+"""
+Serializers for the read-only API (core/api.py).
+
+Every serializer accepts ?fields=a,b,c. Fields that were not asked for are
+dropped from the output, and the API views pass the same list to
+QuerySet.only() so the columns are never read either.
+"""
+
+from rest_framework import serializers
+
+from .models import Booking, FinancialTransaction, InventoryItem, TodoTask
+
+
+def requested_fields(request, serializer_class):
+    """
+    The ?fields= names for `serializer_class`, or None when the parameter is
+    absent. Unknown names raise a ValidationError (400).
+    """
+    raw = request.query_params.get('fields') if request is not None else None
+    if not raw:
+        return None
+
+    names = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in names if name not in serializer_class.Meta.fields]
+    if unknown:
+        raise serializers.ValidationError({'fields': [f"Unknown field(s): {', '.join(unknown)}"]})
+    return names
+
+
+class SparseFieldsMixin:
+    """Drop the fields not listed in ?fields= (see requested_fields)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        names = requested_fields(self.context.get('request'), type(self))
+        if names:
+            for name in set(self.fields) - set(names):
+                self.fields.pop(name)
+
+
+class InventoryItemSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = InventoryItem
+        fields = ['id', 'name', 'category', 'quantity', 'minimum_stock', 'unit', 'last_updated']
+
+
+class TodoTaskSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = TodoTask
+        fields = ['id', 'title', 'description', 'priority', 'is_completed', 'due_date', 'created_at']
+
+
+class BookingSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Booking
+        fields = ['id', 'guest_name', 'contact_number', 'room_number', 'number_of_guests',
+                  'check_in', 'check_out', 'payment_amount', 'payment_status', 'created_at']
+
+
+class FinancialTransactionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = FinancialTransaction
+        fields = ['id', 'date', 'transaction_type', 'category', 'amount', 'description', 'created_at']
@@ -0,0 +1,108 @@
+"""
+Model signal handlers for core.
+
+Connected in CoreConfig.ready(). Keeping them here means admin edits and
+plain .save()/.delete() calls are covered, not just the views.
+"""
+
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_save
+from django.dispatch import receiver
+
+from . import caching, room_calendar, rollups, search
+from .models import Booking, FinancialTransaction, InventoryItem, RecurringTask, TodoTask
+
+
+ROLLUP_FIELDS = ('transaction_type', 'category', 'amount', 'date')
+
+
+@receiver(pre_save, sender=FinancialTransaction)
+def remember_previous_transaction(sender, instance, raw=False, **kwargs):
+    # Edits need the old values so they can be taken out of the rollup
+    instance._rollup_previous = None
+    if instance.pk and not raw:
+        instance._rollup_previous = (
+            FinancialTransaction.objects.filter(pk=instance.pk).values(*ROLLUP_FIELDS).first()
+        )
+
+
+@receiver(post_save, sender=FinancialTransaction)
+def update_rollup_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous:
+        rollups.apply_transaction(*(previous[field] for field in ROLLUP_FIELDS), sign=-1)
+    rollups.apply_transaction(*(getattr(instance, field) for field in ROLLUP_FIELDS))
+
+
+@receiver(post_delete, sender=FinancialTransaction)
+def update_rollup_on_delete(sender, instance, **kwargs):
+    rollups.apply_transaction(*(getattr(instance, field) for field in ROLLUP_FIELDS), sign=-1)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+@receiver(post_save, sender=FinancialTransaction)
+@receiver(post_delete, sender=FinancialTransaction)
+@receiver(post_save, sender=InventoryItem)
+@receiver(post_delete, sender=InventoryItem)
+@receiver(post_save, sender=TodoTask)
+@receiver(post_delete, sender=TodoTask)
+def invalidate_dashboard(sender, **kwargs):
+    caching.invalidate_dashboard()
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def invalidate_analytics(sender, **kwargs):
+    caching.invalidate_analytics()
+
+
+@receiver(post_save, sender=RecurringTask)
+@receiver(post_delete, sender=RecurringTask)
+def invalidate_recurring(sender, **kwargs):
+    # New or changed recurring tasks are generated on the next page load
+    caching.invalidate_recurring()
+
+
+@receiver(pre_save, sender=Booking)
+def remember_previous_stay(sender, instance, raw=False, **kwargs):
+    # An edit that moves a stay must also clear the months it moved out of
+    instance._calendar_previous = None
+    if instance.pk and not raw:
+        instance._calendar_previous = (
+            Booking.objects.filter(pk=instance.pk).values_list('check_in', 'check_out').first()
+        )
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def invalidate_calendar(sender, instance, **kwargs):
+    stays = [getattr(instance, '_calendar_previous', None)]
+    # Dates may still be strings when a view saves straight from request.POST
+    stays.append(tuple(
+        Booking._meta.get_field(field).to_python(getattr(instance, field))
+        for field in ('check_in', 'check_out')))
+
+    months = set()
+    for stay in stays:
+        if stay and all(stay):
+            months.update(room_calendar.months_touched(*stay))
+    caching.invalidate_calendar(months)
+
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using, **kwargs):
+    # SQLite drops a table's triggers when a migration copies the table
+    # (AddField with a foreign key, AlterField...), so check them after
+    # every migrate instead of in each such migration
+    connection = connections[using]
+    if sender.name != 'core' or connection.vendor != 'sqlite':
+        return
+    applied = MigrationRecorder(connection).applied_migrations()
+    # Before 0014 the index used another rowid layout (or did not exist)
+    if ('core', '0014_search_index_kind_ranges') in applied:
+        search.ensure_triggers(using)
@@ -0,0 +1,135 @@
+/*
+FILE: core/static/core/js/financial.js
+Financials page - balance chart, "Older" ledger pages and the category list
+*/
+
+// Plain canvas line chart of the running balance (no chart library)
+const balanceChart = document.getElementById('balanceChart');
+fetch(balanceChart.dataset.url)
+    .then(response => response.json())
+    .then(data => {
+        const points = data.points.map(point => [Date.parse(point[0]), parseFloat(point[1])]);
+        if (points.length < 2) {
+            document.getElementById('balanceRange').textContent = 'Not enough transactions to chart yet.';
+            return;
+        }
+
+        const width = balanceChart.width = balanceChart.clientWidth;
+        const height = balanceChart.height = balanceChart.clientHeight;
+        const times = points.map(point => point[0]);
+        const balances = points.map(point => point[1]);
+        const minTime = Math.min(...times), maxTime = Math.max(...times);
+        const low = Math.min(0, ...balances), high = Math.max(0, ...balances);
+        const x = time => (time - minTime) / (maxTime - minTime || 1) * (width - 20) + 10;
+        const y = balance => height - 10 - (balance - low) / (high - low || 1) * (height - 20);
+
+        const context = balanceChart.getContext('2d');
+        // Zero line
+        context.strokeStyle = '#ccc';
+        context.beginPath();
+        context.moveTo(0, y(0));
+        context.lineTo(width, y(0));
+        context.stroke();
+
+        // Balance only changes on days with transactions, so draw steps
+        context.strokeStyle = '#2c3e50';
+        context.beginPath();
+        context.moveTo(x(times[0]), y(balances[0]));
+        for (let i = 1; i < points.length; i++) {
+            context.lineTo(x(times[i]), y(balances[i - 1]));
+            context.lineTo(x(times[i]), y(balances[i]));
+        }
+        context.stroke();
+
+        document.getElementById('balanceRange').textContent =
+            `${data.points[0][0]} to ${data.points[points.length - 1][0]}: ` +
+            `P${balances[0].toFixed(2)} to P${balances[balances.length - 1].toFixed(2)}`;
+    });
+
+// Load older ledger pages in place, without reloading the summary cards
+const olderLink = document.getElementById('olderLink');
+if (olderLink) {
+    olderLink.addEventListener('click', function(event) {
+        event.preventDefault();
+        fetch(olderLink.dataset.ledgerUrl)
+            .then(response => response.text().then(html => {
+                document.getElementById('ledgerRows').insertAdjacentHTML('beforeend', html);
+
+                // Same pages, next cursor
+                const nextPage = response.headers.get('X-Next-Page');
+                if (nextPage) {
+                    olderLink.href = olderLink.pathname + '?' + nextPage;
+                    olderLink.dataset.ledgerUrl = new URL(olderLink.dataset.ledgerUrl, location.href).pathname + '?' + nextPage;
+                } else {
+                    olderLink.remove();
+                }
+            }));
+    });
+}
+
+function updateCategories(){
+    /* used to change the category of the transaction
+
+    gets transaction type -> clear existing category option -> add relevant category
+    */
+
+    //get selected value
+    const type = document.getElementById('transaction_type').value;
+
+    //get reference to category dropdown
+    const categorySelect = document.getElementById('categorySelect');
+
+    //clear all existing options
+    categorySelect.innerHTML = '';
+
+    //define categories based on trans type
+    if (type === 'income'){
+        //income
+        const incomeCategories = [
+            {value: 'booking', text: 'Booking Revenue'},
+            {value: 'other', text: 'Other Income'}
+        ];
+
+        //create and add each option to dropdown
+        incomeCategories.forEach(cat => {
+            const option = document.createElement('option');
+            option.value = cat.value;
+            option.textContent = cat.text;
+            categorySelect.appendChild(option);
+        });
+    }
+    else{
+        //expense
+        const expenseCategories = [
+            {value: 'booking', text: 'Booking Expense'},
+            {value: 'utilities', text: 'Utilities'},
+            {value: 'salary', text: 'Salary'},
+            {value: 'maintenance', text: 'Maintenance'},
+            {value: 'supplies', text: 'Supplies Cost'},
+            {value: 'other', text: 'Others'}
+        ];
+
+        // Create and add each option
+        expenseCategories.forEach(cat=>{
+            const option = document.createElement('option');
+            option.value = cat.value;
+            option.textContent = cat.text;
+            categorySelect.appendChild(option);
+        });
+    }
+}
+
+//the script is deferred, so the form already exists
+updateCategories();
+
+document.getElementById('transaction_type').addEventListener('change', function() {
+    updateCategories();
+    if (this.value === 'income'){
+        this.style.backgroundColor = '#d4edda';
+        this.style.color = '#155724';
+
+    } else {
+        this.style.backgroundColor = '#f8d7da';
+        this.style.color = '#721c24';
+    }
+});
@@ -0,0 +1,44 @@
+/*
+FILE: core/static/core/js/inventory.js
+Inventory page - add item form and the update stock dialog
+*/
+
+const addForm = document.getElementById('addForm');
+const updateModal = document.getElementById('updateModal');
+const updateForm = document.getElementById('updateForm');
+
+//toggle the add new item form
+function toggleForm(){
+    addForm.hidden = !addForm.hidden;
+}
+
+//Show the update modal for one item (data-* attributes of its button)
+function showUpdateModal(button){
+    document.getElementById('modalTitle').textContent = 'Update: ' + button.dataset.itemName;
+    document.getElementById('currentStock').textContent = button.dataset.quantity;
+    updateForm.action = button.dataset.updateUrl;
+    updateModal.hidden = false;
+}
+
+//Close the update modal
+function closeUpdateModal(){
+    updateModal.hidden = true;
+    updateForm.reset();
+}
+
+document.querySelectorAll('.toggle-add-form').forEach(button => {
+    button.addEventListener('click', toggleForm);
+});
+
+document.querySelectorAll('.update-stock').forEach(button => {
+    button.addEventListener('click', () => showUpdateModal(button));
+});
+
+document.getElementById('closeUpdateModal').addEventListener('click', closeUpdateModal);
+
+//clicking the dark background closes the modal too
+updateModal.addEventListener('click', function(event){
+    if (event.target === updateModal){
+        closeUpdateModal();
+    }
+});
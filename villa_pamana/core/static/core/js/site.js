@@ -0,0 +1,26 @@
+/*
+FILE: core/static/core/js/site.js
+Loaded on every page
+
+Forms with a data-confirm="question" attribute ask before submitting
+(delete buttons, mark as paid, bulk actions).
+
+A checkbox with data-select-all="form id" ticks or clears every row
+checkbox belonging to that bulk form.
+*/
+
+document.addEventListener('submit', function(event){
+    const question = event.target.dataset.confirm;
+    if (question && !confirm(question)){
+        event.preventDefault();
+    }
+});
+
+document.addEventListener('change', function(event){
+    const formId = event.target.dataset.selectAll;
+    if (formId){
+        document.querySelectorAll(`input[name="ids"][form="${formId}"]`).forEach(function(box){
+            box.checked = event.target.checked;
+        });
+    }
+});
@@ -0,0 +1,69 @@
+"""
+Static file storage for production.
+
+collectstatic (through ManifestStaticFilesStorage) copies each file under a
+content-hashed name such as core/css/site.3f2a9c1b.css and records the
+mapping in staticfiles.json, which {% static %} reads. A changed file gets
+a new name, so browsers may cache every hashed file for a year.
+
+This subclass then writes a gzip (.gz) and, when the brotli package is
+installed, a brotli (.br) copy of each text file, so
+core.middleware.StaticFilesMiddleware sends compressed bytes without
+compressing on every request.
+"""
+
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESSIBLE = ('.css', '.js', '.svg', '.txt', '.html', '.json', '.map', '.xml')
+
+# A compressed copy must save at least this share of the bytes to be kept
+MIN_SAVING = 0.05
+
+
+def compressors():
+    """(suffix, compress function) for each available encoding."""
+    available = [('.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        available.append(('.br', lambda data: brotli.compress(data, quality=11)))
+    return available
+
+
+class PrecompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+
+        # Both names are served: hashed ones from {% static %}, plain ones
+        # from anything that links a file directly
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if not name.endswith(COMPRESSIBLE) or not self.exists(name):
+                continue
+            with self.open(name) as original:
+                data = original.read()
+            for suffix, compress in compressors():
+                compressed = compress(data)
+                if len(compressed) <= len(data) * (1 - MIN_SAVING):
+                    self._write(name + suffix, compressed)
+                    yield name, name + suffix, True
+                elif self.exists(name + suffix):
+                    # Left over from an earlier version of the file
+                    self.delete(name + suffix)
+
+    def _write(self, name, data):
+        # Overwrite in place; storage.save() would pick a new name instead
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as target:
+            target.write(data)
@@ -0,0 +1,79 @@
+"""
+Background job tasks, run by `python manage.py run_jobs` (see core/jobs.py).
+
+Imported in CoreConfig.ready() so every task is registered before a worker
+or a view looks one up.
+"""
+
+import logging
+from datetime import date, timedelta
+
+from django.core.mail import mail_admins
+from django.utils import timezone
+
+from . import inventory, jobs, recurring, rollups
+from .models import InventoryItem, Job
+
+
+logger = logging.getLogger('core.jobs')
+
+# Finished jobs are kept this long for the admin, then deleted
+JOB_HISTORY_DAYS = 30
+
+
+@jobs.task(every=timedelta(days=1))
+def close_month():
+    """
+    Check last month's and this month's rollups and balances against the
+    transactions, and rebuild them if they have drifted.
+    """
+    today = date.today()
+    start = (today.replace(day=1) - timedelta(days=1)).replace(day=1)
+    mismatches = rollups.verify(start, today)
+    if mismatches:
+        logger.warning('rebuilding rollups from %s: %d row(s) out of date', start, len(mismatches))
+        rollups.rebuild(start, today)
+
+
+@jobs.task(every=timedelta(hours=6))
+def generate_recurring_tasks():
+    """Create the coming week's recurring to-dos even if nobody opens the app."""
+    recurring.materialize(date.today())
+
+
+@jobs.task(every=timedelta(days=1))
+def refresh_forecasts():
+    """Move out the stockout forecasts of items that have not been used lately."""
+    inventory.refresh_forecasts()
+
+
+@jobs.task()
+def restock_alert():
+    """
+    Email the admins (and log) the items that have become low or are about
+    to run out since the last alert. Items already reported are left out
+    until they are restocked.
+    """
+    # Forecasts are only updated by movements and the daily refresh
+    inventory.refresh_forecasts()
+    items = [item for item in inventory.restock_alerts(date.today()) if item.restock_alerted_at is None]
+    if not items:
+        return
+
+    lines = []
+    for item in items:
+        line = f'{item.name}: {item.quantity} {item.unit} left (minimum {item.minimum_stock})'
+        if item.projected_stockout:
+            line += f', runs out around {item.projected_stockout:%b %d}'
+        lines.append(line)
+
+    logger.warning('restock needed: %s', '; '.join(lines))
+    mail_admins(f'Restock needed: {len(items)} item(s)', '\n'.join(lines))
+    InventoryItem.objects.filter(pk__in=[item.pk for item in items]).update(restock_alerted_at=timezone.now())
+
+
+@jobs.task(every=timedelta(days=1))
+def purge_jobs():
+    """Delete finished jobs older than JOB_HISTORY_DAYS."""
+    cutoff = timezone.now() - timedelta(days=JOB_HISTORY_DAYS)
+    Job.objects.filter(status__in=['done', 'failed'], finished_at__lt=cutoff).delete()
@@ -1,3 +1,1324 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import re
+import tempfile
+from io import StringIO
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
 
-# Create your tests here.
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .admin import FinancialTransactionAdmin
+from . import analytics, archive, availability, imports, inventory, jobs, payments, recurring, room_calendar, rollups, search
+from .models import (
+    ArchivedBooking, ArchivedTransaction, Booking, DailyBalance, FinancialRollup, FinancialTransaction, InventoryItem, InventoryMovement, Job, RecurringTask,
+    TodoTask,
+)
+
+
+def make_transaction(**kwargs):
+    fields = {
+        'transaction_type': 'income',
+        'category': 'booking',
+        'amount': Decimal('100.00'),
+        'date': date(2024, 3, 15),
+    }
+    fields.update(kwargs)
+    return FinancialTransaction.objects.create(**fields)
+
+
+def booking_fields(**kwargs):
+    fields = {
+        'guest_name': 'Juan Dela Cruz',
+        'contact_number': '09171234567',
+        'room_number': '1',
+        'number_of_guests': 2,
+        'check_in': date(2024, 5, 10),
+        'check_out': date(2024, 5, 13),
+        'payment_amount': Decimal('4500.00'),
+        'payment_status': 'pending',
+    }
+    fields.update(kwargs)
+    return fields
+
+
+class FinancialRollupTests(TestCase):
+
+    def test_save_edit_and_delete_keep_rollup_in_sync(self):
+        txn = make_transaction()
+        make_transaction(transaction_type='expense', category='utilities', amount=Decimal('40.00'))
+
+        march = rollups.totals(date(2024, 3, 1), date(2024, 3, 31))
+        self.assertEqual(march['income'], Decimal('100.00'))
+        self.assertEqual(march['expenses'], Decimal('40.00'))
+        self.assertEqual(march['count'], 2)
+
+        # Moving a transaction to another month takes it out of the old one
+        txn.date = date(2024, 4, 2)
+        txn.amount = Decimal('250.00')
+        txn.save()
+        self.assertEqual(rollups.totals(date(2024, 3, 1), date(2024, 3, 31))['income'], Decimal('0.00'))
+        self.assertEqual(rollups.totals(date(2024, 4, 1), date(2024, 4, 30))['income'], Decimal('250.00'))
+
+        txn.delete()
+        self.assertEqual(rollups.totals()['income'], Decimal('0.00'))
+        self.assertEqual(rollups.verify(), [])
+
+    def test_totals_combine_month_and_day_rows(self):
+        make_transaction(date=date(2024, 1, 31))
+        make_transaction(date=date(2024, 2, 10))
+        make_transaction(date=date(2024, 3, 1))
+        make_transaction(date=date(2024, 3, 2))
+
+        self.assertEqual(rollups.totals(date(2024, 1, 31), date(2024, 3, 1))['count'], 3)
+        self.assertEqual(rollups.totals(date(2024, 2, 1), date(2024, 2, 29))['count'], 1)
+        self.assertEqual(rollups.totals(date(2024, 3, 2), None)['count'], 1)
+        self.assertEqual(rollups.totals()['count'], 4)
+
+    def test_rebuild_command_repairs_and_verifies(self):
+        make_transaction()
+        FinancialRollup.objects.all().delete()
+        self.assertNotEqual(rollups.verify(), [])
+
+        call_command('rebuild_rollups', stdout=StringIO())
+        self.assertEqual(rollups.verify(), [])
+        call_command('rebuild_rollups', '--verify', stdout=StringIO())
+
+    def test_financial_views_read_totals_from_rollup(self):
+        self.client.post(reverse('financial_add'), {
+            'transaction_type': 'income',
+            'category': 'booking',
+            'amount': '1500.00',
+            'description': 'Room 1',
+            'date': date.today().isoformat(),
+        })
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['monthly_income'], Decimal('1500.00'))
+
+        response = self.client.get(reverse('financial_list'))
+        self.assertEqual(response.context['total_income'], Decimal('1500.00'))
+
+        txn = FinancialTransaction.objects.get()
+        self.client.post(reverse('financial_delete', args=[txn.pk]))
+        self.assertEqual(rollups.totals()['count'], 0)
+
+
+class DailyBalanceTests(TestCase):
+
+    def balances(self):
+        return dict(DailyBalance.objects.values_list('date', 'balance'))
+
+    def test_backdated_transaction_moves_later_balances_in_one_update(self):
+        make_transaction(date=date(2024, 3, 1))
+        make_transaction(date=date(2024, 3, 20))
+        make_transaction(transaction_type='expense', category='utilities',
+                         amount=Decimal('30.00'), date=date(2024, 3, 25))
+
+        with CaptureQueriesContext(connection) as queries:
+            txn = make_transaction(transaction_type='expense', category='supplies',
+                                   amount=Decimal('50.00'), date=date(2024, 3, 10))
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "core_dailybalance"')]
+        self.assertEqual(len(updates), 1)
+
+        self.assertEqual(self.balances(), {
+            date(2024, 3, 1): Decimal('100.00'),
+            date(2024, 3, 10): Decimal('50.00'),
+            date(2024, 3, 20): Decimal('150.00'),
+            date(2024, 3, 25): Decimal('120.00'),
+        })
+        self.assertEqual(rollups.balance_on(date(2024, 2, 28)), Decimal('0.00'))
+        self.assertEqual(rollups.balance_on(date(2024, 3, 15)), Decimal('50.00'))
+        self.assertEqual(rollups.balance_on(date(2030, 1, 1)), Decimal('120.00'))
+
+        txn.delete()
+        self.assertEqual(rollups.balance_on(date(2024, 3, 25)), Decimal('170.00'))
+        self.assertEqual(rollups.verify(), [])
+
+    def test_rebuild_and_verify(self):
+        make_transaction(date=date(2024, 1, 5))
+        make_transaction(date=date(2024, 3, 5))
+        DailyBalance.objects.filter(date=date(2024, 3, 5)).update(balance=Decimal('1.00'))
+        self.assertEqual(rollups.verify(), [
+            ('balance', date(2024, 3, 5), '', Decimal('1.00'), Decimal('200.00'))])
+
+        rollups.rebuild(date(2024, 3, 1), date(2024, 3, 31))
+        self.assertEqual(rollups.verify(), [])
+        self.assertEqual(rollups.balance_on(date(2024, 3, 5)), Decimal('200.00'))
+
+    def test_chart_endpoint_reads_snapshots_only(self):
+        make_transaction(date=date(2024, 1, 5))
+        make_transaction(date=date(2024, 3, 5))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('financial_balance') + '?start=2024-02-01')
+        self.assertFalse(any('core_financialtransaction' in query['sql'] for query in queries))
+        self.assertEqual(response.json(), {'points': [
+            ['2024-02-01', '100.00'],
+            ['2024-03-05', '200.00'],
+        ]})
+
+
+class FinancialLedgerPaginationTests(TestCase):
+
+    def setUp(self):
+        FinancialTransaction.objects.bulk_create([
+            FinancialTransaction(transaction_type='income', category='booking' if i % 2 else 'other',
+                                 amount=Decimal('10.00'), date=date(2024, 1, 1 + i % 28))
+            for i in range(120)
+        ])
+        rollups.rebuild()
+
+    def test_pages_follow_the_cursor_without_offset(self):
+        response = self.client.get(reverse('financial_list'))
+        first_page = response.context['transactions']
+        self.assertEqual(len(first_page), 50)
+        self.assertEqual(response.context['transaction_count'], 120)
+
+        seen = [txn.pk for txn in first_page]
+        next_page = response.context['next_page']
+        while next_page:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('financial_ledger') + '?' + next_page)
+            self.assertFalse(any('OFFSET' in query['sql'] for query in queries))
+            seen += [txn.pk for txn in response.context['transactions']]
+            next_page = response['X-Next-Page']
+
+        self.assertEqual(len(seen), 120)
+        self.assertEqual(len(set(seen)), 120)
+        ordered = FinancialTransaction.objects.order_by('-date', '-id').values_list('pk', flat=True)
+        self.assertEqual(seen, list(ordered))
+
+    def test_filters_apply_to_rows_and_count(self):
+        response = self.client.get(reverse('financial_list'), {
+            'category': 'booking', 'start': '2024-01-05', 'end': '2024-01-10'})
+        rows = response.context['transactions']
+        self.assertTrue(rows)
+        self.assertTrue(all(txn.category == 'booking' for txn in rows))
+        self.assertTrue(all(date(2024, 1, 5) <= txn.date <= date(2024, 1, 10) for txn in rows))
+        self.assertEqual(response.context['transaction_count'], len(rows))
+
+
+class AvailabilityTests(TestCase):
+
+    def setUp(self):
+        availability.create_booking(**booking_fields())
+
+    def test_overlapping_stay_in_same_room_is_rejected(self):
+        with self.assertRaises(availability.BookingConflict):
+            availability.create_booking(**booking_fields(check_in=date(2024, 5, 12), check_out=date(2024, 5, 14)))
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_back_to_back_and_other_rooms_are_allowed(self):
+        availability.create_booking(**booking_fields(check_in=date(2024, 5, 13), check_out=date(2024, 5, 15)))
+        availability.create_booking(**booking_fields(room_number='2'))
+        self.assertEqual(Booking.objects.count(), 3)
+
+    def test_cancelled_bookings_do_not_hold_the_room(self):
+        Booking.objects.update(payment_status='cancelled')
+        self.assertFalse(availability.has_conflict('1', date(2024, 5, 10), date(2024, 5, 13)))
+
+    def test_free_rooms(self):
+        self.assertEqual(availability.free_rooms(date(2024, 5, 12), date(2024, 5, 20)), ['2', '3', '4'])
+        self.assertEqual(availability.free_rooms(date(2024, 5, 13), date(2024, 5, 20)), ['1', '2', '3', '4'])
+
+    def test_booking_add_reports_conflict(self):
+        response = self.client.post(reverse('booking_add'), booking_fields(
+            check_in='2024-05-11', check_out='2024-05-12'), follow=True)
+        self.assertContains(response, 'Room 1 is already booked')
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_admin_rejects_overlapping_bookings(self):
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.login(username='admin', password='password')
+        fields = booking_fields(check_in='2024-05-12', check_out='2024-05-15', income_transaction='')
+
+        response = self.client.post(reverse('admin:core_booking_add'), fields)
+        self.assertContains(response, 'Room 1 is already booked')
+        self.assertEqual(Booking.objects.count(), 1)
+
+        # A booking does not conflict with itself when it is changed
+        booking = Booking.objects.get()
+        response = self.client.post(reverse('admin:core_booking_change', args=[booking.pk]), fields)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Booking.objects.get().check_out, date(2024, 5, 15))
+
+
+class AnalyticsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        # Four nights across the end of January at 1000 a night
+        availability.create_booking(**booking_fields(
+            room_number='1', check_in=date(2024, 1, 30), check_out=date(2024, 2, 3), payment_amount='4000.00'))
+        availability.create_booking(**booking_fields(
+            room_number='2', check_in=date(2024, 1, 1), check_out=date(2024, 1, 2), payment_amount='1500.00'))
+        availability.create_booking(**booking_fields(
+            room_number='3', check_in=date(2024, 1, 10), check_out=date(2024, 1, 20), payment_status='cancelled'))
+
+    def test_occupancy_adr_and_revpar(self):
+        report = analytics.report(date(2024, 1, 1), date(2024, 1, 31), today=date(2024, 6, 1))
+        rooms = {row['room']: row for row in report['rooms']}
+
+        self.assertEqual(rooms['1']['nights'], 2)
+        self.assertEqual(rooms['1']['revenue'], Decimal('2000.00'))
+        self.assertEqual(rooms['1']['adr'], Decimal('1000.00'))
+        self.assertEqual(rooms['1']['revpar'], Decimal('64.52'))
+        self.assertEqual(rooms['3']['nights'], 0)
+        self.assertEqual(report['total']['nights'], 3)
+        self.assertEqual(report['total']['available'], 31 * 4)
+        self.assertEqual(report['total']['adr'], Decimal('1166.67'))
+        self.assertEqual(report['daily'][0], (date(2024, 1, 1), 1))
+        self.assertEqual(report['daily'][29:], [(date(2024, 1, 30), 1), (date(2024, 1, 31), 1)])
+
+    def test_closed_months_are_cached_until_a_booking_changes(self):
+        def january_nights():
+            return analytics.report(date(2024, 1, 1), date(2024, 1, 31), today=date(2024, 6, 1))['total']['nights']
+
+        january_nights()
+        with self.assertNumQueries(0):
+            self.assertEqual(january_nights(), 3)
+
+        availability.create_booking(**booking_fields(
+            room_number='4', check_in=date(2024, 1, 5), check_out=date(2024, 1, 7)))
+        self.assertEqual(january_nights(), 5)
+
+
+class BookingCalendarTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        Booking.objects.create(**booking_fields(room_number='1', check_in=date(2024, 4, 28), check_out=date(2024, 5, 3)))
+        Booking.objects.create(**booking_fields(room_number='1', check_in=date(2024, 5, 10), check_out=date(2024, 5, 12),
+                                                payment_status='paid'))
+        Booking.objects.create(**booking_fields(room_number='2', check_in=date(2024, 5, 30), check_out=date(2024, 6, 2)))
+        Booking.objects.create(**booking_fields(room_number='3', check_in=date(2024, 5, 5), check_out=date(2024, 5, 8),
+                                                payment_status='cancelled'))
+
+    def test_grid_runs_cover_every_night_from_one_query(self):
+        with self.assertNumQueries(1):
+            grid = room_calendar.month_grid(date(2024, 5, 1))
+
+        self.assertEqual(len(grid['days']), 31)
+        runs = {row['room']: [(run['span'], run['booking'] and run['booking']['check_in']) for run in row['runs']]
+                for row in grid['rows']}
+        self.assertEqual(runs['1'], [(2, date(2024, 4, 28)), (7, None), (2, date(2024, 5, 10)), (20, None)])
+        self.assertEqual(runs['2'], [(29, None), (2, date(2024, 5, 30))])
+        # Cancelled stays leave the room free
+        self.assertEqual(runs['3'], [(31, None)])
+        for row in grid['rows']:
+            self.assertEqual(sum(run['span'] for run in row['runs']), 31)
+
+    def test_overlapping_stays_never_overflow_the_month(self):
+        # Written around the overlap check, as older data may be
+        Booking.objects.create(**booking_fields(room_number='1', check_in=date(2024, 5, 1), check_out=date(2024, 6, 7)))
+        runs = room_calendar.month_grid(date(2024, 5, 1))['rows'][0]['runs']
+        self.assertEqual([(run['span'], run['booking']['check_in']) for run in runs],
+                         [(2, date(2024, 4, 28)), (29, date(2024, 5, 1))])
+
+    def test_month_is_cached_until_a_booking_in_it_changes(self):
+        url = reverse('booking_calendar') + '?month=2024-05'
+        response = self.client.get(url)
+        self.assertContains(response, 'colspan="7"')
+        self.assertContains(response, 'Juan Dela Cruz')
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+        # A booking in another month leaves May cached
+        Booking.objects.create(**booking_fields(room_number='4', check_in=date(2024, 8, 1), check_out=date(2024, 8, 3)))
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+        # Moving a stay out of May clears May as well as its new month
+        booking = Booking.objects.get(check_in=date(2024, 5, 10))
+        booking.check_in, booking.check_out = date(2024, 7, 1), date(2024, 7, 3)
+        booking.save()
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertContains(response, 'colspan="20"', count=0)
+
+
+class BookingPaymentTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.booking = Booking.objects.create(**booking_fields(
+            check_in=date.today() + timedelta(days=3), check_out=date.today() + timedelta(days=5)))
+
+    def test_marking_paid_twice_records_the_income_once(self):
+        url = reverse('booking_mark_paid', args=[self.booking.pk])
+        self.assertContains(self.client.get(reverse('booking_list')), url)
+
+        self.client.post(url)
+        self.client.post(url)
+
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.payment_status, 'paid')
+        income = FinancialTransaction.objects.get()
+        self.assertEqual(self.booking.income_transaction, income)
+        self.assertEqual((income.category, income.amount, income.date), ('booking', Decimal('4500.00'), date.today()))
+        self.assertEqual(rollups.totals()['income'], Decimal('4500.00'))
+        self.assertEqual(rollups.verify(), [])
+        self.assertNotContains(self.client.get(reverse('booking_list')), url)
+
+    def test_marking_one_booking_paid_updates_the_rollups_in_place(self):
+        make_transaction(date=date.today() - timedelta(days=40))
+        with CaptureQueriesContext(connection) as queries:
+            payments.mark_paid(Booking.objects.all())
+        # No month recomputed, no rollup rows deleted
+        self.assertFalse(any(query['sql'].startswith('DELETE') for query in queries))
+        self.assertEqual(rollups.verify(), [])
+
+        bookings = [Booking.objects.create(**booking_fields(room_number=room)) for room in '234']
+        with mock.patch('core.payments.INCREMENTAL_ROLLUP_LIMIT', 2):
+            payments.mark_paid(Booking.objects.filter(pk__in=[booking.pk for booking in bookings]))
+        self.assertEqual(rollups.verify(), [])
+        self.assertEqual(rollups.totals(date.today(), date.today())['count'], 4)
+
+    def test_reconcile_finds_each_kind_of_mismatch(self):
+        payments.mark_paid(Booking.objects.all())
+        call_command('reconcile_bookings', stdout=StringIO())
+
+        Booking.objects.create(**booking_fields(room_number='2', payment_status='paid'))
+        make_transaction(description='Walk-in')
+        FinancialTransaction.objects.filter(booking=self.booking).update(amount=Decimal('4000.00'))
+
+        with self.assertNumQueries(8):
+            results = payments.reconcile()
+        counts = {kind: count for kind, (count, rows) in results.items()}
+        self.assertEqual(counts, {'paid_without_income': 1, 'income_not_paid': 0,
+                                  'amount_mismatch': 1, 'orphan_income': 1})
+        with self.assertRaises(CommandError):
+            call_command('reconcile_bookings', stdout=StringIO())
+
+    def test_admin_records_income_for_paid_bookings(self):
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.login(username='admin', password='password')
+        fields = booking_fields(room_number='2', payment_status='paid', income_transaction='')
+        self.client.post(reverse('admin:core_booking_add'), fields)
+        fields = booking_fields(check_in=self.booking.check_in, check_out=self.booking.check_out,
+                                payment_status='paid', income_transaction='')
+        self.client.post(reverse('admin:core_booking_change', args=[self.booking.pk]), fields)
+
+        self.assertEqual(FinancialTransaction.objects.filter(booking__isnull=False).count(), 2)
+        self.assertEqual({kind: count for kind, (count, rows) in payments.reconcile().items()},
+                         dict.fromkeys(['paid_without_income', 'income_not_paid', 'amount_mismatch', 'orphan_income'], 0))
+        self.assertEqual(rollups.verify(), [])
+
+    def test_archive_keeps_income_of_live_bookings(self):
+        payments.mark_paid(Booking.objects.all(), day=date(2023, 12, 30))
+        archive.archive(date(2024, 1, 1), today=date(2024, 6, 1))
+
+        self.assertEqual(ArchivedTransaction.objects.count(), 0)
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.income_transaction.date, date(2023, 12, 30))
+
+
+class BulkEditTests(TestCase):
+
+    def test_task_actions_run_one_statement(self):
+        tasks = [TodoTask.objects.create(title=title) for title in ('Sweep', 'Mop', 'Dust')]
+        ids = [task.pk for task in tasks[:2]]
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('todo_bulk'), {'action': 'priority', 'priority': 'high', 'ids': ids})
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('UPDATE "core_todotask"')]), 1)
+        self.assertEqual(list(TodoTask.objects.values_list('title', 'priority_rank')),
+                         [('Sweep', 0), ('Mop', 0), ('Dust', 2)])
+
+        self.client.post(reverse('todo_bulk'), {'action': 'toggle', 'ids': [tasks[0].pk, tasks[2].pk]})
+        self.client.post(reverse('todo_bulk'), {'action': 'complete', 'ids': ids})
+        self.assertEqual(dict(TodoTask.objects.values_list('title', 'is_completed')),
+                         {'Sweep': True, 'Mop': True, 'Dust': True})
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('todo_bulk'), {'action': 'delete', 'ids': [*ids, 'x']})
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('DELETE')]), 1)
+        self.assertEqual(list(TodoTask.objects.values_list('title', flat=True)), ['Dust'])
+        self.assertEqual(search.search('Sweep'), [])
+
+    def test_transaction_actions_keep_rollups_and_bookings_in_step(self):
+        transactions = [make_transaction(date=day) for day in (date(2024, 1, 5), date(2024, 2, 5), date(2024, 3, 5))]
+        booking = Booking.objects.create(**booking_fields(payment_status='paid', income_transaction=transactions[0]))
+
+        self.client.post(reverse('financial_bulk'), {
+            'action': 'category', 'category': 'other', 'ids': [transactions[1].pk, transactions[2].pk]})
+        self.assertEqual(rollups.totals(category='other')['count'], 2)
+        self.assertEqual(rollups.verify(), [])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('financial_bulk'), {
+                'action': 'delete', 'ids': [transactions[0].pk, transactions[1].pk]})
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('DELETE FROM "core_financialtransaction"')]), 1)
+        self.assertEqual(FinancialTransaction.objects.count(), 1)
+        self.assertEqual(rollups.balance_on(date(2024, 3, 31)), Decimal('100.00'))
+        self.assertEqual(rollups.verify(), [])
+        booking.refresh_from_db()
+        self.assertIsNone(booking.income_transaction)
+
+    def test_multi_row_form_saves_all_rows_or_none(self):
+        url = reverse('financial_add_many')
+        self.assertContains(self.client.get(url), 'name="amount"', count=8)
+
+        rows = {
+            'transaction_type': ['income', 'expense', 'income'],
+            'category': ['booking', 'utilities', 'booking'],
+            'amount': ['1500', 'abc', ''],
+            'date': ['2024-04-01', '2024-04-02', '2024-04-03'],
+            'description': ['Walk-in', 'Water', ''],
+        }
+        response = self.client.post(url, rows)
+        self.assertContains(response, 'Row 2: amount:')
+        self.assertContains(response, 'value="Walk-in"')
+        self.assertFalse(FinancialTransaction.objects.exists())
+
+        rows['amount'][1] = '300'
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(url, rows)
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('INSERT INTO "core_financialtransaction"')]), 1)
+        self.assertEqual(rollups.totals()['net'], Decimal('1200.00'))
+        self.assertEqual(rollups.verify(), [])
+
+
+class InventoryMovementTests(TestCase):
+
+    def setUp(self):
+        self.towels = InventoryItem.objects.create(
+            name='Towels', category='housekeeping', quantity=10, minimum_stock=4, unit='pcs')
+        self.rice = InventoryItem.objects.create(
+            name='Rice', category='kitchen', quantity=5, minimum_stock=2, unit='kg')
+
+    def test_movement_updates_stock_and_ledger(self):
+        inventory.apply_movement(self.towels.pk, -3, 'usage')
+        self.towels.refresh_from_db()
+        self.assertEqual(self.towels.quantity, 7)
+        self.assertEqual(list(self.towels.movements.values_list('delta', 'reason')), [(-3, 'usage')])
+
+    def test_batch_is_all_or_nothing(self):
+        with self.assertRaises(inventory.InsufficientStock):
+            inventory.apply_movements({self.towels.pk: -2, self.rice.pk: -6}, 'usage')
+        self.assertEqual(InventoryItem.objects.get(pk=self.towels.pk).quantity, 10)
+        self.assertFalse(InventoryMovement.objects.exists())
+
+    def test_batch_uses_constant_number_of_statements(self):
+        # SAVEPOINT, UPDATE, INSERT, forecast SELECT and UPDATE, RELEASE -
+        # regardless of the number of items
+        with self.assertNumQueries(6):
+            inventory.apply_movements({self.towels.pk: 5, self.rice.pk: 1}, 'delivery')
+        self.assertEqual(
+            dict(InventoryItem.objects.values_list('name', 'quantity')), {'Towels': 15, 'Rice': 6})
+
+    def test_usage_builds_burn_rate_and_forecast(self):
+        # The first usage only records when it happened
+        inventory.apply_movement(self.towels.pk, -2, 'usage')
+        towels = InventoryItem.objects.get(pk=self.towels.pk)
+        self.assertEqual(towels.burn_rate, 0)
+        self.assertIsNone(towels.projected_stockout)
+
+        InventoryItem.objects.filter(pk=self.towels.pk).update(
+            last_consumed_at=timezone.now() - timedelta(days=2))
+        inventory.apply_movement(self.towels.pk, -2, 'usage')
+        towels = InventoryItem.objects.get(pk=self.towels.pk)
+        # Two towels in two days
+        self.assertAlmostEqual(towels.burn_rate, 1, places=3)
+        days_left = (towels.projected_stockout - timezone.localdate()).days
+        self.assertAlmostEqual(days_left, 6 / towels.burn_rate, delta=1)
+
+        # Deliveries push the forecast out without touching the rate
+        inventory.apply_movement(self.towels.pk, 6, 'delivery')
+        later = InventoryItem.objects.get(pk=self.towels.pk)
+        self.assertEqual(later.burn_rate, towels.burn_rate)
+        self.assertGreater(later.projected_stockout, towels.projected_stockout)
+
+    def test_dashboard_lists_most_urgent_first(self):
+        cache.clear()
+        today = date.today()
+        for item, days in ((self.towels, 5), (self.rice, 2)):
+            item.projected_stockout = today + timedelta(days=days)
+            item.save()
+        # Already below its minimum, so it comes first
+        InventoryItem.objects.create(name='Paint', category='maintenance', quantity=1, minimum_stock=3, unit='cans')
+        InventoryItem.objects.create(name='Soap', category='housekeeping', quantity=50, minimum_stock=3, unit='bars',
+                                     projected_stockout=today + timedelta(days=30))
+
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual([item.name for item in response.context['restock_alerts']], ['Paint', 'Rice', 'Towels'])
+
+    def test_restock_alerts_read_one_index_in_order(self):
+        plan = inventory.restock_alerts(date.today()).explain()
+        self.assertIn('USING INDEX item_restock_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_restock_by_follows_the_stock_level(self):
+        inventory.apply_movement(self.rice.pk, -3, 'usage')
+        self.assertEqual(InventoryItem.objects.get(pk=self.rice.pk).restock_by, timezone.localdate())
+        inventory.apply_movement(self.rice.pk, 10, 'delivery')
+        self.assertIsNone(InventoryItem.objects.get(pk=self.rice.pk).restock_by)
+
+    def test_idle_items_are_not_forecast_to_run_out(self):
+        long_ago = timezone.now() - timedelta(days=60)
+        stale = timezone.localdate(long_ago) + timedelta(days=30)
+        InventoryItem.objects.filter(pk=self.towels.pk).update(
+            quantity=300, burn_rate=10, last_consumed_at=long_ago, projected_stockout=stale, restock_by=stale)
+
+        self.assertEqual(inventory.refresh_forecasts(), 1)
+        self.assertIsNone(InventoryItem.objects.get(pk=self.towels.pk).projected_stockout)
+        self.assertEqual(list(inventory.restock_alerts(date.today())), [])
+
+        # Ten days idle halves the rate about 2.7 times, so 300 units last longer
+        InventoryItem.objects.filter(pk=self.towels.pk).update(last_consumed_at=timezone.now() - timedelta(days=10))
+        inventory.refresh_forecasts()
+        days_left = (InventoryItem.objects.get(pk=self.towels.pk).projected_stockout - timezone.localdate()).days
+        self.assertAlmostEqual(days_left, 30 * 2 ** (10 / 7), delta=1)
+
+        with mock.patch('core.tasks.mail_admins') as mail_admins:
+            jobs.TASKS['restock_alert'][0]()
+        mail_admins.assert_not_called()
+
+    def test_stocktake_records_differences(self):
+        inventory.stocktake({self.towels.pk: 8, self.rice.pk: 5})
+        self.assertEqual(InventoryItem.objects.get(pk=self.towels.pk).quantity, 8)
+        self.assertEqual(list(InventoryMovement.objects.values_list('item__name', 'delta')), [('Towels', -2)])
+
+    def test_update_view_rejects_removing_too_much(self):
+        response = self.client.post(reverse('inventory_update', args=[self.rice.pk]),
+                                    {'action': 'subtract', 'amount': '9'}, follow=True)
+        self.assertContains(response, 'Not enough stock')
+        self.assertEqual(InventoryItem.objects.get(pk=self.rice.pk).quantity, 5)
+
+    def test_batch_view(self):
+        self.client.post(reverse('inventory_batch'), {
+            'reason': 'usage', f'quantity_{self.towels.pk}': '4', f'quantity_{self.rice.pk}': ''})
+        self.assertEqual(InventoryItem.objects.get(pk=self.towels.pk).quantity, 6)
+        self.assertEqual(InventoryItem.objects.get(pk=self.rice.pk).quantity, 5)
+
+
+class TodoTaskTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_priority_order(self):
+        for priority in ('medium', 'low', 'high'):
+            TodoTask.objects.create(title=priority, priority=priority, due_date=date.today())
+        response = self.client.get(reverse('todo_list'))
+        self.assertEqual([task.title for task in response.context['incomplete_tasks']], ['high', 'medium', 'low'])
+
+    def test_toggle(self):
+        task = TodoTask.objects.create(title='Clean Room 2', priority='high')
+        response = self.client.post(reverse('todo_toggle', args=[task.pk]), follow=True)
+        self.assertContains(response, 'Task completed!')
+        self.assertTrue(TodoTask.objects.get(pk=task.pk).is_completed)
+
+    def test_recurring_tasks_are_generated_once_for_the_window(self):
+        monday = date(2024, 6, 3)
+        daily = RecurringTask.objects.create(title='Sweep lobby', priority='high', start_date=monday)
+        weekly = RecurringTask.objects.create(title='Wash curtains', frequency='weekly', start_date=date(2024, 5, 29))
+
+        self.assertEqual(recurring.materialize(monday), 8)
+        self.assertEqual(daily.tasks.count(), recurring.WINDOW_DAYS)
+        self.assertEqual(list(weekly.tasks.values_list('due_date', flat=True)), [date(2024, 6, 5)])
+        self.assertEqual(daily.tasks.first().priority_rank, 0)
+
+        # Later the same day the cache flag skips the work; the next day only
+        # the new last day of the window is added
+        with self.assertNumQueries(0):
+            recurring.materialize(monday)
+        self.assertEqual(recurring.materialize(monday + timedelta(days=1)), 1)
+        self.assertEqual(daily.tasks.count(), recurring.WINDOW_DAYS + 1)
+
+    def test_add_repeating_task(self):
+        self.client.post(reverse('todo_add'), {'title': 'Water plants', 'priority': 'low', 'repeat': 'daily'})
+        response = self.client.get(reverse('todo_list'))
+        titles = [task.title for task in response.context['incomplete_tasks']]
+        self.assertEqual(titles, ['Water plants'] * recurring.WINDOW_DAYS)
+
+
+class AdminPerformanceTests(TestCase):
+
+    def setUp(self):
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.login(username='admin', password='password')
+
+    def test_date_hierarchy_links_match_django(self):
+        for day in (date(2023, 12, 31), date(2024, 1, 5), date(2024, 1, 5), date(2024, 3, 2)):
+            make_transaction(date=day)
+        queryset = FinancialTransactionAdmin(FinancialTransaction, admin.site).get_queryset(None)
+        for kind in ('year', 'month', 'day'):
+            self.assertEqual(list(queryset.dates('date', kind)),
+                             list(FinancialTransaction.objects.dates('date', kind)))
+
+        response = self.client.get(reverse('admin:core_financialtransaction_changelist') + '?date__year=2024')
+        self.assertContains(response, 'date__month=3')
+        self.assertEqual(response.context['cl'].result_count, 3)
+
+    def test_large_unfiltered_lists_use_an_estimated_count(self):
+        for _ in range(3):
+            make_transaction()
+        with mock.patch('core.pagination.ESTIMATE_THRESHOLD', 2):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('admin:core_financialtransaction_changelist'))
+        self.assertEqual(response.context['cl'].result_count, 3)
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries))
+
+    def test_bulk_actions_run_one_update(self):
+        bookings = [Booking.objects.create(**booking_fields(room_number=room)) for room in '12']
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('admin:core_booking_changelist'), {
+                'action': 'mark_paid', '_selected_action': [booking.pk for booking in bookings]})
+        self.assertEqual(Booking.objects.filter(payment_status='paid').count(), 2)
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('UPDATE "core_booking"')]), 1)
+
+        items = [InventoryItem.objects.create(name=name, category='kitchen', quantity=5, unit='pcs')
+                 for name in ('Rice', 'Oil')]
+        self.client.post(reverse('admin:core_inventoryitem_changelist'), {
+            'action': 'apply_stock_delta', 'delta': '-2', '_selected_action': [item.pk for item in items]})
+        self.assertEqual(sorted(InventoryItem.objects.values_list('quantity', flat=True)), [3, 3])
+        self.assertEqual(InventoryMovement.objects.filter(reason='adjustment').count(), 2)
+
+        # Not enough stock changes nothing
+        response = self.client.post(reverse('admin:core_inventoryitem_changelist'), {
+            'action': 'apply_stock_delta', 'delta': '-4', '_selected_action': [item.pk for item in items]}, follow=True)
+        self.assertContains(response, 'Not enough stock')
+        self.assertEqual(sorted(InventoryItem.objects.values_list('quantity', flat=True)), [3, 3])
+
+    def test_stock_level_is_read_only_in_the_change_form(self):
+        item = InventoryItem.objects.create(name='Rice', category='kitchen', quantity=5, unit='kg')
+        response = self.client.post(reverse('admin:core_inventoryitem_change', args=[item.pk]), {
+            'name': 'Rice', 'category': 'kitchen', 'quantity': 50, 'minimum_stock': 0, 'unit': 'kg'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(InventoryItem.objects.get().quantity, 5)
+        self.assertFalse(InventoryMovement.objects.exists())
+
+    def test_needs_restock_is_computed_in_sql(self):
+        InventoryItem.objects.create(name='Soap', category='housekeeping', quantity=1, minimum_stock=2, unit='bars')
+        InventoryItem.objects.create(name='Rice', category='kitchen', quantity=9, minimum_stock=2, unit='kg')
+        response = self.client.get(reverse('admin:core_inventoryitem_changelist') + '?o=7')
+        self.assertEqual([item.name for item in response.context['cl'].result_list], ['Rice', 'Soap'])
+
+
+class DashboardCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.item = InventoryItem.objects.create(
+            name='Soap', category='housekeeping', quantity=1, minimum_stock=5, unit='bars')
+
+    def test_repeat_loads_do_no_database_work(self):
+        self.client.get(reverse('dashboard'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual([item.name for item in response.context['restock_alerts']], ['Soap'])
+
+    def test_writes_invalidate_the_cached_summary(self):
+        self.client.get(reverse('dashboard'))
+
+        TodoTask.objects.create(title='Clean Room 3', priority='high', due_date=date.today())
+        make_transaction(date=date.today(), amount=Decimal('700.00'))
+        inventory.apply_movement(self.item.pk, 10, 'delivery')
+
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual([task.title for task in response.context['tasks']], ['Clean Room 3'])
+        self.assertEqual(response.context['monthly_income'], Decimal('700.00'))
+        self.assertEqual(response.context['restock_alerts'], [])
+
+
+class ResponseMiddlewareTests(TestCase):
+
+    def test_pages_are_gzipped_when_the_client_accepts_it(self):
+        response = self.client.get(reverse('inventory_list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn(b'Inventory', gzip.decompress(response.content))
+
+    def test_unchanged_responses_are_not_sent_again(self):
+        make_transaction(date=date(2024, 5, 1), amount=Decimal('700.00'))
+        url = reverse('financial_balance')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+
+class StaticAssetTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = Path(directory.name)
+        storages = {**settings.STORAGES, 'staticfiles': {
+            'BACKEND': 'core.storage.PrecompressedManifestStaticFilesStorage'}}
+        overrides = override_settings(STATIC_ROOT=str(self.root), STORAGES=storages)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        call_command('collectstatic', interactive=False, verbosity=0, ignore_patterns=['admin', 'rest_framework'])
+
+    def test_collectstatic_writes_hashed_and_precompressed_files(self):
+        hashed = json.loads((self.root / 'staticfiles.json').read_text())['paths']['core/css/site.css']
+        self.assertRegex(hashed, r'^core/css/site\.[0-9a-f]{12}\.css$')
+        original = (self.root / hashed).read_bytes()
+        self.assertEqual(gzip.decompress((self.root / (hashed + '.gz')).read_bytes()), original)
+
+        # Pages link the hashed name, and nothing is styled inline
+        response = self.client.get(reverse('inventory_list'))
+        self.assertContains(response, f'/static/{hashed}')
+        self.assertNotContains(response, 'style=')
+
+    def test_hashed_files_are_served_compressed_and_cached_for_a_year(self):
+        hashed = json.loads((self.root / 'staticfiles.json').read_text())['paths']['core/js/financial.js']
+        response = self.client.get(f'/static/{hashed}', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertIn(b'updateCategories', gzip.decompress(b''.join(response.streaming_content)))
+
+        response = self.client.get('/static/core/js/financial.js')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(response['Cache-Control'], 'public, max-age=3600')
+        self.assertEqual(self.client.get('/static/core/js/missing.js').status_code, 404)
+
+
+class BenchmarkCommandTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        call_command('seed_data', years=1, stdout=StringIO())
+
+    def test_seed_data_is_consistent(self):
+        self.assertTrue(Booking.objects.exists())
+        self.assertTrue(TodoTask.objects.exists())
+        self.assertEqual(rollups.verify(), [])
+        for room in availability.ROOMS:
+            bookings = list(Booking.objects.filter(room_number=room).order_by('check_in'))
+            for earlier, later in zip(bookings, bookings[1:]):
+                self.assertLessEqual(earlier.check_out, later.check_in)
+
+    def test_views_stay_within_query_budgets(self):
+        out = StringIO()
+        call_command('bench_views', iterations=2, stdout=out)
+        self.assertIn('financial_list', out.getvalue())
+
+    def test_budget_overrun_fails(self):
+        with self.assertRaisesMessage(CommandError, 'inventory_list'):
+            call_command('bench_views', iterations=1, budget=['inventory_list=0'], stdout=StringIO())
+
+
+class BenchStartupTests(TransactionTestCase):
+
+    def test_both_profiles_start_and_serve_pages(self):
+        out = StringIO()
+        call_command('bench_startup', requests=2, pages='dashboard,financial_list', stdout=out)
+        self.assertIn('development', out.getvalue())
+        self.assertIn('production', out.getvalue())
+
+
+class ProfilingMiddlewareTests(TestCase):
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('inventory_list'))
+        self.assertRegex(response['Server-Timing'],
+                         r'^db;dur=[\d.]+;desc="\d+ queries", render;dur=[\d.]+, total;dur=[\d.]+$')
+
+    @override_settings(PROFILING_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_left_alone(self):
+        response = self.client.get(reverse('inventory_list'))
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(PROFILING_SLOW_REQUEST_MS=0, PROFILING_SLOW_QUERY_MS=0)
+    def test_slow_requests_and_queries_are_logged(self):
+        with self.assertLogs('core.profiling', 'WARNING') as logs:
+            self.client.get(reverse('inventory_list'))
+        self.assertIn('slow request GET /inventory/ 200', logs.output[0])
+        self.assertTrue(any('core/views.py' in line and 'core_inventoryitem' in line
+                            for line in logs.output[1:]))
+
+
+class ApiTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('staff'))
+        for day in range(1, 8):
+            make_transaction(date=date(2024, 3, day), amount=Decimal(day))
+            make_transaction(date=date(2024, 3, day), amount=Decimal(day), transaction_type='expense',
+                             category='supplies')
+
+    def test_cursor_pages_cover_every_row_once(self):
+        url = reverse('financialtransaction-list') + '?page_size=3'
+        seen = []
+        while url:
+            # The session and user lookups, then one query for the page
+            with self.assertNumQueries(3):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [row['id'] for row in response.json()['results']]
+            url = response.json()['next']
+        expected = list(FinancialTransaction.objects.order_by('-date', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_filters_and_sparse_fields(self):
+        url = reverse('financialtransaction-list')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'category': 'supplies', 'start': '2024-03-05', 'fields': 'id,amount'})
+        rows = response.json()['results']
+        self.assertEqual([row['amount'] for row in rows], ['7.00', '6.00', '5.00'])
+        self.assertEqual(set(rows[0]), {'id', 'amount'})
+        self.assertNotIn('description', queries[-1]['sql'])
+
+    def test_bad_parameters_are_rejected(self):
+        url = reverse('financialtransaction-list')
+        self.assertEqual(self.client.get(url, {'fields': 'id,password'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'start': 'March'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'category': 'snacks'}).status_code, 400)
+
+    def test_api_is_read_only(self):
+        response = self.client.post(reverse('financialtransaction-list'), {}, content_type='application/json')
+        self.assertEqual(response.status_code, 405)
+
+    def test_anonymous_requests_are_refused(self):
+        self.client.logout()
+        for url in (reverse('booking-list'), reverse('financialtransaction-list'), reverse('api_search')):
+            self.assertEqual(self.client.get(url, {'q': 'juan'}).status_code, 403)
+
+
+class SearchTests(TestCase):
+
+    def setUp(self):
+        self.booking = Booking.objects.create(**booking_fields(guest_name='Maria Villanueva'))
+        make_transaction(description='Aircon repair Room 2', transaction_type='expense', category='maintenance')
+        InventoryItem.objects.create(name='Aircon filters', category='maintenance', quantity=3, unit='pcs')
+
+    def test_index_triggers_exist_after_migrate(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+            names = sorted(name for name, in cursor.fetchall() if '_search_' in name)
+        self.assertEqual(len(names), 12)
+        self.assertEqual(names, search.trigger_names())
+
+    def test_dropped_triggers_are_restored(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER core_booking_search_insert')
+        Booking.objects.create(**booking_fields(room_number='3', guest_name='Teresa Magbanua'))
+
+        self.assertEqual(search.ensure_triggers(), ['core_booking_search_insert'])
+        self.assertEqual(len(search.search('magbanua')), 1)
+        Booking.objects.create(**booking_fields(room_number='4', guest_name='Gabriela Silang'))
+        self.assertEqual(len(search.search('silang')), 1)
+        self.assertEqual(search.ensure_triggers(), [])
+
+    def test_prefix_matching_and_ranking(self):
+        results = search.search('villa')
+        self.assertEqual([(result['kind'], result['id']) for result in results], [('booking', self.booking.pk)])
+
+        # The item has "aircon" in its title, the transaction too but in a longer one
+        self.assertEqual([result['kind'] for result in search.search('airc')], ['inventory', 'transaction'])
+        self.assertEqual(search.search('airc', kinds=['transaction'])[0]['title'], 'Aircon repair Room 2')
+
+    def test_common_word_in_one_table_does_not_hide_another(self):
+        FinancialTransaction.objects.bulk_create([
+            FinancialTransaction(transaction_type='income', category='booking', amount=Decimal('100.00'),
+                                 description=f'Room 1 - Maria Villanueva {number}', date=date(2024, 3, 15))
+            for number in range(12)
+        ])
+        with mock.patch('core.search.RANKED_CANDIDATES', 10):
+            results = search.search('villanueva')
+        self.assertIn(('booking', self.booking.pk), [(result['kind'], result['id']) for result in results])
+        self.assertEqual(len(results), 11)
+
+    @override_settings(DEBUG=True)
+    def test_queries_run_under_the_debug_cursor(self):
+        # The debug cursor formats sql % params, so a bare % would break it
+        self.assertEqual(list(search.filter_queryset(Booking.objects.all(), 'booking', 'vill')), [self.booking])
+        self.assertEqual(len(search.search('airc', kinds=['transaction', 'inventory'])), 2)
+        self.client.force_login(User.objects.create_user('staff'))
+        self.assertEqual(self.client.get(reverse('api_search'), {'q': 'villa', 'kind': 'booking'}).status_code, 200)
+
+    def test_index_follows_bulk_writes(self):
+        Booking.objects.filter(pk=self.booking.pk).update(guest_name='Maria Santos')
+        self.assertEqual(search.search('villanueva'), [])
+        self.assertEqual(len(search.search('santos')), 1)
+        FinancialTransaction.objects.all().delete()
+        self.assertEqual(search.search('repair'), [])
+
+    def test_query_syntax_is_taken_literally(self):
+        self.assertEqual(search.search('"aircon" OR NEAR('), search.search('aircon or near'))
+        self.assertEqual(search.search('***'), [])
+
+    def test_search_page_and_admin(self):
+        response = self.client.get(reverse('search'), {'q': 'maria'})
+        self.assertContains(response, 'Maria Villanueva')
+
+        admin_queryset = Booking.objects.all()
+        self.assertEqual(list(search.filter_queryset(admin_queryset, 'booking', 'vill')), [self.booking])
+
+    def test_rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {search.TABLE}')
+        call_command('rebuild_search', stdout=StringIO())
+        self.assertEqual(len(search.search('aircon')), 2)
+
+
+class ExportTests(TestCase):
+
+    def setUp(self):
+        make_transaction(date=date(2024, 1, 5), description='January, room 1')
+        make_transaction(date=date(2024, 2, 5), transaction_type='expense', category='utilities')
+        make_transaction(date=date(2024, 3, 5))
+
+    def test_csv_export_streams_filtered_rows(self):
+        response = self.client.get(reverse('export_data', args=['transactions']),
+                                   {'start': '2024-01-01', 'end': '2024-02-29', 'category': 'booking'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+
+        rows = list(csv.DictReader(StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([row['description'] for row in rows], ['January, room 1'])
+        self.assertEqual(rows[0]['amount'], '100.00')
+
+    def test_ndjson_export(self):
+        response = self.client.get(reverse('export_data', args=['transactions']), {'format': 'ndjson'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['date'] for line in lines], ['2024-01-05', '2024-02-05', '2024-03-05'])
+
+    def test_unknown_dataset_is_404(self):
+        self.assertEqual(self.client.get(reverse('export_data', args=['users'])).status_code, 404)
+
+    def test_export_command(self):
+        out = StringIO()
+        call_command('export_data', 'transactions', category='utilities', stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 2)
+
+
+class ArchiveTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        make_transaction(date=date(2023, 11, 5), description='Old stay')
+        make_transaction(date=date(2023, 12, 20), transaction_type='expense', category='utilities',
+                         amount=Decimal('40.00'))
+        make_transaction(date=date(2024, 1, 5), description='New stay')
+        Booking.objects.create(**booking_fields(check_in=date(2023, 12, 29), check_out=date(2024, 1, 1),
+                                                payment_status='paid', guest_name='Old Guest'))
+        Booking.objects.create(**booking_fields(room_number='2', check_in=date(2023, 12, 10),
+                                                check_out=date(2023, 12, 12), guest_name='Unpaid Guest'))
+        Booking.objects.create(**booking_fields(check_in=date(2024, 1, 10), check_out=date(2024, 1, 12),
+                                                payment_status='paid'))
+
+    def test_archive_moves_closed_rows_and_keeps_totals(self):
+        before = rollups.totals()
+        moved = archive.archive(date(2024, 1, 1), today=date(2024, 6, 1))
+
+        self.assertEqual(moved, {'transactions': 2, 'bookings': 1})
+        self.assertEqual(FinancialTransaction.objects.count(), 1)
+        self.assertEqual(ArchivedTransaction.objects.count(), 2)
+        # Pending bookings stay live
+        self.assertEqual(list(ArchivedBooking.objects.values_list('guest_name', flat=True)), ['Old Guest'])
+        self.assertEqual(rollups.totals(), before)
+        self.assertEqual(rollups.balance_on(date(2023, 12, 31)), Decimal('60.00'))
+        self.assertEqual(rollups.verify(), [])
+
+        rollups.rebuild()
+        self.assertEqual(rollups.totals(), before)
+        self.assertEqual(rollups.verify(), [])
+
+    def test_reports_and_calendar_read_the_archive(self):
+        def reports():
+            cache.clear()
+            return (analytics.report(date(2023, 12, 1), date(2023, 12, 31), today=date(2024, 6, 1))['total'],
+                    room_calendar.month_grid(date(2023, 12, 1))['rows'])
+
+        live = reports()
+        archive.archive(date(2024, 1, 1), today=date(2024, 6, 1))
+        self.assertEqual(reports(), live)
+
+    def test_history_views_include_archived_rows(self):
+        archive.archive(date(2024, 1, 1), today=date(2024, 6, 1))
+
+        response = self.client.get(reverse('booking_list'))
+        self.assertNotContains(response, 'Old Guest')
+        response = self.client.get(reverse('booking_list'), {'history': '1'})
+        self.assertContains(response, 'Old Guest')
+
+        response = self.client.get(reverse('financial_list'), {'history': '1'})
+        self.assertEqual([row.description for row in response.context['transactions']],
+                         ['New stay', '', 'Old stay'])
+        self.assertContains(response, '<span class="muted">Archived</span>', count=2)
+
+        response = self.client.get(reverse('export_data', args=['transactions']), {'history': '1'})
+        rows = list(csv.DictReader(StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([row['description'] for row in rows], ['Old stay', '', 'New stay'])
+
+        out = StringIO()
+        call_command('export_data', 'transactions', history=True, stdout=out)
+        self.assertEqual([row['description'] for row in csv.DictReader(StringIO(out.getvalue()))],
+                         ['Old stay', '', 'New stay'])
+
+    def test_command_refuses_open_periods(self):
+        with self.assertRaises(CommandError):
+            call_command('archive_history', before=date.today().replace(day=1), stdout=StringIO())
+
+        with self.assertRaisesMessage(CommandError, 'first day of a month'):
+            call_command('archive_history', before=date(2023, 12, 15), dry_run=True, stdout=StringIO())
+
+        # Income paid in advance for a booking that stays live is not counted
+        Booking.objects.filter(check_in=date(2024, 1, 10)).update(payment_status='pending')
+        payments.mark_paid(Booking.objects.filter(check_in=date(2024, 1, 10)), day=date(2023, 12, 30))
+        out = StringIO()
+        call_command('archive_history', before=date(2024, 1, 1), dry_run=True, stdout=out)
+        self.assertIn('2 transaction(s) and 1 booking(s)', out.getvalue())
+        self.assertEqual(ArchivedTransaction.objects.count(), 0)
+        self.assertEqual(archive.archive(date(2024, 1, 1)), {'transactions': 2, 'bookings': 1})
+
+
+class ImportTests(TestCase):
+
+    def test_transactions_import_reports_rejected_lines(self):
+        text = StringIO(
+            'date,transaction_type,category,amount,description\n'
+            '2024-01-05,income,booking,1500.00,Room 1\n'
+            '2024-01-06,income,parking,200.00,Unknown category\n'
+            'not-a-date,expense,utilities,900.00,Water\n'
+            '2024-02-01,expense,utilities,900.00,\n'
+        )
+        report = imports.import_csv('transactions', text, batch_size=2)
+
+        self.assertEqual(report.inserted, 2)
+        self.assertEqual([line for line, errors in report.rejected], [3, 4])
+        self.assertIn('category', report.rejected[0][1][0])
+        self.assertEqual(rollups.verify(), [])
+        self.assertEqual(rollups.totals()['count'], 2)
+
+    def test_failed_import_keeps_committed_batches_in_the_rollups(self):
+        bulk_create = FinancialTransaction.objects.bulk_create
+
+        def fail_third_batch(transactions):
+            if FinancialTransaction.objects.count() >= 4:
+                raise RuntimeError('disk full')
+            return bulk_create(transactions)
+
+        text = StringIO('date,transaction_type,category,amount,description\n'
+                        + ''.join(f'2024-01-0{day},income,booking,1000.00,Room 1\n' for day in range(1, 6)))
+        with mock.patch.object(FinancialTransaction.objects, 'bulk_create', side_effect=fail_third_batch):
+            with self.assertRaisesMessage(RuntimeError, 'disk full'):
+                imports.import_csv('transactions', text, batch_size=2)
+
+        self.assertEqual(FinancialTransaction.objects.count(), 4)
+        self.assertEqual(rollups.verify(), [])
+        self.assertEqual(rollups.totals()['count'], 4)
+
+    def test_bookings_import_rejects_overlaps(self):
+        availability.create_booking(**booking_fields())
+        header = 'guest_name,contact_number,room_number,number_of_guests,check_in,check_out,payment_amount,payment_status\n'
+        text = StringIO(
+            header
+            + 'Ana,0917,1,2,2024-05-12,2024-05-14,3000,paid\n'        # clashes with existing booking
+            + 'Ben,0917,2,2,2024-05-12,2024-05-14,3000,paid\n'
+            + 'Cara,0917,2,2,2024-05-13,2024-05-15,3000,\n'           # clashes with Ben
+            + 'Dan,0917,2,2,2024-05-14,2024-05-16,3000,pending\n'
+            + 'Eve,0917,5,2,2024-05-14,2024-05-16,3000,paid\n'        # no room 5
+        )
+        report = imports.import_csv('bookings', text)
+
+        self.assertEqual(report.inserted, 2)
+        self.assertEqual(sorted(line for line, errors in report.rejected), [2, 4, 6])
+        self.assertEqual(set(Booking.objects.values_list('guest_name', flat=True)), {'Juan Dela Cruz', 'Ben', 'Dan'})
+
+    def test_paid_bookings_import_with_their_income(self):
+        text = StringIO(
+            'guest_name,contact_number,room_number,number_of_guests,check_in,check_out,payment_amount,payment_status\n'
+            'Ana,0917,1,2,2024-05-12,2024-05-14,3000,paid\n'
+            'Ben,0917,2,2,2024-05-12,2024-05-14,2500,pending\n'
+        )
+        self.assertEqual(imports.import_csv('bookings', text).inserted, 2)
+
+        income = Booking.objects.get(guest_name='Ana').income_transaction
+        self.assertEqual((income.amount, income.date), (Decimal('3000.00'), date.today()))
+        self.assertTrue(all(count == 0 for count, rows in payments.reconcile().values()))
+        self.assertEqual(rollups.verify(), [])
+
+    def test_export_can_be_imported_again(self):
+        InventoryItem.objects.create(name='Towels', category='housekeeping', quantity=10, unit='pcs')
+        exported = StringIO()
+        call_command('export_data', 'inventory', stdout=exported)
+        InventoryItem.objects.all().delete()
+
+        report = imports.import_csv('inventory', StringIO(exported.getvalue()))
+        self.assertEqual(report.inserted, 1)
+        self.assertEqual(InventoryItem.objects.get().name, 'Towels')
+
+    def test_upload_view(self):
+        upload = SimpleUploadedFile('items.csv', b'name,category,quantity,unit\nRice,kitchen,5,kg\nSoap,bathroom,1,bar\n')
+        response = self.client.post(reverse('import_data'), {'dataset': 'inventory', 'file': upload})
+        self.assertEqual(response.context['report'].inserted, 1)
+        self.assertContains(response, 'bathroom')
+
+
+class SQLiteBackendTests(TransactionTestCase):
+    # Needs real transactions, not the TestCase savepoints
+
+    def test_pragmas_and_immediate_transactions(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                TodoTask.objects.create(title='Sweep the lobby')
+        self.assertEqual(queries[0]['sql'], 'BEGIN IMMEDIATE')
+
+
+FLAKY_FAILURES = []
+
+
+@jobs.task(name='test_flaky', max_attempts=2)
+def flaky_task(fail_times):
+    # Fails the first `fail_times` calls
+    FLAKY_FAILURES.append(fail_times)
+    if len(FLAKY_FAILURES) <= fail_times:
+        raise RuntimeError('not yet')
+
+
+class JobQueueTests(TestCase):
+
+    def setUp(self):
+        FLAKY_FAILURES.clear()
+
+    def run_due(self):
+        with self.assertLogs('core.jobs', 'INFO'):
+            return [jobs.run(job) for job in jobs.claim('test', 10)]
+
+    def test_dedupe_key_returns_the_active_job(self):
+        first = jobs.enqueue('test_flaky', dedupe_key='once', fail_times=0)
+        self.assertEqual(jobs.enqueue('test_flaky', dedupe_key='once', fail_times=0), first)
+        self.assertEqual(Job.objects.count(), 1)
+
+        self.assertEqual(self.run_due(), [True])
+        # Finished jobs no longer block the key
+        self.assertNotEqual(jobs.enqueue('test_flaky', dedupe_key='once', fail_times=0), first)
+        with self.assertRaises(ValueError):
+            jobs.enqueue('no_such_task')
+
+    def test_retries_with_backoff_then_fails(self):
+        job = jobs.enqueue('test_flaky', fail_times=5)
+        self.assertEqual(self.run_due(), [False])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('RuntimeError: not yet', job.last_error)
+        # Not due yet
+        self.assertEqual(jobs.claim('test', 10), [])
+
+        Job.objects.update(run_at=timezone.now())
+        self.assertEqual(self.run_due(), [False])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+
+    def test_scheduled_stale_and_periodic_jobs(self):
+        later = jobs.enqueue('test_flaky', run_at=timezone.now() + timedelta(hours=1), fail_times=0)
+        self.assertEqual(jobs.claim('test', 10), [])
+
+        Job.objects.filter(pk=later.pk).update(
+            status='running', locked_at=timezone.now() - jobs.STALE_AFTER - timedelta(minutes=1))
+        self.assertEqual(jobs.requeue_stale(), 1)
+
+        jobs.schedule_periodic()
+        jobs.schedule_periodic()
+        periodic = Job.objects.filter(dedupe_key__startswith='periodic:')
+        self.assertEqual(periodic.count(), len(jobs.PERIODIC))
+        self.assertIn('close_month', set(periodic.values_list('name', flat=True)))
+
+        # The next run is queued one interval after the last one
+        Job.objects.filter(name='close_month').update(status='done')
+        jobs.schedule_periodic()
+        runs = list(Job.objects.filter(name='close_month').order_by('run_at').values_list('run_at', flat=True))
+        self.assertEqual(runs[1] - runs[0], timedelta(days=1))
+
+    @override_settings(ADMINS=[('Owner', 'owner@example.com')])
+    def test_inventory_view_enqueues_restock_alert(self):
+        item = InventoryItem.objects.create(name='Soap', category='toiletries', quantity=5, minimum_stock=4, unit='bars')
+        for _ in range(2):
+            self.client.post(reverse('inventory_update', args=[item.id]), {'action': 'subtract', 'amount': 1})
+        self.assertEqual(Job.objects.filter(name='restock_alert', status='queued').count(), 1)
+
+        with self.assertLogs('core.jobs', 'INFO') as logs:
+            jobs.run(jobs.claim('test', 10)[0])
+        self.assertIn('restock needed', logs.output[0])
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('Soap: 3 bars left', mail.outbox[0].body)
+
+        # Further sales of a reported item queue nothing
+        self.client.post(reverse('inventory_update', args=[item.id]), {'action': 'subtract', 'amount': 1})
+        self.assertFalse(Job.objects.filter(name='restock_alert', status='queued').exists())
+        jobs.TASKS['restock_alert'][0]()
+        self.assertEqual(len(mail.outbox), 1)
+
+        # Once restocked, running low again is reported again
+        self.client.post(reverse('inventory_update', args=[item.id]), {'action': 'add', 'amount': 20})
+        self.client.post(reverse('inventory_update', args=[item.id]), {'action': 'subtract', 'amount': 20})
+        self.assertTrue(Job.objects.filter(name='restock_alert', status='queued').exists())
+
+
+class JobWorkerTests(TransactionTestCase):
+    # Jobs run on pool threads with their own connections. One thread, as
+    # the shared-cache in-memory test database fails concurrent writers at
+    # once instead of waiting (busy_timeout) like the real database file
+
+    def test_run_jobs_once_drains_due_jobs(self):
+        jobs.enqueue('test_flaky', fail_times=0)
+        jobs.enqueue('test_flaky', fail_times=0)
+        with self.assertLogs('core.jobs', 'INFO'):
+            call_command('run_jobs', '--once', '--threads', '1', stdout=StringIO())
+        self.assertEqual(Job.objects.filter(name='test_flaky', status='done').count(), 2)
+        # Periodic jobs ran once and their next runs are queued for later
+        self.assertTrue(Job.objects.filter(name='close_month', status='done').exists())
+        self.assertTrue(Job.objects.filter(name='close_month', status='queued', run_at__gt=timezone.now()).exists())
+
+
+class AsyncViewTests(TransactionTestCase):
+    # The async views query from pool threads with their own connections,
+    # so test data has to be committed
+
+    def setUp(self):
+        cache.clear()
+        make_transaction(date=date.today())
+        availability.create_booking(**booking_fields())
+
+    async def test_async_pages_match_sync_pages(self):
+        pages = [('dashboard', 'dashboard_async', 'monthly_income'),
+                 ('booking_list', 'booking_list_async', 'room_status'),
+                 ('financial_list', 'financial_list_async', 'total_income')]
+        for sync_name, async_name, key in pages:
+            await cache.aclear()
+            sync_response = await sync_to_async(self.client.get)(reverse(sync_name))
+            await cache.aclear()
+            async_response = await self.async_client.get(reverse(async_name))
+            self.assertEqual(async_response.status_code, 200)
+            self.assertEqual(async_response.context[key], sync_response.context[key])
+
+    @override_settings(PROFILING_SLOW_QUERY_MS=0)
+    async def test_pool_queries_are_profiled(self):
+        with self.assertLogs('core.profiling', 'WARNING') as logs:
+            response = await self.async_client.get(reverse('dashboard_async'))
+        queries = int(re.search(r'"(\d+) queries"', response['Server-Timing']).group(1))
+        self.assertGreater(queries, 0)
+        self.assertTrue(any('slow query' in line and 'core/views.py' in line for line in logs.output))
+
+    async def test_sync_views_under_asgi_are_profiled(self):
+        # The middleware chain runs async here; the view runs on a thread
+        response = await self.async_client.get(reverse('inventory_list'))
+        timing = re.match(r'db;dur=[\d.]+;desc="(\d+) queries", render;dur=([\d.]+)', response['Server-Timing'])
+        self.assertGreater(int(timing.group(1)), 0)
+        self.assertGreater(float(timing.group(2)), 0)
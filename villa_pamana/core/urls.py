@@ -1,5 +1,5 @@
-from django.urls import path
-from . import views
+from django.urls import include, path
+from . import api, async_views, views
 
 urlpatterns = [
     #Dashboard
@@ -9,21 +9,46 @@ urlpatterns = [
     path('inventory/', views.inventory_list, name='inventory_list'),
     path('inventory/add/', views.inventory_add, name='inventory_add'),
     path('inventory/update/<int:item_id>/', views.inventory_update, name='inventory_update'),
+    path('inventory/batch/', views.inventory_batch, name='inventory_batch'),
 
     #To-Do Tasks
     path('todo/', views.todo_list, name='todo_list'),
     path('todo/add/', views.todo_add, name='todo_add'),
     path('todo/toggle/<int:task_id>/', views.todo_toggle, name='todo_toggle'),
     path('todo/delete/<int:task_id>/', views.todo_delete, name='todo_delete'),
+    path('todo/bulk/', views.todo_bulk, name='todo_bulk'),
 
 
     #Bookings
     path('bookings/', views.booking_list, name='booking_list'),
     path('bookings/add/', views.booking_add, name='booking_add'),
+    path('bookings/<int:booking_id>/paid/', views.booking_mark_paid, name='booking_mark_paid'),
+    path('bookings/calendar/', views.booking_calendar, name='booking_calendar'),
+    path('bookings/occupancy/', views.occupancy_report, name='occupancy_report'),
 
     #Financial Transactions
     path('financials/', views.financial_summary, name='financial_list'),
+    path('financials/ledger/', views.financial_ledger, name='financial_ledger'),
+    path('financials/balance/', views.financial_balance, name='financial_balance'),
     path('financials/add/', views.financial_add, name='financial_add'),
+    path('financials/add-many/', views.financial_add_many, name='financial_add_many'),
+    path('financials/bulk/', views.financial_bulk, name='financial_bulk'),
     path('financial/delete/<int:pk>/', views.financial_delete, name='financial_delete'),
+
+    #Async versions of the read-heavy pages (serve under ASGI)
+    path('async/', async_views.dashboard, name='dashboard_async'),
+    path('async/bookings/', async_views.booking_list, name='booking_list_async'),
+    path('async/financials/', async_views.financial_summary, name='financial_list_async'),
+
+    #Search
+    path('search/', views.global_search, name='search'),
+
+    #Exports and imports
+    path('export/<str:dataset>/', views.export_data, name='export_data'),
+    path('import/', views.import_data, name='import_data'),
+
+    #Read-only JSON API
+    path('api/v1/search/', api.search, name='api_search'),
+    path('api/v1/', include(api.router.urls)),
 ]
 
@@ -1,8 +1,19 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import redirect, get_object_or_404
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.contrib import messages
-from django.db.models import Sum, Q, F
-from datetime import date
-from .models import InventoryItem, TodoTask, Booking, FinancialTransaction
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+import io
+from datetime import date, timedelta
+from urllib.parse import urlencode
+from .models import (InventoryItem, TodoTask, RecurringTask, Booking, FinancialTransaction, DailyBalance,
+                     ArchivedBooking, ArchivedTransaction)
+from . import analytics, availability, bulk, caching, exports, imports, inventory, jobs, payments, recurring, room_calendar, rollups, search
+from .pagination import keyset_page
+# django.shortcuts.render, also timed for the profiler (core/profiling.py)
+from .profiling import render
 
 # Create your views here.
 
@@ -20,50 +31,73 @@ def dashboard(request):
 
     today = date.today()
 
+    # The summary is cached per day and dropped whenever a task, item,
+    # booking or transaction changes (see core/signals.py)
+    context = cache.get_or_set(
+        caching.dashboard_key(today),
+        lambda: _dashboard_summary(today),
+        caching.DASHBOARD_TIMEOUT,
+    )
+
+    return render(request, 'core/dashboard.html', context)
+
+def _dashboard_queries(today):
+    """
+    The dashboard's independent queries, as zero-argument callables so the
+    async dashboard (core/async_views.py) can run them concurrently.
+    Querysets are evaluated into lists so the cached copy holds plain data
+    and the template never queries again.
+    """
     # Get incomplete tasks for today or overdue 
     # Q object to handle OR condition using "|"
 
+    # Uses task_priority_idx (is_completed, priority_rank, due_date);
+    # is_completed__in because SQLite cannot use the index for the
+    # "NOT is_completed" that is_completed=False becomes
     tasks = TodoTask.objects.filter(
         Q(due_date=today) | Q(due_date__lt=today),
-        is_completed=False
-    ).order_by('-priority', 'due_date')
+        is_completed__in=[False]
+    ).order_by('priority_rank', 'due_date')
 
-    # Get inventory items that need restocking
-    restock_items = InventoryItem.objects.filter(
-        quantity__lte=F('minimum_stock'))
-    
-    # Calculate monthly financial summary
-    first_day_of_month = today.replace(day=1)
+    # Get inventory items that need restocking, or will run out within the
+    # forecast window at their current burn rate
+    restock_items = inventory.restock_alerts(today)
 
-    monthly_income = FinancialTransaction.objects.filter(
-        transaction_type='income',
-        date__gte=first_day_of_month,
-        date__lte=today
-    ).aggregate(total=Sum('amount'))['total'] or 0
-
-    monthly_expenses = FinancialTransaction.objects.filter(
-        transaction_type='expense',
-        date__gte=first_day_of_month,
-        date__lte=today
-    ).aggregate(total=Sum('amount'))['total'] or 0
-
-    monthly_profit = monthly_income - monthly_expenses
+    # Monthly financial summary from the daily rollup rows;
+    # income and expenses come back together from one aggregate query
+    first_day_of_month = today.replace(day=1)
 
     #get Today's Bookings (check-in)
     todays_checkins = Booking.objects.filter(check_in=today)
 
+    def todays_tasks():
+        # Recurring tasks due today have to exist before they can be listed
+        recurring.materialize(today)
+        return list(tasks)
+
+    return {
+        'tasks': todays_tasks,
+        'restock_alerts': lambda: list(restock_items),
+        'monthly': lambda: rollups.totals(first_day_of_month, today),
+        'todays_checkins': lambda: list(todays_checkins),
+    }
+
+def _dashboard_context(today, results):
     #prepare context
-    context = {
-        'tasks': tasks,
-        'restock_alerts': restock_items,
-        'monthly_income': monthly_income,
-        'monthly_expenses': monthly_expenses,
-        'monthly_profit': monthly_profit,
-        'todays_checkins': todays_checkins,
+    monthly = results['monthly']
+    return {
+        'tasks': results['tasks'],
+        'restock_alerts': results['restock_alerts'],
+        'monthly_income': monthly['income'],
+        'monthly_expenses': monthly['expenses'],
+        'monthly_profit': monthly['net'],
+        'todays_checkins': results['todays_checkins'],
         'today' : today,
     }
 
-    return render(request, 'core/dashboard.html', context)
+def _dashboard_summary(today):
+    results = {name: query() for name, query in _dashboard_queries(today).items()}
+    return _dashboard_context(today, results)
 
 def inventory_list(request):
     items = InventoryItem.objects.all().order_by('category', 'name')
@@ -91,31 +125,84 @@ def inventory_add(request):
         messages.success(request, 'Inventory item added successfully.')
         return redirect('inventory_list')
     
-    return render(request, 'core/inventory_add.html')
+    # The add form lives on the inventory page
+    return redirect('inventory_list')
 
 def inventory_update(request, item_id):
     item = get_object_or_404(InventoryItem, id=item_id)
 
     if request.method == 'POST':
         action = request.POST.get('action')
-        amount = int(request.POST.get('amount', 0))
+        try:
+            amount = int(request.POST.get('amount', 0))
+        except ValueError:
+            amount = 0
+
+        if amount <= 0:
+            messages.error(request, 'Please enter a quantity greater than zero.')
+            return redirect('inventory_list')
+
+        # The update form sends 'subtract'; older forms sent 'remove'
+        if action in ('remove', 'subtract'):
+            delta, reason = -amount, 'usage'
+        else:
+            delta, reason = amount, 'delivery'
+
+        try:
+            inventory.apply_movement(item.id, delta, reason)
+        except inventory.InsufficientStock as error:
+            messages.error(request, ' '.join(error.messages))
+            return redirect('inventory_list')
+
+        # The restock email runs in the background (core/tasks.py), only
+        # when this usage left the item low and not yet reported
+        if delta < 0 and inventory.needs_alert([item.id]):
+            jobs.enqueue('restock_alert', dedupe_key='restock_alert')
 
-        if action == 'add':
-            item.quantity += amount
-        elif action == 'remove':
-            item.quantity -= amount 
-
-        item.save()
         messages.success(request, 'Inventory item updated successfully.')
         return redirect('inventory_list')
     return redirect('inventory_list')
 
+def inventory_batch(request):
+    """
+    Apply a whole delivery, usage sheet or stock-take in one transaction.
+    The form posts one 'quantity_<item id>' field per item; blank ones are skipped.
+    """
+    if request.method == 'POST':
+        reason = request.POST.get('reason')
+        values = {}
+        for key, value in request.POST.items():
+            if key.startswith('quantity_') and value.strip():
+                try:
+                    values[int(key[len('quantity_'):])] = int(value)
+                except ValueError:
+                    messages.error(request, f'Invalid quantity: {value}')
+                    return redirect('inventory_list')
+
+        try:
+            if reason == 'stocktake':
+                inventory.stocktake(values)
+            elif reason == 'usage':
+                inventory.apply_movements({pk: -abs(qty) for pk, qty in values.items()}, 'usage')
+            else:
+                inventory.apply_movements({pk: abs(qty) for pk, qty in values.items()}, 'delivery')
+        except inventory.InsufficientStock as error:
+            messages.error(request, ' '.join(error.messages))
+            return redirect('inventory_list')
+
+        if reason != 'delivery' and inventory.needs_alert(values):
+            jobs.enqueue('restock_alert', dedupe_key='restock_alert')
+        messages.success(request, f'{len(values)} inventory item(s) updated.')
+    return redirect('inventory_list')
+
 def todo_list(request):
-    tasks = TodoTask.objects.all().order_by('-priority', 'due_date')
+    recurring.materialize()
+    tasks = TodoTask.objects.all().order_by('priority_rank', 'due_date')
 
-    #Seperate incomplete vs complete
-    incomplete_tasks = tasks.filter(is_completed=False)
-    completed_tasks = tasks.filter(is_completed=True)
+    #Seperate incomplete vs complete (is_completed__in so SQLite uses
+    #task_priority_idx, see _dashboard_queries)
+    incomplete_tasks = tasks.filter(is_completed__in=[False])
+    completed_tasks = tasks.filter(is_completed__in=[True])
 
     context={
         'incomplete_tasks': incomplete_tasks,
@@ -130,6 +217,20 @@ def todo_add(request):
         description = request.POST.get('description')
         priority = request.POST.get('priority')
         due_date = request.POST.get('due_date')
+        repeat = request.POST.get('repeat')
+
+        # Repeating tasks are stored once; the daily/weekly rows are
+        # generated when the list is shown (see core/recurring.py)
+        if repeat in dict(RecurringTask.FREQUENCY_CHOICES):
+            RecurringTask.objects.create(
+                title=title,
+                description=description or '',
+                priority=priority,
+                frequency=repeat,
+                start_date=due_date or date.today(),
+            )
+            messages.success(request, f'{repeat.capitalize()} task added successfully.')
+            return redirect('todo_list')
 
         TodoTask.objects.create(
             title=title,
@@ -147,7 +248,7 @@ def todo_toggle(request, task_id):
     task.is_completed = not task.is_completed
     task.save()
 
-    status = 'completed' if task.completed else 'reopened'
+    status = 'completed' if task.is_completed else 'reopened'
     messages.success(request, f'Task {status}!')
     return redirect('todo_list')
 
@@ -157,75 +258,431 @@ def todo_delete(request, task_id):
     messages.success(request, 'Task deleted successfully.')
     return redirect('todo_list')
 
+def _selected_ids(request):
+    # Checkbox values from a bulk form, ignoring anything that is not an id
+    return [int(value) for value in request.POST.getlist('ids') if value.isdigit()]
+
+def todo_bulk(request):
+    """
+    Change every ticked task at once: complete, reopen, toggle, delete or
+    set the priority (action=..., ids=..., priority=...).
+    """
+    if request.method == 'POST':
+        ids = _selected_ids(request)
+        try:
+            count = bulk.update_tasks(ids, request.POST.get('action'), request.POST.get('priority'))
+        except ValueError as error:
+            messages.error(request, str(error))
+        else:
+            messages.success(request, f'{count} task(s) updated.')
+    return redirect('todo_list')
+
+def _availability_range(request, today):
+    try:
+        check_in = date.fromisoformat(request.GET.get('check_in', ''))
+        check_out = date.fromisoformat(request.GET.get('check_out', ''))
+    except ValueError:
+        check_in, check_out = today, today + timedelta(days=1)
+    return check_in, check_out
+
+def _past_bookings(request, today):
+    past = Booking.objects.filter(check_out__lt=today).order_by('-check_in')
+    # Archived bookings only when the full history is asked for (?history=1)
+    if request.GET.get('history') != '1':
+        return past
+    archived = ArchivedBooking.objects.order_by('-check_in')
+    return sorted([*past, *archived], key=lambda booking: booking.check_in, reverse=True)
+
 def booking_list(request):
     bookings = Booking.objects.all().order_by('-check_in')
 
     #Upcoming bookings 
     today = date.today()
     upcoming = bookings.filter(check_out__gte=today)
-    past = bookings.filter(check_out__lt=today)
+    past = _past_bookings(request, today)
+
+    # Room availability for tonight, or for the range asked for
+    check_in, check_out = _availability_range(request, today)
+    free = availability.free_rooms(check_in, check_out)
+    room_status = [(room, room in free) for room in availability.ROOMS]
 
     context = {
         'upcoming_bookings': upcoming,
         'past_bookings': past,
+        'room_status': room_status,
+        'availability_check_in': check_in,
+        'availability_check_out': check_out,
+        'today': today,
+        'history': request.GET.get('history') == '1',
     }
     return render(request, 'core/booking_list.html', context)
 
 def booking_add(request):
     if request.method == 'POST':
-        Booking.objects.create(
-            guest_name=request.POST.get('guest_name'),
-            contact_number=request.POST.get('contact_number'),
-            room_number=request.POST.get('room_number'),
-            number_of_guests=request.POST.get('number_of_guests'),
-            check_in=request.POST.get('check_in'),
-            check_out=request.POST.get('check_out'),
-            payment_amount=request.POST.get('payment_amount'),
-            payment_status=request.POST.get('payment_status'),
-        )
+        try:
+            # Rejects the booking if the room is taken for any of the nights
+            booking = availability.create_booking(
+                guest_name=request.POST.get('guest_name'),
+                contact_number=request.POST.get('contact_number'),
+                room_number=request.POST.get('room_number'),
+                number_of_guests=request.POST.get('number_of_guests'),
+                check_in=request.POST.get('check_in'),
+                check_out=request.POST.get('check_out'),
+                payment_amount=request.POST.get('payment_amount'),
+                payment_status=request.POST.get('payment_status'),
+            )
+        except ValidationError as error:
+            messages.error(request, ' '.join(error.messages))
+            return redirect('booking_list')
+
+        # A booking paid up front gets its income row straight away
+        if booking.payment_status == 'paid':
+            payments.mark_paid(Booking.objects.filter(pk=booking.pk))
+
         messages.success(request, 'Booking added successfully.')
         return redirect('booking_list')
     return redirect('booking_list')
 
+def booking_mark_paid(request, booking_id):
+    if request.method == 'POST':
+        booking = get_object_or_404(Booking, id=booking_id)
+        # Records the income once, however many times the button is pressed
+        if payments.mark_paid(Booking.objects.filter(pk=booking.pk)):
+            messages.success(request, f'Booking for {booking.guest_name} marked as paid. '
+                                      f'Income of P{booking.payment_amount} recorded.')
+        else:
+            messages.info(request, f'Booking for {booking.guest_name} was already paid.')
+    return redirect('booking_list')
+
+def booking_calendar(request):
+    """
+    Month calendar of bookings, rooms by nights (default: this month).
+    ?month=YYYY-MM picks another month.
+    """
+    today = date.today()
+    month = today.replace(day=1)
+    try:
+        month = date.fromisoformat(request.GET.get('month', '') + '-01')
+    except ValueError:
+        pass
+    # The previous and next month links need a year either side
+    if not date.min.year < month.year < date.max.year:
+        month = today.replace(day=1)
+
+    context = {
+        'month': month,
+        'previous_month': (month - timedelta(days=1)).replace(day=1),
+        'next_month': room_calendar.next_month(month),
+        # One query on a cache miss, none on a hit
+        'grid': room_calendar.month_html(month),
+    }
+    return render(request, 'core/booking_calendar.html', context)
+
+def occupancy_report(request):
+    """
+    Occupancy, ADR and RevPAR per room for a range of nights
+    (default: this year up to last night).
+    """
+    today = date.today()
+    end = today - timedelta(days=1)
+    start = end.replace(month=1, day=1)
+    try:
+        start = date.fromisoformat(request.GET.get('start', ''))
+    except ValueError:
+        pass
+    try:
+        end = date.fromisoformat(request.GET.get('end', ''))
+    except ValueError:
+        pass
+
+    # Keep the report to ten years so a typo cannot ask for centuries
+    if end < start or (end - start).days > 3660:
+        messages.error(request, 'Please choose a last night after the first night, at most ten years later.')
+        end = start
+
+    return render(request, 'core/occupancy.html', {'report': analytics.report(start, end)})
+
+LEDGER_PAGE_SIZE = 50
+
+# Blank rows on the multi-row transaction form
+BULK_ENTRY_ROWS = 8
+
+
+def _filter_ledger(transactions, filters):
+    if 'start' in filters:
+        transactions = transactions.filter(date__gte=filters['start'])
+    if 'end' in filters:
+        transactions = transactions.filter(date__lte=filters['end'])
+    if 'category' in filters:
+        transactions = transactions.filter(category=filters['category'])
+    return transactions
+
+
+def _ledger_filters(request):
+    """
+    Read the ledger's date range and category filters from the query string.
+    Returns (filters, queryset) with invalid values dropped. With ?history=1
+    the queryset is a list: the live and the archived transactions.
+    """
+    filters = {}
+    for key in ('start', 'end'):
+        try:
+            filters[key] = date.fromisoformat(request.GET.get(key, ''))
+        except ValueError:
+            pass
+
+    category = request.GET.get('category')
+    if category in dict(FinancialTransaction.CATEGORY_CHOICES):
+        filters['category'] = category
+    if request.GET.get('history') == '1':
+        filters['history'] = 1
+
+    transactions = _filter_ledger(FinancialTransaction.objects.all(), filters)
+    # keyset_page merges the archive in by date
+    if 'history' in filters:
+        transactions = [transactions, _filter_ledger(ArchivedTransaction.objects.all(), filters)]
+
+    return filters, transactions
+
+
+def _ledger_page(request):
+    filters, transactions = _ledger_filters(request)
+    rows, next_cursor = keyset_page(
+        transactions, request.GET.get('cursor'), page_size=LEDGER_PAGE_SIZE)
+
+    next_page = None
+    if next_cursor:
+        next_page = urlencode({**filters, 'cursor': next_cursor})
+    return filters, rows, next_page
+
+
 def financial_summary(request):
-    transactions = FinancialTransaction.objects.all().order_by('-date')
+    filters, transactions, next_page = _ledger_page(request)
 
-    #Calculate totals
-    total_income = transactions.filter(
-        transaction_type='income').aggregate(total=Sum('amount'))['total'] or 0
+    #Calculate totals from the monthly rollup rows
+    totals = rollups.totals()
 
-    total_expenses = transactions.filter(
-        transaction_type='expense').aggregate(total=Sum('amount'))['total'] or 0
+    # Row count for the current filters, also from the rollup (no COUNT(*))
+    filtered_totals = totals
+    if filters:
+        filtered_totals = rollups.totals(
+            filters.get('start'), filters.get('end'), filters.get('category'))
 
-    net_profit = total_income - total_expenses
+    context = _financial_context(filters, transactions, next_page, totals, filtered_totals)
+    return render(request, 'core/financial.html', context)
 
-    context = {
+def _financial_context(filters, transactions, next_page, totals, filtered_totals):
+    total_income = totals['income']
+    total_expenses = totals['expenses']
+    net_profit = totals['net']
+
+    average_transaction = 0
+    if totals['count']:
+        average_transaction = (total_income + total_expenses) / totals['count']
+
+    return {
         'transactions': transactions,
+        'next_page': next_page,
+        'filters': filters,
+        'filter_query': urlencode(filters),
+        'category_choices': FinancialTransaction.CATEGORY_CHOICES,
+        'transaction_count': filtered_totals['count'],
+        'average_transaction': average_transaction,
         'total_income': total_income,
         'total_expenses': total_expenses,
         'net_profit': net_profit,
+        'today': date.today(),
     }
 
-    return render(request, 'core/financial.html', context)
+def financial_ledger(request):
+    """
+    Next page of the transaction history, rendered as table rows only.
+    Used by the "Older" link so the summary cards are not rebuilt.
+    """
+    filters, transactions, next_page = _ledger_page(request)
+
+    response = render(request, 'core/financial_rows.html', {'transactions': transactions})
+    response['X-Next-Page'] = next_page or ''
+    return response
+
+def financial_balance(request):
+    """
+    Running balance over time as JSON, for the chart on the financial page:
+    {"points": [["YYYY-MM-DD", "balance"], ...]}, one point per day with
+    transactions. Reads the DailyBalance snapshots only.
+    Optional filters: ?start=YYYY-MM-DD&end=YYYY-MM-DD
+    """
+    dates = {}
+    for key in ('start', 'end'):
+        try:
+            dates[key] = date.fromisoformat(request.GET.get(key, ''))
+        except ValueError:
+            pass
+
+    snapshots = DailyBalance.objects.all()
+    if 'start' in dates:
+        snapshots = snapshots.filter(date__gte=dates['start'])
+    if 'end' in dates:
+        snapshots = snapshots.filter(date__lte=dates['end'])
+    points = [[day.isoformat(), str(balance)] for day, balance in snapshots.values_list('date', 'balance')]
+
+    # Start the line at the balance carried into the range
+    if 'start' in dates and (not points or points[0][0] != dates['start'].isoformat()):
+        opening = rollups.balance_on(dates['start'] - timedelta(days=1))
+        points.insert(0, [dates['start'].isoformat(), str(opening)])
+
+    return JsonResponse({'points': points})
 
 def financial_add(request):
     if request.method == 'POST':
-        FinancialTransaction.objects.create(
-            transaction_type=request.POST.get('transaction_type'),
-            category=request.POST.get('category'),
-            amount=request.POST.get('amount'),
-            description=request.POST.get('description'),
-            date=request.POST.get('date'),
-        )
+        # Rollup rows are updated by signals inside the same transaction
+        with transaction.atomic():
+            FinancialTransaction.objects.create(
+                transaction_type=request.POST.get('transaction_type'),
+                category=request.POST.get('category'),
+                amount=request.POST.get('amount'),
+                description=request.POST.get('description'),
+                date=request.POST.get('date'),
+            )
         messages.success(request, 'Financial transaction added successfully.')
         return redirect('financial_list')
     return redirect('financial_list')
 
 def financial_delete(request, pk):
     if request.method== 'POST':
-        transaction = get_object_or_404(FinancialTransaction, pk=pk)
-        amount = transaction.amount
-        transaction.delete()
+        with transaction.atomic():
+            financial_transaction = get_object_or_404(FinancialTransaction, pk=pk)
+            amount = financial_transaction.amount
+            financial_transaction.delete()
 
         messages.success(request, f'Transaction of P{amount} deleted!')
-    return redirect('financial_list')
\ No newline at end of file
+    return redirect('financial_list')
+
+def financial_bulk(request):
+    """
+    Delete or recategorise every ticked transaction at once
+    (action=delete|category, ids=..., category=...).
+    """
+    if request.method == 'POST':
+        ids = _selected_ids(request)
+        try:
+            count = bulk.update_transactions(ids, request.POST.get('action'), request.POST.get('category'))
+        except ValueError as error:
+            messages.error(request, str(error))
+        else:
+            messages.success(request, f'{count} transaction(s) updated.')
+    return redirect('financial_list')
+
+def financial_add_many(request):
+    """
+    Enter several transactions on one form. All rows are saved together
+    with one bulk_create, or none are if any row is invalid.
+    """
+    today = date.today()
+    blank = {'transaction_type': 'income', 'category': 'booking', 'amount': '', 'description': '', 'date': today.isoformat()}
+    rows = [dict(blank) for _ in range(BULK_ENTRY_ROWS)]
+    errors = []
+
+    if request.method == 'POST':
+        # One list per column, one entry per form row
+        columns = {name: request.POST.getlist(name) for name in bulk.TRANSACTION_FIELDS}
+        count = max(len(values) for values in columns.values())
+        rows = [{name: values[number] if number < len(values) else '' for name, values in columns.items()}
+                for number in range(count)]
+        try:
+            saved = bulk.add_transactions(rows)
+        except ValidationError as error:
+            errors = error.messages
+        else:
+            messages.success(request, f'{saved} transaction(s) added.')
+            return redirect('financial_list')
+
+    context = {
+        'rows': rows,
+        'errors': errors,
+        'type_choices': FinancialTransaction.TRANSACTION_TYPE_CHOICES,
+        'category_choices': FinancialTransaction.CATEGORY_CHOICES,
+    }
+    return render(request, 'core/financial_add_many.html', context)
+
+def export_data(request, dataset):
+    """
+    Stream a dataset as CSV or NDJSON (?format=ndjson).
+    Optional filters: ?start=YYYY-MM-DD&end=YYYY-MM-DD&category=...
+    ?history=1 includes archived rows.
+    """
+    if dataset not in exports.DATASETS:
+        raise Http404('Unknown export')
+
+    file_format = request.GET.get('format', 'csv')
+    if file_format not in exports.FORMATS:
+        file_format = 'csv'
+
+    filters = {}
+    for key in ('start', 'end'):
+        try:
+            filters[key] = date.fromisoformat(request.GET.get(key, ''))
+        except ValueError:
+            pass
+    if request.GET.get('category'):
+        filters['category'] = request.GET['category']
+    if request.GET.get('history') == '1':
+        filters['history'] = True
+
+    response = StreamingHttpResponse(
+        exports.stream(dataset, file_format, **filters),
+        content_type=exports.FORMATS[file_format],
+    )
+    filename = f'{dataset}-{date.today():%Y%m%d}.{file_format}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+def import_data(request):
+    """
+    Upload a CSV of transactions, inventory or bookings. Valid rows are
+    inserted in bulk and rejected rows are listed with their line numbers.
+    """
+    context = {'datasets': sorted(imports.DATASETS)}
+
+    if request.method == 'POST':
+        dataset = request.POST.get('dataset')
+        upload = request.FILES.get('file')
+
+        if dataset not in imports.DATASETS or upload is None:
+            messages.error(request, 'Please choose what to import and a CSV file.')
+            return redirect('import_data')
+
+        # Decode the upload as a stream instead of reading it into memory
+        text = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        try:
+            report = imports.import_csv(dataset, text)
+        except UnicodeDecodeError:
+            messages.error(request, 'The file is not UTF-8 encoded CSV.')
+            return redirect('import_data')
+
+        context.update({'dataset': dataset, 'report': report, 'rejected': sorted(report.rejected)})
+        if report.inserted:
+            messages.success(request, f'Imported {report.inserted} {dataset} row(s).')
+
+    return render(request, 'core/import.html', context)
+
+# Where each kind of search result is listed
+SEARCH_RESULT_PAGES = {
+    'booking': 'booking_list',
+    'transaction': 'financial_list',
+    'inventory': 'inventory_list',
+    'task': 'todo_list',
+}
+
+def global_search(request):
+    """
+    Search guests, transactions, inventory and tasks at once (the search
+    box in the navigation bar). Best matches first; each word is matched as
+    the start of a word.
+    """
+    query = request.GET.get('q', '').strip()
+    results = search.search(query) if query else []
+    for result in results:
+        result['page'] = SEARCH_RESULT_PAGES[result['kind']]
+
+    return render(request, 'core/search.html', {'query': query, 'results': results})
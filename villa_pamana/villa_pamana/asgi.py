@@ -5,6 +5,24 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Serving under ASGI
+------------------
+The async pages in core/async_views.py (/async/, /async/bookings/ and
+/async/financials/) run their queries concurrently when served by an ASGI
+server. From the directory containing manage.py:
+
+    pip install uvicorn
+    uvicorn villa_pamana.asgi:application --host 0.0.0.0 --port 8000 --workers 2
+
+The sync pages work under ASGI as well; Django runs them in a thread.
+Static files are not served by this application, so use collectstatic and
+a web server in front. ``ASYNC_DB_THREADS`` (default 4) sets how many
+queries one worker process runs at once.
+
+To compare the two paths under concurrent load:
+
+    python manage.py bench_async --requests 200 --concurrency 8
 """
 
 import os
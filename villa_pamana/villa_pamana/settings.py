@@ -12,20 +12,29 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 
+from decouple import Csv, config
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 
-# Quick-start development settings - unsuitable for production
+# Environment profile
+# Values below come from environment variables or a .env file next to
+# manage.py (python-decouple); the defaults are for development. For
+# production set at least:
+#   DEBUG=False
+#   SECRET_KEY=<long random string>
+#   ALLOWED_HOSTS=inn.example.com,localhost
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
+# Compare the two profiles with: manage.py bench_startup
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-0(v@makyss3!@dn0tgcwdr^k_v9f^x4+7sj+*15n&+x03==&^u'
+SECRET_KEY = config('SECRET_KEY', default='django-insecure-0(v@makyss3!@dn0tgcwdr^k_v9f^x4+7sj+*15n&+x03==&^u')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = config('DEBUG', default=True, cast=bool)
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='', cast=Csv())
 
 
 # Application definition
@@ -37,17 +46,27 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'rest_framework',
     'core'
 ]
 
+# StaticFilesMiddleware answers /static/ requests itself, so sessions, CSRF
+# and profiling never run for them.
+# GZip compresses what every later middleware returns; ConditionalGet comes
+# after it so ETags are computed on the uncompressed page, and answers
+# If-None-Match/If-Modified-Since with 304 Not Modified
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
+    'django.middleware.gzip.GZipMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'villa_pamana.urls'
@@ -56,13 +75,21 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Templates are read and compiled once per process. In
+            # development runserver's autoreloader resets the cache when a
+            # template changes.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -73,14 +100,118 @@ WSGI_APPLICATION = 'villa_pamana.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Production profile for SQLite (core/backends/sqlite3):
+# - WAL lets reads carry on while a write is in progress
+# - synchronous=NORMAL is safe with WAL and skips an fsync per commit
+# - busy_timeout makes a writer wait for the lock instead of failing
+# - mmap_size and cache_size (negative = KiB) keep hot pages in memory
+# - BEGIN IMMEDIATE takes the write lock when a transaction starts
+# - CONN_MAX_AGE reuses each thread's connection across requests
+# Compare against the stock settings with: manage.py load_test
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'ENGINE': 'core.backends.sqlite3',
+        'NAME': config('DATABASE_PATH', default=str(BASE_DIR / 'db.sqlite3')),
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'pragmas': {
+                'journal_mode': 'WAL',
+                'synchronous': 'NORMAL',
+                'busy_timeout': 20000,
+                'mmap_size': 128 * 1024 * 1024,
+                'cache_size': -20000,
+                'temp_store': 'MEMORY',
+            },
+        },
+    }
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# The dashboard summary is cached here. Local memory is per process, so
+# deployments running several worker processes should point this at a shared
+# backend (file-based, database or Redis) so invalidation reaches every worker.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'villa-pamana',
     }
 }
 
 
+# REST framework (core/api.py)
+# JSON only; pagination is set per view in core/api.py. The API lists guest
+# names and contact numbers, so only logged-in users (session or HTTP basic
+# auth) may use it; anonymous requests get 403.
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': ['rest_framework.renderers.JSONRenderer'],
+    'DEFAULT_PARSER_CLASSES': ['rest_framework.parsers.JSONParser'],
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAuthenticated'],
+}
+
+
+# Request profiling (core/middleware.py)
+# Share of requests that get a Server-Timing header and are checked against
+# the slow thresholds (1.0 = all of them, 0 = off). Times are milliseconds.
+
+PROFILING_SAMPLE_RATE = config('PROFILING_SAMPLE_RATE', default=1.0, cast=float)
+PROFILING_SLOW_REQUEST_MS = 500
+PROFILING_SLOW_QUERY_MS = 100
+
+
+# Logging
+# https://docs.djangoproject.com/en/5.2/topics/logging/
+# Slow requests and queries go to slow.log, rotated at 5 MB with 3 old files kept.
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'timestamped': {
+            'format': '{asctime} {message}',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        'slow_log': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': BASE_DIR / 'slow.log',
+            'maxBytes': 5 * 1024 * 1024,
+            'backupCount': 3,
+            'delay': True,
+            'formatter': 'timestamped',
+        },
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'timestamped',
+        },
+    },
+    'loggers': {
+        'core.profiling': {
+            'handlers': ['slow_log'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+        # Background job worker (manage.py run_jobs)
+        'core.jobs': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -117,6 +248,24 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# `manage.py collectstatic` copies every static file here. With DEBUG off
+# the copies get content-hashed names (site.3f2a9c1b.css, listed in
+# staticfiles.json) plus .gz/.br precompressed versions (core/storage.py),
+# and core.middleware.StaticFilesMiddleware serves them with far-future
+# cache headers. Run collectstatic again after changing a static file.
+STATIC_ROOT = config('STATIC_ROOT', default=str(BASE_DIR / 'staticfiles'))
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    # Development (and tests) serve the files straight from core/static
+    'staticfiles': {
+        'BACKEND': ('django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+                    else 'core.storage.PrecompressedManifestStaticFilesStorage'),
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 